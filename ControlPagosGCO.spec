@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('icon.ico', '.')],
-    hiddenimports=[],
+    hiddenimports=['control_pagos.proceso', 'control_pagos.cli'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
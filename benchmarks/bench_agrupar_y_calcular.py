@@ -0,0 +1,114 @@
+"""
+Benchmark: agrupar_y_calcular por columnas vs. la versión anterior fila a fila
+
+Verifica que ambas produzcan exactamente la misma salida (mismos tipos y el
+mismo CSV byte a byte) y compara los tiempos.
+
+Uso:
+    python benchmarks/bench_agrupar_y_calcular.py --filas 1000 100000 1000000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from control_pagos.escritor_proyeccion import (  # noqa: E402
+    COLUMNA_TIPO_FILA,
+    FILA_DETALLE,
+    FILA_TOTAL,
+    FILA_VACIA,
+)
+from control_pagos.proyeccion import agrupar_y_calcular  # noqa: E402
+
+
+def agrupar_y_calcular_referencia(df):
+    """Implementación anterior (groupby + iterrows), conservada para comparar"""
+    df['VALOR A PAGAR'] = pd.to_numeric(df['VALOR A PAGAR'], errors='coerce').fillna(0)
+    df = df.sort_values(by=['IMPORTADOR', 'PROVEEDOR']).reset_index(drop=True)
+
+    filas_resultado = []
+    grupos = df.groupby(['IMPORTADOR', 'PROVEEDOR'], sort=False)
+
+    for (importador, proveedor), grupo in grupos:
+        for _, registro in grupo.iterrows():
+            row_dict = registro.to_dict()
+            row_dict[COLUMNA_TIPO_FILA] = FILA_DETALLE
+            filas_resultado.append(row_dict)
+
+        if len(grupo) > 1:
+            total = grupo['VALOR A PAGAR'].sum()
+            moneda = grupo['MONEDA'].iloc[0]
+
+            fila_total = {col: '' for col in df.columns}
+            fila_total['VALOR A PAGAR'] = total
+            fila_total['MONEDA'] = moneda
+            fila_total[COLUMNA_TIPO_FILA] = FILA_TOTAL
+            filas_resultado.append(fila_total)
+
+        fila_vacia = {col: '' for col in df.columns}
+        fila_vacia[COLUMNA_TIPO_FILA] = FILA_VACIA
+        filas_resultado.append(fila_vacia)
+        filas_resultado.append(fila_vacia.copy())
+
+    return pd.DataFrame(filas_resultado)
+
+
+def generar_segunda_hoja(filas, semilla=7):
+    """Genera registros con la forma de preparar_datos_segunda_hoja"""
+    rnd = random.Random(semilla)
+    importadores = [f"IMPORTADOR {i:02d}" for i in range(12)]
+    proveedores = [f"PROVEEDOR {i:05d}" for i in range(max(filas // 4, 1))]
+    registros = []
+    for _ in range(filas):
+        valor = rnd.choice([f"{rnd.uniform(1, 99999):.2f}", str(rnd.randint(1, 5000)), '', 'N/A'])
+        registros.append({
+            'IMPORTADOR': rnd.choice(importadores + [np.nan]) if rnd.random() < 0.01 else rnd.choice(importadores),
+            'MARCA': rnd.choice(['ESPRIT', 'NAF NAF', 'CHEVIGNON', np.nan]),
+            # Algunos proveedores concentran muchos registros (grupos grandes)
+            'PROVEEDOR': rnd.choice(proveedores[:3] if rnd.random() < 0.1 else proveedores),
+            'NRO. IMPO': str(rnd.randint(1000, 99999)),
+            'MONEDA': rnd.choice(['USD', 'USD', 'EUR', np.nan]),
+            'NOTA CRÉDITO': rnd.choice(['', '0', np.nan]),
+            'VALOR A PAGAR': valor,
+            'ESTADO': rnd.choice(['PAGAR', 'POR PAGAR']),
+        })
+    return pd.DataFrame(registros)
+
+
+def comparar(filas):
+    base = generar_segunda_hoja(filas)
+
+    inicio = time.perf_counter()
+    esperado = agrupar_y_calcular_referencia(base.copy())
+    t_referencia = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    obtenido = agrupar_y_calcular(base.copy())
+    t_columnas = time.perf_counter() - inicio
+
+    pd.testing.assert_frame_equal(obtenido, esperado, check_exact=True)
+    identico = obtenido.to_csv(index=False).encode() == esperado.to_csv(index=False).encode()
+    if not identico:
+        raise AssertionError(f"La salida difiere con {filas} filas")
+
+    print(f"{filas:>9} filas | referencia {t_referencia:8.2f} s | por columnas {t_columnas:7.3f} s | "
+          f"x{t_referencia / max(t_columnas, 1e-9):6.1f} | salida idéntica ({len(obtenido)} filas)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[1000, 100000, 1000000])
+    args = parser.parse_args()
+    for filas in args.filas:
+        comparar(filas)
+
+
+if __name__ == "__main__":
+    main()
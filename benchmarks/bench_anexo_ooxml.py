@@ -0,0 +1,152 @@
+"""
+Anexo al archivo final: partes OOXML vs libro completo
+
+Genera un CONTROL PAGOS.xlsx con una tabla de --filas registros y compara:
+  * anexar_filas: reescribe solo el final de la hoja y la tabla (control_pagos.anexo_ooxml)
+  * libro completo: carga todo el libro con openpyxl, agrega las filas, amplía la
+    tabla y guarda (equivalente sin Excel de abrir, escribir y Save)
+Después de cada anexo se vuelve a leer el archivo con openpyxl y se comprueban
+las filas nuevas, la referencia de la tabla y la dimensión de la hoja.
+
+Uso:
+    python benchmarks/bench_anexo_ooxml.py --filas 200000 --nuevas 50 500 5000
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from openpyxl import Workbook, load_workbook  # noqa: E402
+from openpyxl.worksheet.table import Table  # noqa: E402
+
+from control_pagos.anexo_ooxml import anexar_filas  # noqa: E402
+
+HOJA = 'Pagos Importación'
+COLUMNAS = ['IMPORTADOR', 'MARCA', 'FECHA DE PAGO', 'DIA', 'MES', 'AÑO', 'PROVEEDOR', '# IMPORTACION',
+            'VALOR MONEDA ORIGEN', 'MONEDA', 'VALOR USD', 'FACTOR DE CONVERSION', 'DESCUENTO PRONTO PAGO',
+            'FORMA DE PAGO', 'TIPO DE PAGO', 'FECHA DE APERTURA CREDITO -UTILIZACION LC',
+            'FECHA DE VENCIMIENTO', '# CREDITO', '# DEUDA EXTERNA', 'NOTA CREDITO', 'OBSERVACIONES']
+
+
+def registro(i):
+    """Fila como las de preparar_df_final (fecha como texto dd/mm/aaaa)"""
+    fecha = datetime(2020, 1, 6) + timedelta(days=7 * (i % 300))
+    usd = i % 3 != 0
+    valor = round(1000 + (i * 37) % 90000 + 0.25, 2)
+    return [f'IMPORTADOR {i % 40}', f'MARCA {i % 15}', fecha.strftime('%d/%m/%Y'), fecha.day, fecha.month,
+            fecha.year, f'PROVEEDOR {i % 700}', f'IMP-{i:07d}', valor, 'USD' if usd else 'EUR',
+            valor if usd else '', 1 if usd else '', 0, '', 'CUENTA COMPENSACION', 'N/A', 'N/A', 'N/A', 'N/A',
+            0.0, '']
+
+
+def generar_final(ruta, filas):
+    """
+    Archivo final con una tabla (escrito en modo write_only; la fecha va como
+    fecha). Se agrega <dimension>, que Excel siempre escribe y openpyxl no en
+    este modo.
+    """
+    temporal = ruta.with_suffix('.tmp')
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(HOJA)
+    ws.append(COLUMNAS)
+    for i in range(filas):
+        fila = registro(i)
+        fila[2] = datetime.strptime(fila[2], '%d/%m/%Y')
+        ws.append(fila)
+    tabla = Table(displayName='PagosImportacion', ref=f'A1:U{filas + 1}')
+    tabla._initialise_columns()
+    for columna, nombre in zip(tabla.tableColumns, COLUMNAS):
+        columna.name = nombre
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # columnas de la tabla ya agregadas
+        ws.add_table(tabla)
+    wb.save(temporal)
+
+    with zipfile.ZipFile(temporal) as origen, zipfile.ZipFile(ruta, 'w', zipfile.ZIP_DEFLATED) as destino:
+        for info in origen.infolist():
+            contenido = origen.read(info.filename)
+            if info.filename == 'xl/worksheets/sheet1.xml':
+                contenido = contenido.replace(b'<sheetViews>', f'<dimension ref="A1:U{filas + 1}"/><sheetViews>'.encode(), 1)
+            destino.writestr(info, contenido)
+    temporal.unlink()
+
+
+def anexar_libro_completo(ruta, filas):
+    wb = load_workbook(ruta)
+    ws = wb[HOJA]
+    for fila in filas:
+        ws.append(fila)
+    tabla = next(iter(ws.tables.values()))
+    tabla.ref = f'A1:U{ws.max_row}'
+    tabla.autoFilter.ref = tabla.ref
+    wb.save(ruta)
+
+
+def comprobar(ruta, filas_antes, nuevas):
+    """Relee con openpyxl: filas nuevas, tabla y dimensión"""
+    fin = filas_antes + 1 + len(nuevas)
+    wb = load_workbook(ruta, read_only=True)
+    ws = wb[HOJA]
+    dimension = ws.calculate_dimension()
+    leidas = list(ws.iter_rows(min_row=filas_antes + 2, max_row=fin, values_only=True))
+    wb.close()
+    for esperada, leida in zip(nuevas, leidas):
+        esperada = list(esperada)
+        esperada[2] = datetime.strptime(esperada[2], '%d/%m/%Y')
+        leida = ['' if valor is None else valor for valor in leida]
+        assert leida == esperada, (esperada, leida)
+    assert len(leidas) == len(nuevas)
+    assert dimension == f'A1:U{fin}', dimension
+
+    tabla = next(iter(load_workbook(ruta)[HOJA].tables.values())) if fin <= 20000 else None
+    if tabla is not None:
+        assert tabla.ref == f'A1:U{fin}', tabla.ref
+
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    funcion(*args)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=200000)
+    parser.add_argument('--nuevas', type=int, nargs='+', default=[50, 500, 5000])
+    parser.add_argument('--sin-libro-completo', action='store_true', help="No medir la carga completa con openpyxl")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        carpeta = Path(carpeta)
+        base = carpeta / 'CONTROL PAGOS.xlsx'
+        print(f"Generando archivo final de {args.filas} filas...")
+        generar_final(base, args.filas)
+        print(f"  {base.stat().st_size / 1e6:.1f} MB\n")
+
+        print(f"{'nuevas':>8} {'anexar_filas':>13} {'libro completo':>15}")
+        for cantidad in args.nuevas:
+            nuevas = [registro(args.filas + i) for i in range(cantidad)]
+
+            ruta = carpeta / 'ooxml.xlsx'
+            shutil.copyfile(base, ruta)
+            ooxml = medir(anexar_filas, ruta, nuevas)
+            comprobar(ruta, args.filas, nuevas)
+
+            completo = float('nan')
+            if not args.sin_libro_completo:
+                ruta = carpeta / 'completo.xlsx'
+                shutil.copyfile(base, ruta)
+                completo = medir(anexar_libro_completo, ruta, nuevas)
+            print(f"{cantidad:>8} {ooxml:>12.2f}s {completo:>14.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Registros del archivo final: preparar_df_final por columnas vs apply por fila
+
+Compara CopiarArchivo.preparar_df_final con la versión anterior (dos
+apply(axis=1) para VALOR USD y FACTOR DE CONVERSION y columnas asignadas una a
+una) y comprueba que el resultado es idéntico.
+
+Uso:
+    python benchmarks/bench_df_final.py --filas 1000 10000 100000
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from control_pagos.proceso import CopiarArchivo  # noqa: E402
+from control_pagos.reportero import Reportero  # noqa: E402
+
+FECHA = datetime(2024, 3, 13)
+
+
+def detalle(filas, semilla=1):
+    """DataFrame como el de preparar_datos_segunda_hoja"""
+    rnd = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        'IMPORTADOR': rnd.choice(['MERCADEO Y MODA SAS', 'GCO SAS', 'BASEMENT SAS'], filas),
+        'MARCA': rnd.choice(['AEO', 'ARMI', 'REPLAY'], filas),
+        'PROVEEDOR': [f'PROVEEDOR {i}' for i in rnd.integers(0, 700, filas)],
+        'NRO. IMPO': [str(i) for i in rnd.integers(10000, 99999, filas)],
+        'VALOR A PAGAR': np.round(rnd.random(filas) * 90000, 2),
+        'MONEDA': rnd.choice(['USD', 'USD', 'EUR', 'CNY'], filas),
+    })
+
+
+def preparar_por_filas(df_detalle, fecha_proyeccion):
+    """preparar_df_final antes de construirlo por columnas"""
+    df_final_append = pd.DataFrame()
+    df_final_append['IMPORTADOR'] = df_detalle['IMPORTADOR']
+    df_final_append['MARCA'] = df_detalle['MARCA']
+    df_final_append['FECHA DE PAGO'] = fecha_proyeccion.strftime('%d/%m/%Y')
+    df_final_append['DIA'] = fecha_proyeccion.day
+    df_final_append['MES'] = fecha_proyeccion.month
+    df_final_append['AÑO'] = fecha_proyeccion.year
+    df_final_append['PROVEEDOR'] = df_detalle['PROVEEDOR']
+    df_final_append['# IMPORTACION'] = df_detalle['NRO. IMPO']
+    df_final_append['VALOR MONEDA ORIGEN'] = df_detalle['VALOR A PAGAR']
+    df_final_append['MONEDA'] = df_detalle['MONEDA']
+    df_final_append['VALOR USD'] = df_detalle.apply(
+        lambda row: row['VALOR A PAGAR'] if str(row['MONEDA']).upper() == 'USD' else '', axis=1)
+    df_final_append['FACTOR DE CONVERSION'] = df_detalle.apply(
+        lambda row: 1 if str(row['MONEDA']).upper() == 'USD' else '', axis=1)
+    df_final_append['DESCUENTO PRONTO PAGO'] = 0
+    df_final_append['FORMA DE PAGO'] = ''
+    df_final_append['TIPO DE PAGO'] = 'CUENTA COMPENSACION'
+    df_final_append['FECHA DE APERTURA CREDITO -UTILIZACION LC'] = 'N/A'
+    df_final_append['FECHA DE VENCIMIENTO'] = 'N/A'
+    df_final_append['# CREDITO'] = 'N/A'
+    df_final_append['# DEUDA EXTERNA'] = 'N/A'
+    df_final_append['NOTA CREDITO'] = 0.00
+    df_final_append['OBSERVACIONES'] = ''
+    return df_final_append
+
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+class ReporteroSilencioso(Reportero):
+    def log(self, mensaje, tipo="INFO"):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    copiador = CopiarArchivo(FECHA, reportero=ReporteroSilencioso())
+    copiador.ruta_tasas = None  # sin tabla de tasas, como la versión anterior
+
+    print(f"{'filas':>8} {'por filas':>10} {'columnas':>10}")
+    for filas in args.filas:
+        df = detalle(filas)
+        por_filas, esperado = medir(preparar_por_filas, df, FECHA)
+        columnas, resultado = medir(copiador.preparar_df_final, df, FECHA)
+        pd.testing.assert_frame_equal(resultado, esperado)
+        print(f"{filas:>8} {por_filas:>9.3f}s {columnas:>9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
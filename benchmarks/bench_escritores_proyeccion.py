@@ -0,0 +1,95 @@
+"""
+Benchmark: motores de escritura de la hoja de proyección (COM vs openpyxl)
+
+Cada motor agrega la hoja a su propia copia de un libro base con una hoja
+Control_Pagos, como en el proceso (COM abre el libro con Workbooks.Open).
+
+Uso:
+    python benchmarks/bench_escritores_proyeccion.py --filas 50000
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import Workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from control_pagos.escritor_proyeccion import com_disponible, crear_escritor  # noqa: E402
+
+COLUMNAS = [
+    'IMPORTADOR', 'MARCA', 'PROVEEDOR', 'NRO. IMPO', 'MONEDA',
+    'NOTA CRÉDITO', 'VALOR A PAGAR', 'ESTADO',
+]
+
+
+def generar_proyeccion(filas, semilla=42):
+    """Genera una proyección sintética ya agrupada (detalle, total y separadores)"""
+    rnd = random.Random(semilla)
+    registros = []
+    grupo = 0
+    while len(registros) < filas:
+        grupo += 1
+        importador = f"IMPORTADOR {grupo % 25:02d}"
+        proveedor = f"PROVEEDOR {grupo:05d}"
+        moneda = rnd.choice(['USD', 'USD', 'USD', 'EUR'])
+        tamaño = rnd.randint(1, 6)
+        valores = [round(rnd.uniform(100, 90000), 2) for _ in range(tamaño)]
+        for valor in valores:
+            registros.append([importador, f"MARCA {grupo % 7}", proveedor, str(rnd.randint(1000, 9999)),
+                              moneda, '', valor, 'PAGAR'])
+        if tamaño > 1:
+            registros.append(['', '', '', '', moneda, '', round(sum(valores), 2), ''])
+        registros.append([''] * len(COLUMNAS))
+        registros.append([''] * len(COLUMNAS))
+    return pd.DataFrame(registros[:filas], columns=COLUMNAS)
+
+
+def crear_libro_base(ruta, df):
+    """Libro con una hoja Control_Pagos con los registros de detalle de la proyección"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Control_Pagos'
+    ws.append(COLUMNAS)
+    for fila in df[df['IMPORTADOR'] != ''].itertuples(index=False):
+        ws.append(list(fila))
+    wb.save(ruta)
+
+
+def medir(motor, df, carpeta, ruta_base):
+    ruta = Path(carpeta) / f"proyeccion_{motor}.xlsx"
+    shutil.copyfile(ruta_base, ruta)
+    escritor = crear_escritor(motor, log=lambda mensaje, tipo="INFO": None)
+    inicio = time.perf_counter()
+    escritor.guardar(ruta, df, "FEBRERO 04")
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=50000)
+    args = parser.parse_args()
+
+    df = generar_proyeccion(args.filas)
+    motores = ['openpyxl']
+    if com_disponible():
+        motores.insert(0, 'com')
+    else:
+        print("COM no disponible en este equipo: se omite el motor 'com'")
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_base = Path(carpeta) / 'base.xlsx'
+        crear_libro_base(ruta_base, df)
+        for motor in motores:
+            segundos = medir(motor, df, carpeta, ruta_base)
+            print(f"{motor:>10}: {segundos:8.2f} s  ({args.filas} filas)")
+
+
+if __name__ == "__main__":
+    main()
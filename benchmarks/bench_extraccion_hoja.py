@@ -0,0 +1,79 @@
+"""
+Copia de la hoja Control_Pagos: extracción OOXML vs libro completo
+
+Genera un libro con Control_Pagos y una hoja 'Historico' de tamaño variable y
+compara:
+  * extraer_hoja: copia solo las partes de Control_Pagos (control_pagos.extraccion_hoja)
+  * libro completo: abre todo el libro, borra las demás hojas y guarda (openpyxl;
+    es el equivalente sin Excel de SaveAs + borrar hojas)
+El tiempo de la extracción depende de Control_Pagos y no de 'Historico'.
+
+Uso:
+    python benchmarks/bench_extraccion_hoja.py --filas 20000 --historico 0 50000 200000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from openpyxl import load_workbook  # noqa: E402
+
+from control_pagos.extraccion_hoja import extraer_hoja  # noqa: E402
+from libro_sintetico import generar_libro  # noqa: E402
+
+HOJA = 'Control_Pagos'
+
+
+def generar_origen(ruta, filas, filas_historico):
+    """Libro con Control_Pagos y una hoja 'Historico' de otro tamaño"""
+    generar_libro(ruta, filas)
+    if filas_historico:
+        with tempfile.TemporaryDirectory() as carpeta:
+            historico = Path(carpeta) / 'historico.xlsx'
+            generar_libro(historico, filas_historico, semilla=2, hoja='Historico')
+            wb = load_workbook(ruta)
+            ws = wb.create_sheet('Historico')
+            for fila in load_workbook(historico, read_only=True)['Historico'].iter_rows(values_only=True):
+                ws.append(fila)
+            wb.save(ruta)
+
+
+def copiar_libro_completo(origen, destino):
+    wb = load_workbook(origen)
+    for nombre in wb.sheetnames:
+        if nombre != HOJA:
+            del wb[nombre]
+    wb.save(destino)
+
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    funcion(*args)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=20000)
+    parser.add_argument('--historico', type=int, nargs='+', default=[0, 50000, 200000])
+    args = parser.parse_args()
+
+    print(f"{'historico':>10} {'origen MB':>10} {'extraer_hoja':>13} {'libro completo':>15}")
+    with tempfile.TemporaryDirectory() as carpeta:
+        carpeta = Path(carpeta)
+        for filas_historico in args.historico:
+            origen = carpeta / f'origen_{filas_historico}.xlsx'
+            generar_origen(origen, args.filas, filas_historico)
+            extraccion = medir(extraer_hoja, origen, carpeta / 'extraida.xlsx', HOJA)
+            completo = medir(copiar_libro_completo, origen, carpeta / 'completa.xlsx')
+            print(f"{filas_historico:>10} {origen.stat().st_size / 1e6:>10.1f} "
+                  f"{extraccion:>12.2f}s {completo:>14.2f}s")
+
+
+if __name__ == "__main__":
+    main()
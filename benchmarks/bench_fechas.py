@@ -0,0 +1,80 @@
+"""
+Benchmark: normalizar_fechas vs. pd.to_datetime(dayfirst=True, errors='coerce')
+
+Genera una columna de texto que mezcla fechas de Excel leídas como texto
+('2026-02-04 00:00:00'), fechas digitadas ('04/02/2026') y números de serie
+('46057'). Compara tiempos y cuántos valores interpreta cada opción; el
+resultado de normalizar_fechas se verifica contra la conversión valor a valor.
+
+Uso:
+    python benchmarks/bench_fechas.py --valores 500000
+"""
+
+import argparse
+import random
+import sys
+import time
+import warnings
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from control_pagos.fechas import fecha_de_valor, normalizar_fechas  # noqa: E402
+
+
+def generar_columna(valores, semilla=3):
+    """Columna como la deja pd.read_excel(dtype=str) en una hoja con fechas mezcladas"""
+    rnd = random.Random(semilla)
+    base = datetime(2024, 1, 1)
+    datos = []
+    for _ in range(valores):
+        fecha = base + timedelta(days=rnd.randrange(900))
+        forma = rnd.random()
+        if forma < 0.70:
+            datos.append(str(fecha))
+        elif forma < 0.85:
+            datos.append(fecha.strftime('%d/%m/%Y'))
+        elif forma < 0.93:
+            datos.append(str((fecha - datetime(1899, 12, 30)).days))
+        elif forma < 0.96:
+            datos.append(fecha.strftime('%d-%m-%Y'))
+        elif forma < 0.98:
+            datos.append(None)
+        else:
+            datos.append(rnd.choice(['PENDIENTE', 'N/A', '31/02/2026', 'SIN FECHA']))
+    return pd.Series(datos, dtype=object)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--valores', type=int, default=500000)
+    args = parser.parse_args()
+
+    columna = generar_columna(args.valores)
+
+    inicio = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        anterior = pd.to_datetime(columna, dayfirst=True, errors='coerce')
+    t_anterior = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    normalizado, conteos = normalizar_fechas(columna)
+    t_normalizado = time.perf_counter() - inicio
+
+    esperado = pd.to_datetime(columna.map(fecha_de_valor), errors='coerce').astype(normalizado.dtype)
+    if not esperado.equals(normalizado):
+        raise AssertionError("normalizar_fechas difiere de la conversión valor a valor")
+
+    print(f"{args.valores} valores")
+    print(f"  pd.to_datetime(dayfirst) : {t_anterior:7.3f} s  interpretados {int(anterior.notna().sum()):>8}")
+    print(f"  normalizar_fechas        : {t_normalizado:7.3f} s  interpretados {int(normalizado.notna().sum()):>8}  "
+          f"x{t_anterior / max(t_normalizado, 1e-9):.1f}")
+    print(f"  conteos: {conteos}")
+
+
+if __name__ == "__main__":
+    main()
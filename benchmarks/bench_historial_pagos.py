@@ -0,0 +1,63 @@
+"""
+Totales del archivo final: historial SQLite vs leer CONTROL PAGOS.xlsx
+
+Genera un archivo final de --filas registros, reconstruye el historial
+(control_pagos.historial_pagos) y compara consultas de totales contra leer el
+Excel con pandas y agrupar.
+
+Uso:
+    python benchmarks/bench_historial_pagos.py --filas 200000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pandas as pd  # noqa: E402
+
+from bench_anexo_ooxml import HOJA, generar_final  # noqa: E402
+from control_pagos.historial_pagos import HistorialPagos  # noqa: E402
+
+CONSULTAS = [
+    ("proveedor, un año", dict(por=['proveedor'], desde='2021-01-01', hasta='2021-12-31')),
+    ("importador y moneda", dict(por=['importador', 'moneda'])),
+    ("periodo de un proveedor", dict(por=['periodo'], proveedor='PROVEEDOR 7')),
+]
+
+
+def medir(funcion, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        carpeta = Path(carpeta)
+        final = carpeta / 'CONTROL PAGOS.xlsx'
+        print(f"Generando archivo final de {args.filas} filas...")
+        generar_final(final, args.filas)
+
+        with HistorialPagos(carpeta / 'historial.sqlite') as historial:
+            segundos, registros = medir(historial.reconstruir, final)
+            print(f"  reconstrucción: {segundos:.2f}s ({registros} registros)")
+            segundos, _ = medir(pd.read_excel, final, sheet_name=HOJA)
+            print(f"  pd.read_excel del archivo final (sin agrupar): {segundos:.2f}s\n")
+
+            print(f"{'consulta':<26} {'filas':>6} {'historial':>10}")
+            for nombre, consulta in CONSULTAS:
+                segundos, df = medir(historial.totales, **consulta)
+                print(f"{nombre:<26} {len(df):>6} {segundos * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
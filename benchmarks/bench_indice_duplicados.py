@@ -0,0 +1,82 @@
+"""
+Verificación de duplicados antes de anexar: índice SQLite vs releer el archivo final
+
+Genera un CONTROL PAGOS.xlsx de --filas registros y, para lotes de --nuevas
+registros (la mitad ya anexados), mide:
+  * índice: IndiceDuplicados.separar + registrar (solo las filas nuevas)
+  * releer: leer todo el archivo final con openpyxl y comparar
+La reconstrucción del índice (una vez, o cuando el archivo final cambió por
+fuera) se muestra aparte.
+
+Uso:
+    python benchmarks/bench_indice_duplicados.py --filas 200000 --nuevas 50 500 5000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pandas as pd  # noqa: E402
+
+from bench_anexo_ooxml import COLUMNAS, generar_final, registro  # noqa: E402
+from control_pagos.indice_duplicados import COLUMNAS_CLAVE, IndiceDuplicados, huella_registro  # noqa: E402
+
+
+def lote(filas, cantidad, desde):
+    """'cantidad' registros: la primera mitad ya está en el archivo final, el resto empieza en 'desde'"""
+    repetidos = [registro(i) for i in range(0, filas, max(1, filas // (cantidad // 2 or 1)))][:cantidad // 2]
+    nuevos = [registro(desde + i) for i in range(cantidad - len(repetidos))]
+    return pd.DataFrame(repetidos + nuevos, columns=COLUMNAS)
+
+
+def con_indice(indice, df):
+    nuevos, repetidos = indice.separar(df)
+    indice.registrar(nuevos)
+    return len(repetidos)
+
+
+def releyendo(indice, df):
+    existentes = {huella_registro(valores) for valores in indice.leer_registros_final()}
+    return sum(huella_registro(valores) in existentes
+               for valores in df[list(COLUMNAS_CLAVE)].itertuples(index=False))
+
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=200000)
+    parser.add_argument('--nuevas', type=int, nargs='+', default=[50, 500, 5000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        final = Path(carpeta) / 'CONTROL PAGOS.xlsx'
+        print(f"Generando archivo final de {args.filas} filas...")
+        generar_final(final, args.filas)
+
+        with IndiceDuplicados(final) as indice:
+            segundos, registros = medir(indice.reconstruir)
+            print(f"  reconstrucción del índice: {segundos:.2f}s ({registros} registros)\n")
+
+            print(f"{'nuevas':>8} {'repetidas':>10} {'índice':>9} {'releer':>9}")
+            desde = args.filas
+            for cantidad in args.nuevas:
+                df = lote(args.filas, cantidad, desde)
+                desde += cantidad
+                tiempo_releer, repetidas_releer = medir(releyendo, indice, df)
+                tiempo_indice, repetidas = medir(con_indice, indice, df)
+                assert repetidas == repetidas_releer, (repetidas, repetidas_releer)
+                print(f"{cantidad:>8} {repetidas:>10} {tiempo_indice:>8.3f}s {tiempo_releer:>8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: lector por streaming vs. pd.read_excel(dtype=str) de la hoja completa
+
+Mide tiempo y memoria máxima (tracemalloc) y verifica que las columnas que usa
+el proceso tengan los mismos valores. También mide la lectura filtrada por
+semana, cuya memoria depende solo de los registros de esa semana.
+
+Uso:
+    python benchmarks/bench_lector_control_pagos.py --filas 50000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from control_pagos.lector_control_pagos import (  # noqa: E402
+    MAPEO_COLUMNAS,
+    leer_hoja_streaming,
+    leer_semana_filtrada,
+)
+from libro_sintetico import generar_libro  # noqa: E402
+
+HOJA = 'Control_Pagos'
+
+
+def leer_completo(ruta):
+    """Lector anterior: toda la hoja como texto y renombrado de alias"""
+    df = pd.read_excel(ruta, sheet_name=HOJA, engine='openpyxl', dtype=str)
+    df.columns = [str(col).strip() for col in df.columns]
+    for old_col, new_col in MAPEO_COLUMNAS.items():
+        for actual_col in df.columns:
+            if actual_col.upper() == old_col.upper():
+                df.rename(columns={actual_col: new_col}, inplace=True)
+                break
+    df.columns = [str(col).strip().upper() for col in df.columns]
+    return df
+
+
+def medir(funcion, *args):
+    """Tiempo (sin trazar memoria) y pico de memoria (segunda pasada con tracemalloc)"""
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    segundos = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    funcion(*args)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, segundos, pico / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=50000)
+    parser.add_argument('--fecha', type=lambda t: datetime.strptime(t, '%Y-%m-%d'), default=datetime(2024, 3, 13),
+                        help='Fecha de la semana para la lectura filtrada (aaaa-mm-dd)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = Path(carpeta) / 'control_pagos.xlsx'
+        generar_libro(ruta, args.filas)
+
+        completo, t_completo, m_completo = medir(leer_completo, ruta)
+        (streaming, _), t_streaming, m_streaming = medir(leer_hoja_streaming, ruta, HOJA)
+        semana, t_semana, m_semana = medir(leer_semana_filtrada, ruta, HOJA, args.fecha)
+
+    for columna in streaming.columns:
+        esperado = completo[columna]
+        if columna == 'VALOR A PAGAR':
+            esperado = pd.to_numeric(esperado, errors='coerce')
+            iguales = esperado.equals(streaming[columna])
+        else:
+            iguales = esperado.astype(object).where(esperado.notna(), None).tolist() == \
+                streaming[columna].where(streaming[columna].notna(), None).tolist()
+        if not iguales:
+            raise AssertionError(f"La columna '{columna}' difiere entre lectores")
+
+    print(f"{args.filas} filas, {len(completo.columns)} columnas en la hoja, {len(streaming.columns)} leídas")
+    print(f"  pd.read_excel : {t_completo:7.2f} s  pico {m_completo:8.1f} MB")
+    print(f"  streaming     : {t_streaming:7.2f} s  pico {m_streaming:8.1f} MB")
+    print(f"  filtrado      : {t_semana:7.2f} s  pico {m_semana:8.1f} MB  "
+          f"({len(semana.df_semana)} registros de la semana {semana.inicio} - {semana.fin})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: lector por streaming en serie vs. repartido entre procesos
+
+Mide ambos lectores sobre libros sintéticos de varios tamaños, verifica que
+entreguen el mismo DataFrame y estima el tamaño de hoja (MB de XML) desde el
+que conviene leer en paralelo: ajusta tiempo = a × MB (serie) y tiempo =
+b × MB + c (paralelo) y calcula c / (a - b). UMBRAL_PARALELO en
+lector_paralelo.py se eligió así, con margen. En Windows los procesos se
+inician con 'spawn' (cada uno importa pandas): --inicio spawn lo reproduce.
+
+Uso:
+    python benchmarks/bench_lector_paralelo.py --filas 20000 100000 300000 --procesos 4
+    python benchmarks/bench_lector_paralelo.py --filas 50000 --inicio spawn
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from control_pagos.lector_control_pagos import leer_hoja_streaming  # noqa: E402
+from control_pagos.lector_paralelo import (  # noqa: E402
+    UMBRAL_PARALELO,
+    leer_hoja_paralela,
+    procesos_lectura,
+    tamaño_hoja,
+)
+from libro_sintetico import generar_libro  # noqa: E402
+
+HOJA = 'Control_Pagos'
+
+
+def medir(funcion, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def ajuste(puntos):
+    """Pendiente y ordenada de la recta de mínimos cuadrados de [(x, y), ...]"""
+    n = len(puntos)
+    media_x = sum(x for x, _ in puntos) / n
+    media_y = sum(y for _, y in puntos) / n
+    varianza = sum((x - media_x) ** 2 for x, _ in puntos)
+    if not varianza:
+        return media_y / media_x, 0.0
+    pendiente = sum((x - media_x) * (y - media_y) for x, y in puntos) / varianza
+    return pendiente, media_y - pendiente * media_x
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[20000, 100000, 300000])
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos de lectura (por defecto, uno por núcleo)")
+    parser.add_argument('--inicio', choices=multiprocessing.get_all_start_methods(), default=None,
+                        help="Forma de iniciar los procesos (fork, spawn...)")
+    parser.add_argument('--variado', action='store_true', help="Libro con alias, monedas y fechas variadas")
+    args = parser.parse_args()
+
+    if args.inicio:
+        multiprocessing.set_start_method(args.inicio, force=True)
+    procesos = procesos_lectura(args.procesos)
+    if (os.cpu_count() or 1) == 1:
+        print("⚠ Un solo núcleo disponible: el paralelo solo muestra su costo adicional")
+        procesos = args.procesos or 2
+
+    serie = []
+    paralelo = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        print(f"{'filas':>8} {'MB XML':>7} {'serie s':>8} {'paralelo s':>10}  ({procesos} procesos, "
+              f"{multiprocessing.get_start_method()})")
+        for filas in args.filas:
+            ruta = Path(carpeta) / f'control_pagos_{filas}.xlsx'
+            generar_libro(ruta, filas, variado=args.variado)
+            mb = tamaño_hoja(ruta, HOJA) / (1024 * 1024)
+
+            (df_serie, fecha_serie), t_serie = medir(leer_hoja_streaming, ruta, HOJA)
+            (df_paralelo, fecha_paralelo), t_paralelo = medir(
+                leer_hoja_paralela, ruta, HOJA, procesos=procesos, umbral=0
+            )
+            if fecha_serie != fecha_paralelo or not df_serie.equals(df_paralelo):
+                raise AssertionError(f"Los lectores difieren con {filas} filas")
+
+            serie.append((mb, t_serie))
+            paralelo.append((mb, t_paralelo))
+            print(f"{filas:>8} {mb:>7.1f} {t_serie:>8.2f} {t_paralelo:>10.2f}", flush=True)
+
+    a, _ = ajuste(serie)
+    b, c = ajuste(paralelo)
+    print(f"\nSerie: {a:.3f} s/MB; paralelo: {b:.3f} s/MB + {c:.2f} s")
+    if b < a:
+        print(f"Conviene el paralelo desde unos {c / (a - b):.0f} MB de XML "
+              f"(UMBRAL_PARALELO = {UMBRAL_PARALELO / (1024 * 1024):.0f} MB)")
+    else:
+        print("El paralelo no gana en esta máquina")
+
+
+if __name__ == "__main__":
+    main()
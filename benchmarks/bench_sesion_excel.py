@@ -0,0 +1,114 @@
+"""
+Llamadas a Excel de una ejecución: sesión por etapa vs sesión compartida
+
+Usa la sesión falsa (control_pagos.excel_falso), así que corre sin Excel. Cuenta
+cuántas veces se inicia Excel y se abren/guardan/cierran libros:
+  * por etapa: copia, proyección (COM) y archivo final, cada una con su sesión
+    (como antes de la sesión compartida, sin contar el cierre y reapertura que
+    hacía la copia)
+  * compartida: CopiarArchivo.ejecutar_proceso() con una sola sesión
+
+Uso:
+    python benchmarks/bench_sesion_excel.py --filas 5000
+"""
+
+import argparse
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from openpyxl import Workbook, load_workbook  # noqa: E402
+from openpyxl.worksheet.table import Table  # noqa: E402
+
+from control_pagos.excel_falso import SesionExcelFalsa  # noqa: E402
+from control_pagos.proceso import CopiarArchivo  # noqa: E402
+from control_pagos.reportero import Reportero  # noqa: E402
+from libro_sintetico import generar_libro  # noqa: E402
+
+LLAMADAS = ['iniciar_excel', 'abrir', 'guardar_como', 'guardar', 'cerrar', 'cerrar_excel']
+
+
+class ReporteroSilencioso(Reportero):
+    def log(self, mensaje, tipo="INFO"):
+        pass
+
+
+def preparar(carpeta, filas):
+    """Crea libro origen (con una hoja oculta de más), archivo final y config.ini"""
+    origen = carpeta / 'origen.xlsx'
+    generar_libro(origen, filas)
+    wb = load_workbook(origen)
+    wb.create_sheet('Macros').sheet_state = 'hidden'
+    wb.save(origen)
+
+    final = carpeta / 'final.xlsx'
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Pagos Importación'
+    ws.append([f'COLUMNA {i}' for i in range(1, 13)])
+    ws.append(list(range(12)))
+    ws.add_table(Table(displayName='Pagos', ref='A1:L2'))
+    wb.save(final)
+
+    config = carpeta / 'config.ini'
+    config.write_text(
+        f"[RUTAS]\nArchivoOrigen = {origen}\nCarpetaIntermedia = {carpeta / 'salida'}\n"
+        f"ArchivoFinal = {final}\n[COPIA]\nModo = com\n[ANEXO]\nModo = com\nDuplicados = no\n[PROYECCION]\nMotor = com\n[CACHE]\nActiva = no\n[HISTORIAL]\nActivo = no\n[CAMBIOS]\nActivo = no\n",
+        encoding='utf-8'
+    )
+    return config
+
+
+def por_etapa(config, fecha):
+    """Las tres etapas COM, cada una con su propia sesión"""
+    sesiones = []
+
+    def fabrica(log=None):
+        sesiones.append(SesionExcelFalsa(log=log))
+        return sesiones[-1]
+
+    copiador = CopiarArchivo(fecha, reportero=ReporteroSilencioso(), ruta_config=config,
+                             fabrica_sesion_excel=fabrica)
+    ruta = copiador.crear_estructura_carpetas(fecha) / copiador.crear_nombre_archivo(fecha)
+    copiador.copiar_archivo_base(ruta)
+    df = copiador.filtrar_por_fecha(copiador.obtener_datos_control_pagos(ruta), fecha)
+    df_segunda = copiador.preparar_datos_segunda_hoja(df)
+    copiador.guardar_proyeccion(ruta, copiador.agrupar_y_calcular(df_segunda),
+                                copiador.crear_nombre_segunda_hoja(fecha))
+    copiador.agregar_a_archivo_final(df_segunda)
+    return sum((sesion.llamadas for sesion in sesiones), start=SesionExcelFalsa().llamadas)
+
+
+def compartida(config, fecha):
+    reportero = ReporteroSilencioso()
+    sesion = SesionExcelFalsa(log=reportero.log)
+    copiador = CopiarArchivo(fecha, reportero=reportero, ruta_config=config,
+                             fabrica_sesion_excel=lambda log=None: sesion)
+    copiador.ejecutar_proceso()
+    return sesion.llamadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=5000)
+    parser.add_argument('--fecha', type=lambda t: datetime.strptime(t, '%Y-%m-%d'), default=datetime(2024, 3, 13))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        config = preparar(Path(carpeta), args.filas)
+        resultados = {
+            'por etapa': por_etapa(config, args.fecha),
+            'compartida': compartida(config, args.fecha),
+        }
+
+    print(f"{'llamada':<15}" + "".join(f"{nombre:>12}" for nombre in resultados))
+    for llamada in LLAMADAS:
+        print(f"{llamada:<15}" + "".join(f"{conteo[llamada]:>12}" for conteo in resultados.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Generador de libros sintéticos con la forma de la hoja Control_Pagos
+
+generar_libro(ruta, filas) escribe registros simples (fechas de Excel, tres
+monedas, encabezado fijo). Con variado=True imita un libro real: encabezados
+con alias ('#IMPORTACION', 'Nota Crédito'...), pocos proveedores con muchos
+registros y muchos con pocos, cinco monedas, fechas de Excel mezcladas con
+fechas digitadas, números de serie, vacíos y textos, y variantes de ESTADO.
+La misma semilla produce el mismo libro.
+"""
+
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+COLUMNAS_EXTRA = [
+    'FACTURA', 'FECHA FACTURA', 'INCOTERM', 'PUERTO', 'TRM', 'OBSERVACIONES',
+    'RESPONSABLE', 'CONTENEDOR', 'BL', 'DIAS CREDITO', 'BANCO', 'CUENTA',
+    'VALOR FOB', 'FLETE', 'SEGURO', 'ARANCEL',
+]
+
+ENCABEZADO = [
+    'IMPORTADOR', 'MARCA', 'PROVEEDOR', '# IMPORTACION', 'MONEDA', 'NOTA CREDITO',
+    'VALOR MONEDA ORIGEN', 'ESTADO', 'FECHA DE VENCIMIENTO',
+] + COLUMNAS_EXTRA
+
+IMPORTADORES = ['JOHN URIBE E HIJOS SA', 'COMODIN SAS', 'MERCADEO Y MODA SAS', 'INDUSTRIAS MEYC']
+MARCAS = ['ESPRIT', 'NAF NAF', 'CHEVIGNON', 'AMERICANINO', 'AEO']
+ESTADOS = ['PAGAR', 'POR PAGAR', 'PAGADO', 'PENDIENTE', 'pagar ']
+
+# --- Libro variado ---
+
+# Encabezados con los que aparece cada columna en libros reales
+ALIAS_ENCABEZADO = {
+    '# IMPORTACION': ['# IMPORTACION', '#IMPORTACION', '# Importacion'],
+    'NOTA CREDITO': ['NOTA CREDITO', 'Nota Crédito', 'VALOR NOTA CREDITO', 'Valor nota crédito'],
+    'VALOR MONEDA ORIGEN': ['VALOR MONEDA ORIGEN', 'Valor moneda origen'],
+    'FECHA DE VENCIMIENTO': ['FECHA DE VENCIMIENTO', 'Fecha de vencimiento', 'FECHA VENCIMIENTO'],
+}
+IMPORTADORES_VARIADOS = IMPORTADORES + ['GCO SAS', 'BASEMENT SAS', 'TEXTILES OMNES SA', 'KOAJ SAS']
+MARCAS_VARIADAS = MARCAS + ['ARMI', 'REPLAY', 'FACOL', 'ROSE PISTOL', 'ESPRIT KIDS']
+# (moneda, peso)
+MONEDAS = [('USD', 70), ('EUR', 15), ('CNY', 10), ('GBP', 3), ('JPY', 2)]
+ESTADOS_VARIADOS = [
+    ('PAGAR', 40), ('pagar ', 5), ('Por pagar', 10), ('PAGAR URGENTE', 3), ('PAGADO', 25),
+    ('PENDIENTE', 12), (None, 5),
+]
+# (forma de la fecha, peso)
+FORMAS_FECHA = [('fecha', 60), ('digitada', 20), ('serial', 10), ('iso', 5), ('vacia', 3), ('texto', 2)]
+PROVEEDORES = 700
+ORIGEN_SERIAL = datetime(1899, 12, 30)
+
+
+def generar_fila(rnd, fecha_base, dias):
+    fecha = fecha_base + timedelta(days=rnd.randrange(dias))
+    return [
+        rnd.choice(IMPORTADORES),
+        rnd.choice(MARCAS),
+        f"PROVEEDOR {rnd.randrange(400):03d}",
+        rnd.randint(1000, 99999),
+        rnd.choice(['USD', 'USD', 'USD', 'EUR', 'CNY']),
+        rnd.choice([0, 0, round(rnd.uniform(10, 500), 2)]),
+        round(rnd.uniform(100, 90000), 2),
+        rnd.choice(ESTADOS),
+        fecha,
+    ] + [f"EXTRA {rnd.randrange(1000)}" for _ in COLUMNAS_EXTRA]
+
+
+def _acumulados(pesos):
+    return list(accumulate(pesos))
+
+
+class FilasVariadas:
+    """Generador de filas del libro variado (las tablas de pesos se arman una vez)"""
+
+    def __init__(self, rnd, fecha_base, dias, proveedores=PROVEEDORES):
+        self.rnd = rnd
+        self.fecha_base = fecha_base
+        self.dias = dias
+        # Proveedores con distribución tipo Zipf: el k-ésimo pesa 1/k
+        self.proveedores = [f"PROVEEDOR {k:03d}" for k in range(1, proveedores + 1)]
+        self.pesos_proveedores = _acumulados(1 / k for k in range(1, proveedores + 1))
+        self.monedas = [moneda for moneda, _ in MONEDAS]
+        self.pesos_monedas = _acumulados(peso for _, peso in MONEDAS)
+        self.estados = [estado for estado, _ in ESTADOS_VARIADOS]
+        self.pesos_estados = _acumulados(peso for _, peso in ESTADOS_VARIADOS)
+        self.formas = [forma for forma, _ in FORMAS_FECHA]
+        self.pesos_formas = _acumulados(peso for _, peso in FORMAS_FECHA)
+        # Cada proveedor importa para un importador y una marca
+        self.clientes = {
+            proveedor: (rnd.choice(IMPORTADORES_VARIADOS), rnd.choice(MARCAS_VARIADAS))
+            for proveedor in self.proveedores
+        }
+
+    def fecha(self):
+        rnd = self.rnd
+        fecha = self.fecha_base + timedelta(days=rnd.randrange(self.dias))
+        forma = rnd.choices(self.formas, cum_weights=self.pesos_formas)[0]
+        if forma == 'fecha':
+            return fecha
+        if forma == 'digitada':
+            return fecha.strftime('%d/%m/%Y')
+        if forma == 'serial':
+            return (fecha - ORIGEN_SERIAL).days
+        if forma == 'iso':
+            return fecha.strftime('%Y-%m-%d')
+        if forma == 'vacia':
+            return None
+        return rnd.choice(['POR DEFINIR', 'N/A', 'pendiente fecha'])
+
+    def fila(self):
+        rnd = self.rnd
+        proveedor = rnd.choices(self.proveedores, cum_weights=self.pesos_proveedores)[0]
+        importador, marca = self.clientes[proveedor]
+        if rnd.random() < 0.1:  # algunos proveedores atienden a más de un importador
+            importador, marca = rnd.choice(IMPORTADORES_VARIADOS), rnd.choice(MARCAS_VARIADAS)
+        return [
+            importador,
+            marca,
+            proveedor,
+            rnd.randint(1000, 99999),
+            rnd.choices(self.monedas, cum_weights=self.pesos_monedas)[0],
+            rnd.choice([0, 0, 0, round(rnd.uniform(10, 500), 2)]),
+            round(rnd.lognormvariate(9, 1.2), 2),
+            rnd.choices(self.estados, cum_weights=self.pesos_estados)[0],
+            self.fecha(),
+        ] + [f"EXTRA {rnd.randrange(1000)}" for _ in COLUMNAS_EXTRA]
+
+
+def encabezado_variado(rnd):
+    """Encabezado con un alias elegido al azar para cada columna que los tiene"""
+    return [rnd.choice(ALIAS_ENCABEZADO[columna]) if columna in ALIAS_ENCABEZADO else columna
+            for columna in ENCABEZADO]
+
+
+def generar_libro(ruta, filas, semilla=1, hoja='Control_Pagos', fecha_base=datetime(2024, 1, 1), dias=900,
+                  variado=False):
+    """Crea un .xlsx con 'filas' registros en la hoja 'hoja'"""
+    from openpyxl import Workbook
+
+    rnd = random.Random(semilla)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(hoja)
+    if variado:
+        ws.append(encabezado_variado(rnd))
+        generador = FilasVariadas(rnd, fecha_base, dias)
+        for _ in range(filas):
+            ws.append(generador.fila())
+    else:
+        ws.append(ENCABEZADO)
+        for _ in range(filas):
+            ws.append(generar_fila(rnd, fecha_base, dias))
+    wb.save(ruta)
+    return ruta
+
+
+def generar_tasas(ruta, fecha_base=datetime(2024, 1, 1), dias=900, semilla=1):
+    """CSV de tasas (FECHA, MONEDA, FACTOR) de días hábiles para las monedas distintas de USD"""
+    rnd = random.Random(semilla)
+    factores = {'EUR': 1.08, 'CNY': 0.138, 'GBP': 1.27, 'JPY': 0.0067}
+    lineas = ['FECHA,MONEDA,FACTOR']
+    for dia in range(dias + 1):
+        fecha = fecha_base + timedelta(days=dia)
+        if fecha.weekday() >= 5:
+            continue
+        for moneda, factor in factores.items():
+            factores[moneda] = factor * (1 + rnd.gauss(0, 0.003))
+            lineas.append(f"{fecha:%Y-%m-%d},{moneda},{factores[moneda]:.6f}")
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write('\n'.join(lineas) + '\n')
+    return ruta
@@ -0,0 +1,72 @@
+"""
+Tiempo de importación al iniciar la interfaz (python -X importtime)
+
+Importa control_pagos_1_1 en un proceso nuevo y verifica que:
+  * el tiempo total de importación esté dentro del presupuesto, y
+  * no se carguen los módulos pesados (pandas, numpy, openpyxl, COM), que
+    deben llegar después en segundo plano (control_pagos.carga_diferida).
+Muestra también cuánto tarda la carga diferida de control_pagos.proceso.
+Termina con código 1 si no se cumple el presupuesto.
+
+Uso:
+    python benchmarks/medir_inicio.py --presupuesto-ms 400
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+MODULOS_PESADOS = ['pandas', 'numpy', 'openpyxl', 'win32com', 'pythoncom']
+
+
+def medir_importacion(modulo):
+    """Devuelve (microsegundos acumulados de 'modulo', {módulo: acumulado}) en un proceso nuevo"""
+    salida = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    )
+    acumulados = {}
+    for linea in salida.stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, acumulado, nombre = linea[len('import time:'):].split('|')
+        acumulados[nombre.strip()] = int(acumulado)
+    return acumulados.get(modulo, 0), acumulados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--presupuesto-ms', type=float, default=400)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--mostrar', type=int, default=10, help="Módulos más lentos a mostrar")
+    args = parser.parse_args()
+
+    # El mejor de varios intentos (la primera importación incluye la caché de disco)
+    mediciones = [medir_importacion('control_pagos_1_1') for _ in range(args.repeticiones)]
+    total, acumulados = min(mediciones, key=lambda m: m[0])
+    diferido, _ = medir_importacion('control_pagos.proceso')
+
+    print(f"Inicio de la interfaz (import control_pagos_1_1): {total / 1000:8.1f} ms "
+          f"(presupuesto {args.presupuesto_ms:.0f} ms)")
+    print(f"Carga diferida (import control_pagos.proceso):    {diferido / 1000:8.1f} ms")
+    print("Módulos más lentos al iniciar:")
+    for nombre, acumulado in sorted(acumulados.items(), key=lambda m: -m[1])[:args.mostrar]:
+        print(f"  {acumulado / 1000:8.1f} ms  {nombre}")
+
+    pesados = sorted({nombre.split('.')[0] for nombre in acumulados} & set(MODULOS_PESADOS))
+    correcto = True
+    if pesados:
+        print(f"✗ Módulos pesados cargados al iniciar: {pesados}")
+        correcto = False
+    if total / 1000 > args.presupuesto_ms:
+        print("✗ Se superó el presupuesto de inicio")
+        correcto = False
+    if correcto:
+        print("✓ Inicio dentro del presupuesto")
+    return 0 if correcto else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
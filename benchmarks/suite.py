@@ -0,0 +1,300 @@
+"""
+Suite de rendimiento de extremo a extremo (sin Excel)
+
+Genera libros Control_Pagos sintéticos variados (libro_sintetico: alias de
+encabezado, cinco monedas, fechas mezcladas, variantes de ESTADO) y mide cada
+etapa de Python puro y el proceso completo sin COM:
+
+  lectura           leer_datos_control_pagos (lector streaming)
+  lectura_completa  leer_datos_control_pagos con pd.read_excel (solo hasta --filas-completo)
+  lectura_filtrada  leer_y_filtrar_semana
+  filtro            filtrar_por_fecha
+  preparacion       preparar_datos_segunda_hoja
+  agrupacion        agrupar_y_calcular (con total en USD)
+  df_final          preparar_df_final (con tabla de tasas)
+  proceso           ejecutar_proceso: copia ooxml, proyección openpyxl, anexo ooxml
+
+Las etapas posteriores al filtro trabajan con los registros de una semana
+(unos filas × 7 / --dias). Tiempo: el mejor de --repeticiones; memoria: pico
+de tracemalloc en una pasada aparte (--sin-memoria la omite). Los libros generados se guardan en
+--datos y se reutilizan.
+
+Con --guardar-base los resultados quedan como línea base (--base). Si la línea
+base existe, cada resultado se compara con ella y la salida es 1 cuando alguno
+empeora más que --tolerancia. La línea base versionada (linea_base.json, 1000
+y 50000 filas) sirve de referencia; los tiempos dependen del equipo, así que
+en otro equipo conviene guardar primero una propia con --guardar-base sobre el
+código sin cambios y comparar contra ella.
+
+Uso:
+    python benchmarks/suite.py --filas 1000 50000 500000
+    python benchmarks/suite.py --filas 1000 50000 --guardar-base
+    python benchmarks/suite.py --filas 50000 --etapas agrupacion df_final
+    python benchmarks/suite.py --filas 500000 --sin-memoria --repeticiones 1
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_anexo_ooxml import generar_final  # noqa: E402
+from libro_sintetico import generar_libro, generar_tasas  # noqa: E402
+
+from control_pagos.proceso import ESTADO_OK, CopiarArchivo  # noqa: E402
+from control_pagos.reportero import Reportero  # noqa: E402
+
+ETAPAS = ['lectura', 'lectura_completa', 'lectura_filtrada', 'filtro', 'preparacion', 'agrupacion',
+          'df_final', 'proceso']
+FECHA_BASE = datetime(2024, 1, 1)
+VERSION_BASE = 1
+FILAS_FINAL = 5000
+# Diferencias por debajo de estos mínimos no cuentan como regresión (ruido de medición)
+MINIMO_SEGUNDOS = 0.02
+MINIMO_MB = 1.0
+
+
+class ReporteroSilencioso(Reportero):
+    def log(self, mensaje, tipo="INFO"):
+        pass
+
+
+def medir(funcion, preparar=None, repeticiones=3, memoria=True):
+    """
+    (mejor tiempo, pico de memoria en MB, resultado). 'preparar' entrega los
+    argumentos de cada llamada y no se cuenta en la medición. Con memoria=False
+    no se hace la pasada con tracemalloc (pico None).
+    """
+    preparar = preparar or (lambda: ())
+    mejor = None
+    resultado = None
+    for _ in range(repeticiones):
+        argumentos = preparar()
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = funcion(*argumentos)
+        segundos = time.perf_counter() - inicio
+        mejor = segundos if mejor is None else min(mejor, segundos)
+    if not memoria:
+        return mejor, None, resultado
+
+    argumentos = preparar()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        funcion(*argumentos)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return mejor, pico / (1024 * 1024), resultado
+
+
+def preparar_datos(carpeta, filas, semilla, dias):
+    """Libro de 'filas' registros, tabla de tasas y archivo final (se generan una sola vez)"""
+    carpeta.mkdir(parents=True, exist_ok=True)
+    libro = carpeta / f"control_pagos_{filas}_s{semilla}_d{dias}.xlsx"
+    if not libro.exists():
+        print(f"  generando {libro.name}...", flush=True)
+        generar_libro(libro, filas, semilla=semilla, fecha_base=FECHA_BASE, dias=dias, variado=True)
+    tasas = carpeta / f"tasas_s{semilla}_d{dias}.csv"
+    if not tasas.exists():
+        generar_tasas(tasas, fecha_base=FECHA_BASE, dias=dias, semilla=semilla)
+    final = carpeta / f"final_{FILAS_FINAL}.xlsx"
+    if not final.exists():
+        generar_final(final, FILAS_FINAL)
+    return libro, tasas, final
+
+
+def escribir_config(carpeta, libro, tasas, final):
+    config = carpeta / 'config.ini'
+    config.write_text(
+        f"[RUTAS]\nArchivoOrigen = {libro}\nCarpetaIntermedia = {carpeta / 'salida'}\nArchivoFinal = {final}\n"
+        f"[COPIA]\nModo = ooxml\n[ANEXO]\nModo = ooxml\n[PROYECCION]\nMotor = openpyxl\n"
+        f"[CACHE]\nActiva = no\n[HISTORIAL]\nActivo = no\n[CAMBIOS]\nActivo = no\n[INFORME]\nActivo = no\n"
+        f"[TASAS]\nArchivo = {tasas}\n",
+        encoding='utf-8'
+    )
+    return config
+
+
+def fecha_de_prueba(dias):
+    """Miércoles a la mitad del período generado"""
+    fecha = FECHA_BASE + timedelta(days=dias // 2)
+    return fecha + timedelta(days=(2 - fecha.weekday()) % 7)
+
+
+def medir_tamaño(filas, etapas, args):
+    """Entrega (etapa, {segundos, pico_mb, filas_salida}) a medida que mide cada etapa de un tamaño de libro"""
+    libro, tasas, final_base = preparar_datos(Path(args.datos), filas, args.semilla, args.dias)
+    fecha = fecha_de_prueba(args.dias)
+
+    with tempfile.TemporaryDirectory() as temporal:
+        carpeta = Path(temporal)
+        final = carpeta / 'CONTROL PAGOS.xlsx'
+        config = escribir_config(carpeta, libro, tasas, final)
+        copiador = CopiarArchivo(fecha, reportero=ReporteroSilencioso(), ruta_config=config)
+        copiador.tasas_cambio  # la tabla de tasas se lee una vez, fuera de la medición
+
+        def anotar(etapa, segundos, pico, salida):
+            pico = round(pico, 2) if pico is not None else None
+            return etapa, {'segundos': round(segundos, 4), 'pico_mb': pico, 'filas_salida': salida}
+
+        def repeticiones(etapa):
+            return args.repeticiones if etapa in etapas else 1
+
+        def con_memoria(etapa):
+            return etapa in etapas and not args.sin_memoria
+
+        # Las etapas siguientes necesitan la lectura, el filtro y la preparación aunque no se pida medirlas
+        segundos, pico, df_original = medir(copiador.leer_datos_control_pagos, lambda: (libro,),
+                                            repeticiones('lectura'), memoria=con_memoria('lectura'))
+        if 'lectura' in etapas:
+            yield anotar('lectura', segundos, pico, len(df_original))
+
+        if 'lectura_completa' in etapas and filas <= args.filas_completo:
+            copiador.lector_control_pagos = 'completo'
+            segundos, pico, df = medir(copiador.leer_datos_control_pagos, lambda: (libro,), args.repeticiones,
+                                       memoria=con_memoria('lectura_completa'))
+            copiador.lector_control_pagos = 'streaming'
+            yield anotar('lectura_completa', segundos, pico, len(df))
+
+        if 'lectura_filtrada' in etapas:
+            segundos, pico, df = medir(copiador.leer_y_filtrar_semana, lambda: (libro, fecha), args.repeticiones,
+                                       memoria=con_memoria('lectura_filtrada'))
+            yield anotar('lectura_filtrada', segundos, pico, len(df))
+
+        segundos, pico, df_filtrado = medir(copiador.filtrar_por_fecha, lambda: (df_original.copy(), fecha),
+                                            repeticiones('filtro'), memoria=con_memoria('filtro'))
+        if 'filtro' in etapas:
+            yield anotar('filtro', segundos, pico, len(df_filtrado))
+
+        segundos, pico, df_segunda = medir(copiador.preparar_datos_segunda_hoja, lambda: (df_filtrado,),
+                                           repeticiones('preparacion'), memoria=con_memoria('preparacion'))
+        if 'preparacion' in etapas:
+            yield anotar('preparacion', segundos, pico, len(df_segunda))
+
+        if 'agrupacion' in etapas:
+            segundos, pico, df = medir(copiador.agrupar_y_calcular, lambda: (df_segunda,), args.repeticiones,
+                                       memoria=con_memoria('agrupacion'))
+            yield anotar('agrupacion', segundos, pico, len(df))
+
+        if 'df_final' in etapas:
+            segundos, pico, df = medir(copiador.preparar_df_final, lambda: (df_segunda,), args.repeticiones,
+                                       memoria=con_memoria('df_final'))
+            yield anotar('df_final', segundos, pico, len(df))
+
+        if 'proceso' in etapas:
+            def preparar_proceso():
+                shutil.copy2(final_base, final)
+                for indice in carpeta.glob('*.indice.sqlite'):
+                    indice.unlink()
+                return ()
+
+            proceso = CopiarArchivo(fecha, reportero=ReporteroSilencioso(), ruta_config=config)
+            segundos, pico, _ = medir(proceso.ejecutar_proceso, preparar_proceso, args.repeticiones,
+                                      memoria=con_memoria('proceso'))
+            if proceso.estado != ESTADO_OK:
+                raise RuntimeError(f"El proceso terminó con estado '{proceso.estado}'")
+            yield anotar('proceso', segundos, pico, len(df_segunda))
+
+
+def comparar(actual, base, tolerancia):
+    """Texto de la comparación con la línea base y si es una regresión"""
+    if base is None:
+        return '', False
+    cambio_tiempo = actual['segundos'] / base['segundos'] - 1 if base['segundos'] else 0.0
+    # Sin pico en alguna de las dos (--sin-memoria) solo se compara el tiempo
+    con_memoria = bool(actual['pico_mb'] and base['pico_mb'])
+    cambio_memoria = actual['pico_mb'] / base['pico_mb'] - 1 if con_memoria else 0.0
+    regresion = (
+        (cambio_tiempo > tolerancia and actual['segundos'] - base['segundos'] > MINIMO_SEGUNDOS)
+        or (con_memoria and cambio_memoria > tolerancia and actual['pico_mb'] - base['pico_mb'] > MINIMO_MB)
+    )
+    texto = f"{cambio_tiempo:+7.1%} " + (f"{cambio_memoria:+7.1%}" if con_memoria else f"{'-':>7}")
+    return texto + ('  REGRESIÓN' if regresion else ''), regresion
+
+
+def _mb(pico):
+    return f"{pico:.1f}" if pico is not None else '-'
+
+
+def leer_base(ruta, args):
+    if not ruta.exists():
+        return None
+    base = json.loads(ruta.read_text(encoding='utf-8'))
+    if (base.get('version'), base.get('semilla'), base.get('dias')) != (VERSION_BASE, args.semilla, args.dias):
+        print(f"⚠ La línea base {ruta} se generó con otra semilla/período; no se compara")
+        return None
+    if base.get('plataforma') != platform.platform():
+        print(f"⚠ La línea base se midió en otro equipo ({base.get('plataforma')}); los tiempos pueden no ser "
+              f"comparables: genere una propia con --guardar-base")
+    return base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[1000, 50000, 500000])
+    parser.add_argument('--etapas', nargs='+', choices=ETAPAS, default=ETAPAS)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--dias', type=int, default=182, help="Días que abarcan las fechas del libro")
+    parser.add_argument('--filas-completo', type=int, default=50000,
+                        help="Tamaño máximo para lectura_completa (pd.read_excel es lento)")
+    parser.add_argument('--datos', default=str(Path(tempfile.gettempdir()) / 'control_pagos_suite'),
+                        help="Carpeta de los libros generados")
+    parser.add_argument('--base', default=str(Path(__file__).resolve().parent / 'linea_base.json'))
+    parser.add_argument('--sin-memoria', action='store_true',
+                        help="Omite la pasada con tracemalloc (lenta en los libros grandes)")
+    parser.add_argument('--guardar-base', action='store_true', help="Guarda los resultados como línea base")
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="Aumento de tiempo o memoria aceptado frente a la línea base (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    ruta_base = Path(args.base)
+    base = None if args.guardar_base else leer_base(ruta_base, args)
+    resultados = {}
+    regresiones = []
+
+    print(f"{'etapa':<18} {'filas':>8} {'salida':>7} {'segundos':>9} {'pico MB':>8}"
+          + (f" {'Δ tiempo':>7} {'Δ memoria':>7}" if base else ''))
+    for filas in args.filas:
+        for etapa, medicion in medir_tamaño(filas, args.etapas, args):
+            clave = f"{etapa}@{filas}"
+            resultados[clave] = medicion
+            anterior = base['resultados'].get(clave) if base else None
+            texto, regresion = comparar(medicion, anterior, args.tolerancia)
+            if regresion:
+                regresiones.append(clave)
+            print(f"{etapa:<18} {filas:>8} {medicion['filas_salida']:>7} {medicion['segundos']:>9.3f} "
+                  f"{_mb(medicion['pico_mb']):>8} {texto}", flush=True)
+
+    if args.guardar_base:
+        anteriores = json.loads(ruta_base.read_text(encoding='utf-8'))['resultados'] if ruta_base.exists() else {}
+        ruta_base.write_text(json.dumps({
+            'version': VERSION_BASE,
+            'semilla': args.semilla,
+            'dias': args.dias,
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'resultados': {**anteriores, **resultados},
+        }, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"\nLínea base guardada en {ruta_base}")
+
+    if regresiones:
+        print(f"\n✗ Regresiones frente a la línea base (> {args.tolerancia:.0%}): {', '.join(regresiones)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
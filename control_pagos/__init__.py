@@ -0,0 +1,3 @@
+"""
+Módulos de apoyo del Control de Pagos (lógica sin interfaz gráfica)
+"""
@@ -0,0 +1,10 @@
+"""python -m control_pagos: proyección sin interfaz gráfica"""
+
+import multiprocessing
+import sys
+
+from control_pagos.cli import main
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main(prog="python -m control_pagos"))
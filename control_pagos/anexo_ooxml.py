@@ -0,0 +1,398 @@
+"""
+Anexo de registros al archivo final editando su paquete OOXML
+
+En lugar de abrir todo CONTROL PAGOS.xlsx en Excel, se recorre el XML de la hoja
+por bloques: las filas nuevas se insertan después de la última fila con datos en
+la columna A (como End(xlUp)), con los estilos de esa última fila; se amplían la
+tabla, la dimensión de la hoja y los formatos condicionales y validaciones que
+llegaban hasta el final de los datos, y las columnas calculadas de la tabla
+reciben su fórmula con las referencias relativas trasladadas a su fila. Las
+demás entradas del zip se copian por bloques con la API pública de zipfile
+(se recomprimen). El archivo se reemplaza al final (os.replace), así que un
+error no deja el archivo a medio escribir.
+
+Los textos se escriben en línea (sin tocar la tabla de cadenas compartidas),
+los 'dd/mm/aaaa' como fechas y los textos numéricos ('14589', '-12.5') como
+números, igual que al asignarlos por COM. Los de más de 15 dígitos quedan como
+texto: como número Excel perdería los últimos dígitos.
+"""
+
+import math
+import os
+import re
+import zipfile
+from datetime import date, datetime, time
+from pathlib import Path
+from xml.sax.saxutils import escape, unescape
+
+from openpyxl.formula.translate import Translator
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+from control_pagos.extraccion_hoja import PaqueteOOXML, atributos, resolver_destino
+
+HOJAS_DESTINO = ("pagos importación", "pagos importacion")
+
+TAMAÑO_BLOQUE = 1024 * 1024
+COLA_INICIAL = 1024 * 1024
+# Todas las entradas se vuelven a comprimir: nivel 3 tarda menos de la mitad que
+# el 6 por defecto y el archivo crece ~10%; Excel lo recomprime al guardar
+NIVEL_COMPRESION = 3
+
+# Entidades que unescape() no convierte por defecto
+ENTIDADES_XML = {'&quot;': '"', '&apos;': "'"}
+
+ORIGEN_1900 = datetime(1899, 12, 30)
+ORIGEN_1904 = datetime(1904, 1, 1)
+
+_FILA = re.compile(rb'<row\b([^>]*?)(?:/>|>(.*?)</row>)', re.S)
+_CELDA = re.compile(rb'<c\b([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+_VALOR = re.compile(rb'<v>[^<]+</v>|<is>')
+_FECHA_TEXTO = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+_NUMERO_TEXTO = re.compile(r'^[+-]?(?:\d+(?:\.\d*)?|\.\d+)$')
+# Dígitos significativos que Excel guarda en un número
+DIGITOS_EXCEL = 15
+_AREA = re.compile(r'^\$?([A-Z]+)\$?(\d+)(?::\$?([A-Z]+)\$?(\d+))?$')
+
+
+def columna_y_fila(referencia):
+    """'AB12' → (28, 12)"""
+    letras = referencia.rstrip('0123456789')
+    return column_index_from_string(letras), int(referencia[len(letras):])
+
+
+def extender_areas(sqref, filas_finales, nueva_fila_final):
+    """Amplía hasta 'nueva_fila_final' las áreas de 'sqref' que terminan en una de 'filas_finales'"""
+    areas = []
+    for area in sqref.split():
+        encontrado = _AREA.match(area)
+        if encontrado and encontrado.group(3) and int(encontrado.group(4)) in filas_finales \
+                and int(encontrado.group(2)) <= int(encontrado.group(4)):
+            area = f"{encontrado.group(1)}{encontrado.group(2)}:{encontrado.group(3)}{nueva_fila_final}"
+        areas.append(area)
+    return ' '.join(areas)
+
+
+def copiar_entrada(zip_origen, zip_destino, info):
+    """Copia una entrada del zip por bloques (se descomprime y se vuelve a comprimir)"""
+    with zip_origen.open(info) as origen, zip_destino.open(info.filename, 'w') as destino:
+        for bloque in iter(lambda: origen.read(TAMAÑO_BLOQUE), b''):
+            destino.write(bloque)
+
+
+class AnexoOOXML:
+    """Anexa filas a la hoja de registros (y su tabla) de un .xlsx"""
+
+    def __init__(self, ruta, hojas_destino=HOJAS_DESTINO):
+        self.ruta = Path(ruta)
+        self.hojas_destino = hojas_destino
+        self.origen_fechas = ORIGEN_1900
+
+    def anexar(self, filas):
+        """
+        Anexa 'filas' (listas de valores desde la columna A). Devuelve un resumen:
+        hoja, fila_inicio, fila_fin, tabla (ref nueva o None) y formulas (celdas con fórmula).
+        """
+        temporal = self.ruta.with_name(f"~{self.ruta.stem}.anexo.tmp")
+        try:
+            with zipfile.ZipFile(self.ruta) as zip_origen:
+                paquete = PaqueteOOXML(zip_origen)
+                plan = self.planificar(paquete, filas)
+                with zipfile.ZipFile(temporal, 'w', zipfile.ZIP_DEFLATED,
+                                     compresslevel=NIVEL_COMPRESION) as zip_destino:
+                    for info in zip_origen.infolist():
+                        if info.filename == plan['parte_hoja']:
+                            self.escribir_hoja(zip_origen, zip_destino, plan)
+                        elif info.filename in plan['reemplazos']:
+                            zip_destino.writestr(info.filename, plan['reemplazos'][info.filename])
+                        else:
+                            copiar_entrada(zip_origen, zip_destino, info)
+            os.replace(temporal, self.ruta)
+        finally:
+            if temporal.exists():
+                temporal.unlink()
+        return plan['resumen']
+
+    # --- Análisis ---
+
+    def planificar(self, paquete, filas):
+        """Lee lo necesario del paquete y prepara los cambios (sin escribir nada)"""
+        parte_libro = next(resolver_destino('', r['Target']) for r in paquete.relaciones('')
+                           if r['Type'].endswith('/officeDocument'))
+        xml_libro = paquete.leer(parte_libro).decode('utf-8')
+        if re.search(r'<workbookPr\b[^>]*\bdate1904="(?:1|true)"', xml_libro):
+            self.origen_fechas = ORIGEN_1904
+
+        nombre_hoja, parte_hoja = self.buscar_hoja(paquete, parte_libro, xml_libro)
+        relaciones_hoja = {r['Id']: r for r in paquete.relaciones(parte_hoja)}
+
+        # Solo se guarda el final del XML de la hoja; se amplía si la última
+        # fila con datos en la columna A no está en él
+        tamaño_cola = COLA_INICIAL
+        while True:
+            largo, cola = self.leer_cola(paquete, parte_hoja, tamaño_cola)
+            fin_datos = cola.rfind(b'</sheetData>')
+            if fin_datos < 0 and len(cola) < largo:
+                tamaño_cola *= 8
+                continue
+            if fin_datos < 0:
+                raise ValueError(f"La hoja '{nombre_hoja}' no tiene el formato esperado (sin <sheetData>)")
+
+            # Tabla (la primera de la hoja, como ListObjects(1))
+            tabla = None
+            partes_tabla = re.findall(rb'<tablePart\b[^>]*?\bid="([^"]+)"', cola[fin_datos:])
+            if partes_tabla:
+                parte_tabla = resolver_destino(parte_hoja, relaciones_hoja[partes_tabla[0].decode()]['Target'])
+                tabla = self.leer_tabla(paquete, parte_tabla)
+
+            encontrada = self.ultima_fila(cola[:fin_datos], len(cola) == largo,
+                                          tabla['fila_inicio'] if tabla else 1)
+            if encontrada is not None:
+                break
+            tamaño_cola *= 8
+
+        ultima, plantilla, posteriores = encontrada
+        inicio = ultima + 1
+        fin = ultima + len(filas)
+
+        # Las filas vacías (solo formato) que quedan dentro del bloque nuevo se reemplazan
+        corte = posteriores[0][0] if posteriores else fin_datos
+        conservadas = b''.join(xml for _, numero, xml in posteriores if numero > fin)
+
+        filas_xml, formulas = self.filas_xml(filas, inicio, plantilla, tabla)
+        filas_finales = {ultima}
+        reemplazos = {}
+        resumen = {'hoja': nombre_hoja, 'fila_inicio': inicio, 'fila_fin': fin, 'tabla': None, 'formulas': formulas}
+
+        if tabla is not None:
+            filas_finales.add(tabla['fila_fin'])
+            ref = f"{get_column_letter(tabla['col_inicio'])}{tabla['fila_inicio']}:" \
+                  f"{get_column_letter(tabla['col_fin'])}{max(fin, tabla['fila_inicio'] + 1)}"
+            xml_tabla = re.sub(r'(<table\b[^>]*?\bref=")[^"]+"', lambda m: f'{m.group(1)}{ref}"',
+                               tabla['xml'], count=1)
+            xml_tabla = re.sub(r'(<autoFilter\b[^>]*?\bref=")[^"]+"', lambda m: f'{m.group(1)}{ref}"',
+                               xml_tabla, count=1)
+            reemplazos[tabla['parte']] = xml_tabla.encode('utf-8')
+            resumen['tabla'] = ref
+
+        if formulas:
+            # Las fórmulas nuevas no tienen valor calculado: Excel recalcula al abrir
+            if '<calcPr' in xml_libro:
+                xml_libro = re.sub(r'<calcPr\b(?![^>]*fullCalcOnLoad)', '<calcPr fullCalcOnLoad="1"', xml_libro,
+                                   count=1)
+            else:
+                xml_libro = xml_libro.replace('</workbook>', '<calcPr fullCalcOnLoad="1"/></workbook>')
+            reemplazos[parte_libro] = xml_libro.encode('utf-8')
+
+        return {
+            'parte_hoja': parte_hoja,
+            'corte': largo - len(cola) + corte,
+            'insercion': filas_xml.encode('utf-8') + conservadas + self.extender_reglas(
+                cola[fin_datos:], filas_finales, fin),
+            'fila_fin': fin,
+            'columnas': max((len(f) for f in filas), default=0),
+            'reemplazos': reemplazos,
+            'resumen': resumen,
+        }
+
+    def buscar_hoja(self, paquete, parte_libro, xml_libro):
+        """(nombre, parte) de la hoja de registros; si no existe, la hoja activa"""
+        hojas = [atributos(h) for h in re.findall(r'<sheet\b([^>]*?)/?>', xml_libro)]
+        nombres = [h.get('name', '').lower() for h in hojas]
+        indice = next((nombres.index(n) for n in self.hojas_destino if n in nombres), None)
+        if indice is None:
+            activa = re.search(r'<workbookView\b[^>]*?\bactiveTab="(\d+)"', xml_libro)
+            indice = int(activa.group(1)) if activa else 0
+        hoja = hojas[indice]
+        id_hoja = next(valor for clave, valor in hoja.items() if clave.endswith(':id'))
+        relacion = next(r for r in paquete.relaciones(parte_libro) if r['Id'] == id_hoja)
+        return hoja['name'], resolver_destino(parte_libro, relacion['Target'])
+
+    def leer_cola(self, paquete, parte_hoja, tamaño):
+        """(largo total, últimos 'tamaño' bytes) del XML de la hoja, leyéndolo por bloques"""
+        largo = 0
+        cola = b''
+        with paquete.zip.open(parte_hoja) as origen:
+            for bloque in iter(lambda: origen.read(TAMAÑO_BLOQUE), b''):
+                largo += len(bloque)
+                cola = (cola + bloque)[-tamaño:]
+        return largo, cola
+
+    def leer_tabla(self, paquete, parte_tabla):
+        xml_tabla = paquete.leer(parte_tabla).decode('utf-8')
+        inicio_tabla = atributos(re.search(r'<table\b([^>]*)>', xml_tabla).group(1))
+        if int(inicio_tabla.get('totalsRowCount', '0') or 0):
+            raise ValueError("La tabla del archivo final tiene fila de totales")
+        primera, ultima = inicio_tabla['ref'].split(':')
+        col_inicio, fila_inicio = columna_y_fila(primera)
+        col_fin, fila_fin = columna_y_fila(ultima)
+
+        # Columnas calculadas: la fórmula se repite en cada fila nueva
+        calculadas = {}
+        columnas = re.findall(r'<tableColumn\b[^>]*?(?:/>|>(.*?)</tableColumn>)', xml_tabla, re.S)
+        for posicion, contenido in enumerate(columnas):
+            formula = re.search(r'<calculatedColumnFormula\b[^>]*>(.*?)</calculatedColumnFormula>',
+                                contenido or '', re.S)
+            if formula:
+                calculadas[col_inicio + posicion] = unescape(formula.group(1), ENTIDADES_XML)
+        return {'parte': parte_tabla, 'xml': xml_tabla, 'col_inicio': col_inicio, 'fila_inicio': fila_inicio,
+                'col_fin': col_fin, 'fila_fin': fila_fin, 'calculadas': calculadas}
+
+    def ultima_fila(self, datos, completa, fila_encabezado):
+        """
+        Busca hacia atrás la última fila con valor en la columna A.
+        Devuelve (número, XML de la fila si sirve de plantilla, filas posteriores
+        [(posición, número, XML)]) o None si no está en 'datos' y falta leer más.
+        Las filas posteriores solo pueden tener formato.
+        """
+        posiciones = [m.start() for m in re.finditer(rb'<row\b', datos)]
+        if not completa and posiciones:
+            posiciones = posiciones[1:]  # la primera puede estar cortada
+
+        posteriores = []
+        for posicion in reversed(posiciones):
+            fila = _FILA.match(datos, posicion)
+            numero = int(atributos(fila.group(1).decode('utf-8'))['r'])
+            contenido = fila.group(2) or b''
+            celda_a = next((c for c in _CELDA.finditer(contenido) if re.search(rb'\br="A\d+"', c.group(1))), None)
+            if celda_a and _VALOR.search(celda_a.group(2) or b''):
+                break
+            if _VALOR.search(contenido):
+                raise ValueError(f"Hay datos en la fila {numero} fuera de la columna A")
+            posteriores.insert(0, (posicion, numero, fila.group(0)))
+        else:
+            if not completa:
+                return None
+            return 0, None, posteriores
+
+        plantilla = fila.group(0) if numero > fila_encabezado else None
+        return numero, plantilla, posteriores
+
+    # --- Filas nuevas ---
+
+    def filas_xml(self, filas, inicio, plantilla, tabla):
+        """XML de las filas nuevas y cantidad de celdas con fórmula"""
+        estilos = {}
+        atributos_fila = ''
+        if plantilla:
+            encontrado = _FILA.match(plantilla)
+            attrs = atributos(encontrado.group(1).decode('utf-8'))
+            atributos_fila = ''.join(f' {clave}="{valor}"' for clave, valor in attrs.items()
+                                     if clave not in ('r', 'spans'))
+            for celda in _CELDA.finditer(encontrado.group(2) or b''):
+                attrs_celda = atributos(celda.group(1).decode('utf-8'))
+                if 's' in attrs_celda and 'r' in attrs_celda:
+                    estilos[columna_y_fila(attrs_celda['r'])[0]] = attrs_celda['s']
+
+        calculadas = tabla['calculadas'] if tabla else {}
+        # Excel guarda la fórmula de la columna calculada como la de la primera fila
+        # de datos: las referencias relativas se trasladan a cada fila nueva
+        traductores = {
+            columna: Translator(f"={formula}", origin=f"{get_column_letter(columna)}{tabla['fila_inicio'] + 1}")
+            for columna, formula in calculadas.items()
+        }
+        ultima_columna = max([len(f) for f in filas] + list(calculadas) + list(estilos) + [0])
+        partes = []
+        formulas = 0
+        for numero, valores in enumerate(filas, start=inicio):
+            celdas = []
+            for columna in range(1, ultima_columna + 1):
+                referencia = f"{get_column_letter(columna)}{numero}"
+                estilo = f' s="{estilos[columna]}"' if columna in estilos else ''
+                valor = valores[columna - 1] if columna <= len(valores) else None
+                celda = self.celda_xml(referencia, valor, estilo)
+                if celda is None and columna in calculadas:
+                    formula = traductores[columna].translate_formula(referencia)[1:]
+                    celda = f'<c r="{referencia}"{estilo}><f>{escape(formula)}</f></c>'
+                    formulas += 1
+                if celda is None and estilo:
+                    celda = f'<c r="{referencia}"{estilo}/>'
+                if celda:
+                    celdas.append(celda)
+            partes.append(f'<row r="{numero}"{atributos_fila}>{"".join(celdas)}</row>')
+        return ''.join(partes), formulas
+
+    def celda_xml(self, referencia, valor, estilo):
+        """<c> para un valor de Python; None si la celda queda vacía"""
+        if isinstance(valor, str):
+            if valor == "":
+                return None
+            fecha = _FECHA_TEXTO.match(valor.strip())
+            if fecha:
+                try:
+                    valor = datetime(int(fecha.group(3)), int(fecha.group(2)), int(fecha.group(1)))
+                except ValueError:
+                    pass
+            elif _NUMERO_TEXTO.match(valor.strip()) and \
+                    len(valor.strip().lstrip('+-').replace('.', '').lstrip('0')) <= DIGITOS_EXCEL:
+                valor = float(valor)
+        if valor is None or (not isinstance(valor, str) and valor != valor):  # None, NaN, NaT
+            return None
+        if isinstance(valor, str):
+            return f'<c r="{referencia}"{estilo} t="inlineStr"><is><t xml:space="preserve">{escape(valor)}</t></is></c>'
+        if isinstance(valor, (bool,)) or type(valor).__name__ == 'bool_':
+            return f'<c r="{referencia}"{estilo} t="b"><v>{int(bool(valor))}</v></c>'
+        if isinstance(valor, (datetime, date, time)):
+            return f'<c r="{referencia}"{estilo}><v>{self.serial(valor)!r}</v></c>'
+        try:
+            numero = float(valor)
+        except (TypeError, ValueError):
+            return f'<c r="{referencia}"{estilo} t="inlineStr"><is><t xml:space="preserve">{escape(str(valor))}</t></is></c>'
+        if math.isnan(numero) or math.isinf(numero):
+            return None
+        texto = str(int(numero)) if numero.is_integer() and abs(numero) < 1e15 else repr(numero)
+        return f'<c r="{referencia}"{estilo}><v>{texto}</v></c>'
+
+    def serial(self, valor):
+        """Número de serie de Excel de una fecha/hora"""
+        if isinstance(valor, time):
+            return (valor.hour * 3600 + valor.minute * 60 + valor.second) / 86400
+        if not isinstance(valor, datetime):
+            valor = datetime(valor.year, valor.month, valor.day)
+        dias = valor.replace(tzinfo=None) - self.origen_fechas
+        serial = dias.days + dias.seconds / 86400
+        return int(serial) if serial == int(serial) else serial
+
+    def extender_reglas(self, cola, filas_finales, nueva_fila_final):
+        """Formatos condicionales y validaciones que llegaban al final de los datos llegan ahora a la nueva"""
+        texto = cola.decode('utf-8')
+
+        def sqref(encontrado):
+            return f'{encontrado.group(1)}{extender_areas(encontrado.group(2), filas_finales, nueva_fila_final)}' \
+                   f'{encontrado.group(3)}'
+
+        texto = re.sub(r'(<(?:conditionalFormatting|dataValidation)\b[^>]*?\bsqref=")([^"]*)(")', sqref, texto)
+        texto = re.sub(r'(<xm:sqref>)([^<]*)(</xm:sqref>)', sqref, texto)
+        return texto.encode('utf-8')
+
+    # --- Escritura ---
+
+    def escribir_hoja(self, zip_origen, zip_destino, plan):
+        """Copia el XML de la hoja por bloques hasta el corte e inserta las filas nuevas"""
+        posicion = 0
+        primero = True
+        with zip_origen.open(plan['parte_hoja']) as origen, zip_destino.open(plan['parte_hoja'], 'w') as destino:
+            while posicion < plan['corte']:
+                bloque = origen.read(min(TAMAÑO_BLOQUE, plan['corte'] - posicion))
+                if not bloque:
+                    break
+                posicion += len(bloque)
+                if primero:
+                    bloque = self.actualizar_dimension(bloque, plan['fila_fin'], plan['columnas'])
+                    primero = False
+                destino.write(bloque)
+            destino.write(plan['insercion'])
+
+    def actualizar_dimension(self, bloque, fila_fin, columnas):
+        def dimension(encontrado):
+            areas = encontrado.group(2).decode('utf-8').split(':')
+            col_inicio, fila_inicio = columna_y_fila(areas[0])
+            col_fin, fila_anterior = columna_y_fila(areas[-1])
+            ref = f"{get_column_letter(col_inicio)}{fila_inicio}:" \
+                  f"{get_column_letter(max(col_fin, columnas))}{max(fila_anterior, fila_fin)}"
+            return encontrado.group(1) + ref.encode('utf-8') + b'"'
+        return re.sub(rb'(<dimension\b[^>]*?\bref=")([^"]+)"', dimension, bloque, count=1)
+
+
+def anexar_filas(ruta, filas, hojas_destino=HOJAS_DESTINO):
+    """Anexa 'filas' a la hoja de registros de 'ruta' (ver AnexoOOXML.anexar)"""
+    return AnexoOOXML(ruta, hojas_destino).anexar(filas)
@@ -0,0 +1,192 @@
+"""
+Archivos abiertos por otros usuarios (libros compartidos en OneDrive/red)
+
+Antes de las etapas costosas el proceso prueba los archivos que va a usar: el
+libro origen (lectura), la proyección y su carpeta, y el archivo final
+(escritura). Un archivo está bloqueado si Office dejó su archivo de
+propietario ('~$...', que guarda el nombre del usuario que lo tiene abierto) o
+si abrirlo falla por una violación de uso compartido. Mientras haya alguno
+bloqueado, EsperaArchivos vuelve a probar con esperas que se duplican y un
+componente al azar (varios equipos esperando el mismo archivo no reintentan a
+la vez), sin preguntar nada en cada intento.
+"""
+
+import random
+import tempfile
+import time
+from pathlib import Path
+
+# Textos de error que indican que otro usuario o programa tiene el archivo abierto
+TEXTOS_BLOQUEO = ['being used', 'en uso', 'está abierto', 'is open', 'locked', 'bloqueado', 'read-only', 'sólo lectura',
+                  'permission denied', 'permiso denegado']
+# Errores de Windows: ERROR_SHARING_VIOLATION y ERROR_LOCK_VIOLATION
+ERRORES_WINDOWS_BLOQUEO = (32, 33)
+
+# Segundos de la primera espera, máximo entre intentos y máximo total (None = sin límite)
+ESPERA_INICIAL = 2.0
+ESPERA_MAXIMA = 60.0
+TIEMPO_MAXIMO = 900.0
+
+
+class ArchivoBloqueado(Exception):
+    """El archivo está abierto por otro usuario o programa"""
+
+
+def es_archivo_bloqueado(error):
+    """¿El error se debe a un archivo abierto/bloqueado?"""
+    if isinstance(error, (ArchivoBloqueado, PermissionError)):
+        return True
+    if getattr(error, 'winerror', None) in ERRORES_WINDOWS_BLOQUEO:
+        return True
+    texto = str(error).lower()
+    return any(pista in texto for pista in TEXTOS_BLOQUEO)
+
+
+def archivo_propietario(ruta):
+    """
+    Archivo de propietario que Office crea junto a un libro abierto ('~$' y el
+    nombre, sin sus dos primeras letras si es largo); None si no existe.
+    """
+    ruta = Path(ruta)
+    for nombre in (f"~${ruta.name[2:]}", f"~${ruta.name}"):
+        candidato = ruta.with_name(nombre)
+        if candidato.exists():
+            return candidato
+    return None
+
+
+def usuario_propietario(ruta_propietario):
+    """
+    Usuario guardado en un archivo de propietario de Office: un byte con el
+    largo y el nombre en ANSI, y desde el byte 54 el largo (2 bytes) y el
+    nombre en UTF-16. None si no se puede leer.
+    """
+    try:
+        datos = Path(ruta_propietario).read_bytes()
+    except OSError:
+        return None
+    if len(datos) >= 56:
+        largo = int.from_bytes(datos[54:56], 'little')
+        if 0 < largo and 56 + 2 * largo <= len(datos):
+            try:
+                return datos[56:56 + 2 * largo].decode('utf-16-le').strip() or None
+            except UnicodeDecodeError:
+                pass
+    if datos and 0 < datos[0] < len(datos):
+        return datos[1:1 + datos[0]].decode('cp1252', errors='replace').strip() or None
+    return None
+
+
+def archivo_en_uso(ruta, escritura=True):
+    """
+    ¿Otro programa tiene abierto el archivo? (archivo de propietario o apertura
+    denegada; para escritura si 'escritura', si no para lectura)
+    """
+    if archivo_propietario(ruta) is not None:
+        return True
+    try:
+        with open(ruta, 'r+b' if escritura else 'rb'):
+            return False
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        return es_archivo_bloqueado(e)
+
+
+class Bloqueo:
+    """Archivo bloqueado y, si se conoce, quién lo tiene abierto"""
+
+    def __init__(self, ruta, usuario=None, motivo=None):
+        self.ruta = Path(ruta)
+        self.usuario = usuario
+        self.motivo = motivo
+
+    def descripcion(self):
+        if self.usuario:
+            return f"{self.ruta.name} (abierto por {self.usuario})"
+        return f"{self.ruta.name} ({self.motivo or 'abierto por otro programa'})"
+
+
+def sondear_archivo(ruta, escritura=True):
+    """Bloqueo del archivo 'ruta', o None si está libre (o todavía no existe)"""
+    ruta = Path(ruta)
+    propietario = archivo_propietario(ruta)
+    if propietario is not None:
+        return Bloqueo(ruta, usuario=usuario_propietario(propietario))
+    if archivo_en_uso(ruta, escritura=escritura):
+        return Bloqueo(ruta, motivo='uso compartido denegado')
+    return None
+
+
+def sondear_carpeta(carpeta):
+    """Bloqueo si no se puede crear un archivo en 'carpeta' (None si se puede o aún no existe)"""
+    carpeta = Path(carpeta)
+    if not carpeta.is_dir():
+        return None
+    try:
+        with tempfile.TemporaryFile(dir=carpeta):
+            return None
+    except OSError as e:
+        if es_archivo_bloqueado(e):
+            return Bloqueo(carpeta, motivo='sin permiso de escritura')
+        raise
+
+
+class EsperaArchivos:
+    """
+    Espera a que se liberen los archivos de una lista de sondas (funciones que
+    devuelven un Bloqueo o None). 'dormir', 'reloj' y 'azar' se pueden
+    reemplazar para probar sin esperar.
+    """
+
+    def __init__(self, espera_inicial=ESPERA_INICIAL, espera_maxima=ESPERA_MAXIMA, tiempo_maximo=TIEMPO_MAXIMO,
+                 log=None, dormir=time.sleep, reloj=time.monotonic, azar=random.random):
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = max(espera_maxima, espera_inicial)
+        self.tiempo_maximo = tiempo_maximo
+        self.log = log or (lambda mensaje, tipo="INFO": None)
+        self.dormir = dormir
+        self.reloj = reloj
+        self.azar = azar
+
+    def sondear(self, sondas):
+        """Bloqueos actuales de las sondas"""
+        return [bloqueo for bloqueo in (sonda() for sonda in sondas) if bloqueo is not None]
+
+    def espera(self, intento):
+        """Segundos antes del intento siguiente: la mitad fija y la otra mitad al azar"""
+        tope = min(self.espera_inicial * 2 ** intento, self.espera_maxima)
+        return tope / 2 + self.azar() * tope / 2
+
+    def esperar(self, sondas):
+        """
+        Prueba las sondas hasta que no quede ningún bloqueo o se cumpla
+        'tiempo_maximo'. Devuelve los bloqueos que quedan ([] si todo está libre).
+        """
+        bloqueos = self.sondear(sondas)
+        if not bloqueos:
+            return []
+
+        inicio = self.reloj()
+        avisados = set()
+        intento = 0
+        while bloqueos:
+            # Se avisa una vez por archivo y usuario
+            for bloqueo in bloqueos:
+                if (bloqueo.ruta, bloqueo.usuario) not in avisados:
+                    self.log(f"Archivo abierto: {bloqueo.descripcion()}; se espera a que se cierre", "WARN")
+                    avisados.add((bloqueo.ruta, bloqueo.usuario))
+
+            espera = self.espera(intento)
+            if self.tiempo_maximo is not None:
+                restante = self.tiempo_maximo - (self.reloj() - inicio)
+                if restante <= 0:
+                    return bloqueos
+                espera = min(espera, restante)
+            self.log(f"Esperando {len(bloqueos)} archivo(s) abierto(s); nuevo intento en {espera:.1f} s", "PROCESO")
+            self.dormir(espera)
+            intento += 1
+            bloqueos = self.sondear(sondas)
+
+        self.log("Los archivos se liberaron", "OK")
+        return []
@@ -0,0 +1,136 @@
+"""
+Caché en disco del libro Control_Pagos ya leído y normalizado
+
+Cada entrada se identifica por la huella del archivo origen (ruta, tamaño,
+fecha de modificación y SHA-256 del contenido). Mientras el origen no cambie,
+las ejecuciones siguientes (para cualquier fecha) no vuelven a leer el XLSX.
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import pandas as pd
+
+NOMBRE_INDICE = 'indice.json'
+VERSION_CACHE = 1
+TAMAÑO_BLOQUE_HASH = 1024 * 1024
+
+
+def calcular_huella(ruta):
+    """Huella del archivo: ruta absoluta, tamaño, mtime y SHA-256 del contenido"""
+    ruta = Path(ruta).resolve()
+    estado = ruta.stat()
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(TAMAÑO_BLOQUE_HASH), b''):
+            sha.update(bloque)
+    return {
+        'ruta': str(ruta),
+        'tamaño': estado.st_size,
+        'mtime': estado.st_mtime_ns,
+        'sha256': sha.hexdigest(),
+    }
+
+
+class CacheLibro:
+    """
+    Guarda DataFrames en archivos pickle dentro de 'carpeta'.
+    Conserva como máximo 'max_generaciones' versiones por archivo origen;
+    las más antiguas se eliminan al guardar una nueva.
+    """
+
+    def __init__(self, carpeta, max_generaciones=3, log=None):
+        self.carpeta = Path(carpeta)
+        self.max_generaciones = max(1, int(max_generaciones))
+        self.log = log or (lambda mensaje, tipo="INFO": None)
+
+    @property
+    def ruta_indice(self):
+        return self.carpeta / NOMBRE_INDICE
+
+    def leer_indice(self):
+        try:
+            with open(self.ruta_indice, encoding='utf-8') as archivo:
+                indice = json.load(archivo)
+            if indice.get('version') == VERSION_CACHE:
+                return indice
+        except (OSError, ValueError):
+            pass
+        return {'version': VERSION_CACHE, 'entradas': []}
+
+    def escribir_indice(self, indice):
+        self.carpeta.mkdir(parents=True, exist_ok=True)
+        temporal = self.ruta_indice.with_suffix('.tmp')
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(indice, archivo, ensure_ascii=False, indent=1)
+        temporal.replace(self.ruta_indice)
+
+    def buscar(self, huella, indice=None):
+        """Entrada del índice que coincide exactamente con la huella, o None"""
+        indice = indice or self.leer_indice()
+        for entrada in indice['entradas']:
+            if all(entrada.get(clave) == valor for clave, valor in huella.items()):
+                return entrada
+        return None
+
+    def obtener(self, ruta_origen, variante=''):
+        """
+        Devuelve el DataFrame guardado para 'ruta_origen' o None si no hay uno vigente.
+        'variante' distingue lecturas distintas del mismo archivo (ej. el lector usado).
+        """
+        if not Path(ruta_origen).exists():
+            return None
+        huella = {**calcular_huella(ruta_origen), 'variante': variante}
+        indice = self.leer_indice()
+        entrada = self.buscar(huella, indice)
+        if entrada is None:
+            return None
+
+        ruta_datos = self.carpeta / entrada['archivo']
+        try:
+            df = pd.read_pickle(ruta_datos)
+        except Exception as e:
+            self.log(f"Caché dañada ({ruta_datos.name}): {e}", "WARN")
+            return None
+
+        entrada['usado'] = time.time()
+        self.escribir_indice(indice)
+        return df
+
+    def guardar(self, ruta_origen, df, variante=''):
+        """Guarda df como la generación actual de 'ruta_origen' y depura las antiguas"""
+        huella = {**calcular_huella(ruta_origen), 'variante': variante}
+        self.carpeta.mkdir(parents=True, exist_ok=True)
+
+        clave_archivo = hashlib.sha256(f"{huella['sha256']}|{variante}".encode('utf-8')).hexdigest()
+        nombre = f"{clave_archivo[:20]}.pkl"
+        df.to_pickle(self.carpeta / nombre)
+
+        indice = self.leer_indice()
+        indice['entradas'] = [
+            e for e in indice['entradas']
+            if not all(e.get(clave) == valor for clave, valor in huella.items())
+        ]
+        ahora = time.time()
+        indice['entradas'].append({**huella, 'archivo': nombre, 'creado': ahora, 'usado': ahora})
+        self.depurar(indice, huella['ruta'])
+        self.escribir_indice(indice)
+
+    def depurar(self, indice, ruta):
+        """Elimina las generaciones más antiguas de 'ruta' por encima del máximo"""
+        propias = [e for e in indice['entradas'] if e['ruta'] == ruta]
+        propias.sort(key=lambda e: e.get('usado', 0), reverse=True)
+        sobrantes = propias[self.max_generaciones:]
+        if not sobrantes:
+            return
+
+        vigentes = {e['archivo'] for e in indice['entradas'] if e not in sobrantes}
+        for entrada in sobrantes:
+            indice['entradas'].remove(entrada)
+            if entrada['archivo'] not in vigentes:
+                try:
+                    (self.carpeta / entrada['archivo']).unlink()
+                except OSError:
+                    pass
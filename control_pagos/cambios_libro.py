@@ -0,0 +1,178 @@
+"""
+Cambios del libro Control_Pagos entre ejecuciones
+
+Cada ejecución guarda la huella de cada fila leída: una clave (NRO. IMPO,
+PROVEEDOR y fecha de vencimiento; si falta alguna, la posición de la fila entre
+las que tampoco la tienen) y un
+hash de sus columnas. La ejecución siguiente compara en una sola pasada
+vectorizada y obtiene las filas nuevas, modificadas y eliminadas. Las claves
+repetidas se distinguen por su orden de aparición.
+
+El registro también guarda la clave y el hash de las filas que se anexaron al
+archivo final. Si la ejecución anterior fue de la misma fecha, terminó su
+anexo y el archivo final no cambió desde entonces, solo se anexan las filas de
+la semana que no están entre las anexadas (nuevas, o que la ejecución anterior
+no seleccionó); las anexadas que cambiaron después no se anexan otra vez: su
+versión anterior está en el archivo final y se informan para corregirlas a
+mano (ver CopiarArchivo.registros_a_anexar).
+"""
+
+import pickle
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from control_pagos.esquema import COLUMNAS_REQUERIDAS
+
+# Columnas de la clave de una fila, además de la columna de fecha
+COLUMNAS_CLAVE = ['NRO. IMPO', 'PROVEEDOR']
+VERSION_REGISTRO = 2
+_COLUMNAS_UNION = ['clave', 'por_posicion', 'ocurrencia']
+
+
+def _con_valor(serie):
+    """Máscara de los valores no vacíos (ni NaN/NaT ni texto en blanco)"""
+    return (serie.notna() & (serie.astype(str).str.strip() != '')).to_numpy()
+
+
+def huellas_filas(df, col_fecha):
+    """
+    Huellas de las filas de df (con la columna de fecha ya convertida).
+    DataFrame con el índice de df y las columnas clave, por_posicion,
+    ocurrencia, huella y fecha.
+    """
+    columnas = [col for col in COLUMNAS_REQUERIDAS if col in df.columns]
+    claves = [col for col in COLUMNAS_CLAVE if col in df.columns]
+    if col_fecha:
+        columnas.append(col_fecha)
+        claves.append(col_fecha)
+
+    vacio = np.zeros(len(df), dtype=np.uint64)
+    huella = pd.util.hash_pandas_object(df[columnas], index=False).to_numpy() if columnas else vacio
+    if len(claves) == len(COLUMNAS_CLAVE) + 1:
+        completas = np.logical_and.reduce([_con_valor(df[col]) for col in claves])
+        clave = pd.util.hash_pandas_object(df[claves], index=False).to_numpy()
+    else:
+        completas = np.zeros(len(df), dtype=bool)
+        clave = vacio
+    por_posicion = ~completas
+
+    # Las filas sin clave completa se identifican por su orden entre ellas (clave 0 y
+    # ocurrencia): borrar o agregar una fila con clave no las desplaza
+    filas = pd.DataFrame({
+        'clave': np.where(por_posicion, np.uint64(0), clave),
+        'por_posicion': por_posicion,
+        'huella': huella,
+        'fecha': df[col_fecha].to_numpy() if col_fecha else pd.NaT,
+    }, index=df.index)
+    filas['ocurrencia'] = filas.groupby(['por_posicion', 'clave'], sort=False).cumcount()
+    return filas
+
+
+class CambiosLibro:
+    """Filas nuevas, modificadas y eliminadas respecto de la ejecución anterior"""
+
+    def __init__(self, insertadas, actualizadas, eliminadas, sin_cambios, anterior):
+        # Etiquetas (índice de df) de las filas nuevas y modificadas
+        self.insertadas = insertadas
+        self.actualizadas = actualizadas
+        # Fechas de las filas eliminadas
+        self.eliminadas = eliminadas
+        self.sin_cambios = sin_cambios
+        # Etiquetas de las filas de la semana que cambiaron después de anexarse (no se anexan otra vez)
+        self.omitidas = pd.Index([])
+        # Datos de la ejecución anterior (fecha_proyeccion, anexo_completo, archivo_final...)
+        self.anterior = anterior
+
+    @property
+    def etiquetas(self):
+        """Etiquetas de las filas nuevas o modificadas"""
+        return self.insertadas.union(self.actualizadas)
+
+    def como_dict(self):
+        return {
+            'insertadas': len(self.insertadas),
+            'actualizadas': len(self.actualizadas),
+            'eliminadas': len(self.eliminadas),
+            'sin_cambios': self.sin_cambios,
+            'modificadas_sin_anexar': len(self.omitidas),
+            'desde': self.anterior.get('guardado'),
+        }
+
+
+def comparar_filas(anteriores, actuales, anterior=None):
+    """CambiosLibro entre las huellas de la ejecución anterior y las actuales"""
+    union = actuales[_COLUMNAS_UNION + ['huella']].assign(_posicion=np.arange(len(actuales))).merge(
+        anteriores[_COLUMNAS_UNION + ['huella', 'fecha']],
+        on=_COLUMNAS_UNION, how='outer', suffixes=('', '_anterior'), indicator=True,
+    )
+    nuevas = (union['_merge'] == 'left_only').to_numpy()
+    eliminadas = (union['_merge'] == 'right_only').to_numpy()
+    ambas = (union['_merge'] == 'both').to_numpy()
+    modificadas = ambas & (union['huella'] != union['huella_anterior']).to_numpy()
+    posiciones = union['_posicion'].to_numpy()
+    return CambiosLibro(
+        insertadas=actuales.index[np.sort(posiciones[nuevas].astype(np.int64))],
+        actualizadas=actuales.index[np.sort(posiciones[modificadas].astype(np.int64))],
+        eliminadas=union.loc[eliminadas, 'fecha'].reset_index(drop=True),
+        sin_cambios=int((ambas & ~modificadas).sum()),
+        anterior=anterior or {},
+    )
+
+
+def _claves(filas, columnas):
+    return pd.MultiIndex.from_frame(filas[columnas])
+
+
+def separar_anexadas(filas, anexadas):
+    """
+    Separa las filas (huellas de huellas_filas) según las ya anexadas al
+    archivo final: (etiquetas sin anexar, etiquetas anexadas que cambiaron
+    después). Las anexadas sin cambios no quedan en ninguna de las dos.
+    """
+    anexada = _claves(filas, _COLUMNAS_UNION).isin(_claves(anexadas, _COLUMNAS_UNION))
+    igual = _claves(filas, _COLUMNAS_UNION + ['huella']).isin(_claves(anexadas, _COLUMNAS_UNION + ['huella']))
+    return filas.index[~anexada], filas.index[anexada & ~igual]
+
+
+def acumular_anexadas(anteriores, filas):
+    """Clave y hash de las filas anexadas: las 'anteriores' (o None) más 'filas'"""
+    nuevas = filas[_COLUMNAS_UNION + ['huella']].reset_index(drop=True)
+    if anteriores is not None:
+        nuevas = pd.concat([anteriores, nuevas], ignore_index=True)
+    return nuevas.drop_duplicates(_COLUMNAS_UNION, keep='last').reset_index(drop=True)
+
+
+class RegistroCambios:
+    """Huellas de las filas de la última ejecución, en un pickle"""
+
+    def __init__(self, ruta, log=None):
+        self.ruta = Path(ruta)
+        self.log = log or (lambda mensaje, tipo="INFO": None)
+
+    def leer(self):
+        """{'filas': DataFrame de huellas, ...datos de la ejecución} o None si no hay uno válido"""
+        if not self.ruta.exists():
+            return None
+        try:
+            with open(self.ruta, 'rb') as archivo:
+                registro = pickle.load(archivo)
+        except Exception as e:
+            self.log(f"Registro de cambios dañado ({self.ruta.name}): {e}", "WARN")
+            return None
+        return registro if registro.get('version') == VERSION_REGISTRO else None
+
+    def guardar(self, filas, **datos):
+        """Reemplaza el registro con las huellas 'filas' y los datos de la ejecución"""
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = self.ruta.with_suffix('.tmp')
+        with open(temporal, 'wb') as archivo:
+            pickle.dump({
+                'version': VERSION_REGISTRO,
+                'guardado': datetime.now().isoformat(timespec='seconds'),
+                **datos,
+                'filas': filas,
+            }, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        temporal.replace(self.ruta)
@@ -0,0 +1,53 @@
+"""
+Carga de módulos pesados en segundo plano
+
+La interfaz se muestra solo con tkinter/tkcalendar; pandas, openpyxl y las
+librerías COM se importan en un hilo mientras el usuario elige la fecha.
+Este módulo no importa nada pesado.
+"""
+
+import importlib
+import threading
+import time
+
+
+class CargaDiferida:
+    """Importa 'modulos' en un hilo; esperar() devuelve el último módulo cargado"""
+
+    def __init__(self, *modulos):
+        self.modulos = modulos
+        self.error = None
+        self.resultado = None
+        self.segundos = None
+        self.hilo = threading.Thread(target=self._cargar, name='CargaDiferida', daemon=True)
+
+    def iniciar(self):
+        self.hilo.start()
+        return self
+
+    def _cargar(self):
+        inicio = time.perf_counter()
+        try:
+            for nombre in self.modulos:
+                self.resultado = importlib.import_module(nombre)
+        except BaseException as e:
+            self.error = e
+        self.segundos = time.perf_counter() - inicio
+
+    def lista(self):
+        return not self.hilo.is_alive()
+
+    def esperar(self, mientras_espera=None, intervalo=0.05):
+        """
+        Espera a que termine la carga. 'mientras_espera' se llama cada 'intervalo'
+        segundos (ej. para refrescar una ventana). Relanza el error de la carga.
+        """
+        if not self.hilo.is_alive() and self.segundos is None:
+            self._cargar()
+        while self.hilo.is_alive():
+            if mientras_espera:
+                mientras_espera()
+            self.hilo.join(intervalo)
+        if self.error:
+            raise self.error
+        return self.resultado
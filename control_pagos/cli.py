@@ -0,0 +1,178 @@
+"""
+Ejecución sin interfaz gráfica (tareas programadas, servidores)
+
+    python -m control_pagos --fecha 2026-02-04 --config config.ini
+    python -m control_pagos --desde 2026-02-01 --hasta 2026-02-28
+    python -m control_pagos --fecha 2026-02-04 --perfil
+    python -m control_pagos --totales proveedor moneda --desde 2025-01-01 --hasta 2025-12-31
+    python -m control_pagos --vigilar
+
+No importa Tk ni tkcalendar. El código de salida indica el resultado.
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from control_pagos.historial_pagos import AGRUPACIONES, FILTROS
+from control_pagos.lote import fechas_de_lote
+from control_pagos.proceso import ESTADO_BLOQUEADO, ESTADO_OK, ESTADO_SIN_REGISTROS, CopiarArchivo
+
+# Códigos de salida
+SALIDA_OK = 0
+SALIDA_ERROR = 1
+SALIDA_USO = 2
+SALIDA_SIN_REGISTROS = 3
+SALIDA_ARCHIVO_BLOQUEADO = 4
+
+
+def leer_fecha_cli(texto):
+    """Fecha de la línea de comandos: aaaa-mm-dd o dd/mm/aaaa"""
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Fecha no válida: '{texto}' (use aaaa-mm-dd o dd/mm/aaaa)")
+
+
+def crear_parser(prog=None):
+    """Argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Proyección de pagos internacionales sin interfaz gráfica.",
+        epilog=f"Códigos de salida: {SALIDA_OK} completado, {SALIDA_ERROR} error, {SALIDA_USO} argumentos "
+               f"inválidos, {SALIDA_SIN_REGISTROS} sin registros, {SALIDA_ARCHIVO_BLOQUEADO} archivo abierto/bloqueado."
+    )
+    parser.add_argument('--fecha', type=leer_fecha_cli, help="Fecha de proyección (una semana)")
+    parser.add_argument('--config', help="Ruta de config.ini (por defecto, junto al programa)")
+    parser.add_argument('--perfil', '--profile', dest='perfil', action='store_true',
+                        help="Perfila con cProfile las etapas de Python (lectura, filtro, agrupación, archivo "
+                             "final) y guarda el .prof y un resumen junto al informe de la ejecución")
+    lote = parser.add_argument_group('lote', 'Proyectar varias semanas leyendo el libro una sola vez')
+    lote.add_argument('--desde', type=leer_fecha_cli, help="Primer día del rango (se proyectan sus miércoles)")
+    lote.add_argument('--hasta', type=leer_fecha_cli, help="Último día del rango")
+    lote.add_argument('--miercoles', type=leer_fecha_cli, nargs='+', help="Lista de fechas de proyección")
+    lote.add_argument('--procesos', type=int, help="Procesos para escribir las proyecciones")
+    parser.add_argument('--vigilar', action='store_true',
+                        help="Vigila el archivo origen y regenera la proyección de la semana en curso (o de "
+                             "--fecha) cada vez que cambia; Ctrl+C para terminar")
+    historial = parser.add_argument_group('historial', 'Consultas al historial local de registros anexados '
+                                                       '(no abren el archivo final)')
+    historial.add_argument('--reconstruir-historial', action='store_true',
+                           help="Vuelve a llenar el historial leyendo el archivo final una vez")
+    historial.add_argument('--totales', nargs='+', choices=list(AGRUPACIONES), metavar='CAMPO',
+                           help=f"Totales agrupados por: {', '.join(AGRUPACIONES)} "
+                                f"(--desde/--hasta limitan la fecha de pago)")
+    for filtro in FILTROS:
+        historial.add_argument(f'--{filtro}', help=f"Solo registros de este {filtro} (con --totales)")
+    return parser
+
+
+def codigo_de_estado(estado):
+    """Código de salida para CopiarArchivo.estado"""
+    return {
+        ESTADO_OK: SALIDA_OK,
+        ESTADO_SIN_REGISTROS: SALIDA_SIN_REGISTROS,
+        ESTADO_BLOQUEADO: SALIDA_ARCHIVO_BLOQUEADO,
+    }.get(estado, SALIDA_ERROR)
+
+
+def ejecutar_semana(args, reportero=None):
+    """Proyección de una fecha; devuelve el código de salida"""
+    copiador = CopiarArchivo(fecha_filtrado=args.fecha, reportero=reportero, ruta_config=args.config,
+                             perfil=args.perfil)
+    copiador.ejecutar_proceso()
+    return codigo_de_estado(copiador.estado)
+
+
+def ejecutar_lote(args, reportero=None):
+    """Proyección por lote; devuelve el código de salida"""
+    try:
+        fechas = fechas_de_lote(args.desde, args.hasta, args.miercoles)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return SALIDA_USO
+
+    copiador = CopiarArchivo(reportero=reportero, ruta_config=args.config, perfil=args.perfil)
+    resultados = copiador.ejecutar_lote(fechas, procesos=args.procesos or copiador.procesos_lote)
+
+    for fecha, ruta in resultados.items():
+        print(f"  {fecha.strftime('%d/%m/%Y')}: {ruta or 'sin proyección'}")
+    return codigo_de_estado(copiador.estado)
+
+
+def ejecutar_vigilancia(args, reportero=None):
+    """Modo vigilancia hasta Ctrl+C; devuelve el código de salida"""
+    from control_pagos.vigilancia import Vigilancia
+
+    try:
+        Vigilancia(ruta_config=args.config, fecha=args.fecha, reportero=reportero).ejecutar()
+    except KeyboardInterrupt:
+        print("\nVigilancia detenida")
+    return SALIDA_OK
+
+
+def ejecutar_historial(args, reportero=None):
+    """Reconstrucción del historial local y/o consulta de totales; devuelve el código de salida"""
+    copiador = CopiarArchivo(reportero=reportero, ruta_config=args.config)
+    historial = copiador.abrir_historial()
+    if historial is None:
+        print("✗ El historial local está desactivado ([HISTORIAL] Activo = no)")
+        return SALIDA_USO
+
+    with historial:
+        if args.reconstruir_historial:
+            historial.reconstruir(copiador.ruta_destino_final)
+        if args.totales:
+            if copiador.ruta_destino_final.exists() and not historial.vigente(copiador.ruta_destino_final):
+                print("⚠ El historial no está al día con el archivo final (use --reconstruir-historial)")
+            filtros = {filtro: getattr(args, filtro) for filtro in FILTROS}
+            df = historial.totales(args.totales, desde=args.desde, hasta=args.hasta, **filtros)
+            print(df.to_string(index=False, float_format='{:,.2f}'.format) if not df.empty else "Sin registros")
+    return SALIDA_OK
+
+
+def main(argv=None, prog=None):
+    """Punto de entrada sin interfaz; devuelve el código de salida"""
+    parser = crear_parser(prog)
+    args = parser.parse_args(argv)
+
+    if args.fecha and (args.desde or args.hasta or args.miercoles):
+        parser.error("use --fecha o las opciones de lote, no ambas")
+    if args.config and not Path(args.config).is_file():
+        parser.error(f"no existe el archivo de configuración: {args.config}")
+
+    if args.reconstruir_historial or args.totales:
+        if args.fecha or args.miercoles:
+            parser.error("las consultas al historial no se combinan con --fecha ni --miercoles")
+        try:
+            return ejecutar_historial(args)
+        except Exception as e:
+            print(f"✗ Error en el historial: {e}")
+            return SALIDA_ERROR
+
+    if args.vigilar:
+        if args.desde or args.hasta or args.miercoles:
+            parser.error("--vigilar no se combina con las opciones de lote")
+        try:
+            return ejecutar_vigilancia(args)
+        except Exception as e:
+            print(f"✗ Error en la vigilancia: {e}")
+            return SALIDA_ERROR
+
+    try:
+        if args.fecha:
+            return ejecutar_semana(args)
+        if args.desde or args.hasta or args.miercoles:
+            return ejecutar_lote(args)
+    except Exception as e:
+        print(f"✗ Error inesperado: {e}")
+        return SALIDA_ERROR
+
+    parser.error("indique --fecha o un lote (--desde/--hasta o --miercoles)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
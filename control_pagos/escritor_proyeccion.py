@@ -0,0 +1,352 @@
+"""
+Motores de escritura de la hoja de proyección
+
+Todos los motores producen la misma hoja: encabezado con color, filas de total
+resaltadas, formato numérico en 'VALOR A PAGAR', anchos de columna ajustados y
+la primera fila inmovilizada.
+"""
+
+import re
+import zipfile
+from copy import copy
+from pathlib import Path
+
+import pandas as pd
+
+from control_pagos.sesion_excel import SesionExcel
+
+# Colores en formato COM (BGR entero), igual que los usa Excel
+COLOR_ENCABEZADO = 11764117
+COLOR_TOTAL = 12117678
+COLOR_FUENTE_ENCABEZADO = 16777215
+
+FORMATO_NUMERO = "#,##0.00"
+COLUMNA_IMPORTADOR = 'IMPORTADOR'
+COLUMNA_VALOR = 'VALOR A PAGAR'
+
+# Tipos de fila de la proyección (columna auxiliar que deja agrupar_y_calcular)
+COLUMNA_TIPO_FILA = '_TIPO_FILA'
+FILA_DETALLE = 'DETALLE'
+FILA_TOTAL = 'TOTAL'
+FILA_VACIA = 'VACIA'
+
+ANCHO_MAXIMO_COLUMNA = 60
+
+# Partes del paquete con imágenes, gráficos o formas (openpyxl no las conserva)
+_PARTE_DIBUJO = re.compile(r'^xl/(?:drawings/drawing\d+\.xml|charts/|media/)')
+
+# Range.SpecialCells(xlCellTypeVisible): celdas que deja ver el filtro
+XL_CELDAS_VISIBLES = 12
+
+
+def color_com_a_rgb(color):
+    """Convierte un color COM (BGR entero) a hexadecimal RGB para openpyxl"""
+    rojo = color & 0xFF
+    verde = (color >> 8) & 0xFF
+    azul = (color >> 16) & 0xFF
+    return f"{rojo:02X}{verde:02X}{azul:02X}"
+
+
+class LibroConDibujos(Exception):
+    """openpyxl perdería las imágenes o dibujos del libro al guardarlo"""
+
+
+def partes_dibujo(ruta_archivo):
+    """Partes del .xlsx con imágenes, gráficos o formas"""
+    with zipfile.ZipFile(ruta_archivo) as paquete:
+        return [nombre for nombre in paquete.namelist() if _PARTE_DIBUJO.match(nombre)]
+
+
+def _log_consola(mensaje, tipo="INFO"):
+    print(f"[{tipo}] {mensaje}")
+
+
+def _es_vacio(serie):
+    """Máscara de celdas vacías (None, NaN o texto en blanco)"""
+    return serie.isna() | (serie.astype(str).str.strip() == "")
+
+
+def clasificar_filas(df_datos):
+    """
+    Determina el tipo de cada fila de datos (sin encabezado):
+    - VACIA: sin importador ni valor (separador entre grupos)
+    - TOTAL: sin importador pero con valor
+    - DETALLE: cualquier otra
+    """
+    if COLUMNA_IMPORTADOR in df_datos.columns:
+        sin_importador = _es_vacio(df_datos[COLUMNA_IMPORTADOR])
+    else:
+        sin_importador = pd.Series(False, index=df_datos.index)
+
+    if COLUMNA_VALOR in df_datos.columns:
+        sin_valor = _es_vacio(df_datos[COLUMNA_VALOR])
+    else:
+        sin_valor = pd.Series(True, index=df_datos.index)
+
+    tipos = pd.Series(FILA_DETALLE, index=df_datos.index)
+    tipos[sin_importador] = FILA_TOTAL
+    tipos[sin_importador & sin_valor] = FILA_VACIA
+    return tipos.tolist()
+
+
+def separar_tipos_fila(df_datos):
+    """
+    Devuelve (datos sin columnas auxiliares, tipos de fila).
+    Usa la columna _TIPO_FILA si viene de agrupar_y_calcular; si no, deduce
+    los tipos a partir del contenido.
+    """
+    if COLUMNA_TIPO_FILA in df_datos.columns:
+        tipos = df_datos[COLUMNA_TIPO_FILA].fillna(FILA_DETALLE).tolist()
+        return df_datos.drop(columns=[COLUMNA_TIPO_FILA]), tipos
+    return df_datos, clasificar_filas(df_datos)
+
+
+def indice_columna_valor(columnas):
+    """Posición (base 1) de la columna 'VALOR A PAGAR'"""
+    columnas = list(columnas)
+    if COLUMNA_VALOR in columnas:
+        return columnas.index(COLUMNA_VALOR) + 1
+    return 7
+
+
+class EscritorProyeccion:
+    """Interfaz común de los motores que guardan la hoja de proyección"""
+    nombre = None
+
+    def __init__(self, log=None, sesion=None):
+        self.log = log or _log_consola
+        # Sesión de Excel compartida (control_pagos.sesion_excel); solo la usa COM
+        self.sesion = sesion
+
+    def guardar(self, ruta_archivo, df_datos, nombre_hoja):
+        """Agrega la hoja 'nombre_hoja' con df_datos al libro 'ruta_archivo'"""
+        raise NotImplementedError
+
+
+class EscritorProyeccionCOM(EscritorProyeccion):
+    """Escribe la proyección automatizando Excel por COM (requiere Windows + Excel)"""
+    nombre = 'com'
+
+    def guardar(self, ruta_archivo, df_datos, nombre_hoja):
+        if self.sesion is not None:
+            self.escribir(self.sesion, ruta_archivo, df_datos, nombre_hoja)
+            return
+        # Sin sesión compartida: instancia propia, así varias proyecciones
+        # pueden escribirse en paralelo
+        with SesionExcel(log=self.log) as sesion:
+            self.escribir(sesion, ruta_archivo, df_datos, nombre_hoja)
+
+    def escribir(self, sesion, ruta_archivo, df_datos, nombre_hoja):
+        """Agrega la hoja usando el libro abierto en 'sesion' (lo abre si hace falta)"""
+        wb = sesion.abrir(ruta_archivo)
+
+        # Crear segunda hoja
+        try:
+            ws = wb.Sheets.Add(After=wb.Sheets(wb.Sheets.Count))
+            ws.Name = nombre_hoja
+        except Exception:
+            ws = sesion.excel.ActiveSheet
+        ws.Activate()
+
+        # Preparar datos: una columna auxiliar al final lleva el tipo de cada
+        # fila para poder filtrar por ella al dar formato (se borra después)
+        df_datos, tipos = separar_tipos_fila(df_datos)
+        datos = [df_datos.columns.tolist() + [COLUMNA_TIPO_FILA]] + [
+            fila + [tipo] for fila, tipo in zip(df_datos.fillna("").values.tolist(), tipos)
+        ]
+
+        filas = len(datos)
+        columnas = len(datos[0]) - 1
+        col_val = indice_columna_valor(df_datos.columns)
+
+        # Escribir datos
+        rango_datos = ws.Range(ws.Cells(1, 1), ws.Cells(filas, columnas + 1))
+        rango_datos.Value = datos
+
+        # Formato header
+        rango_header = ws.Range(ws.Cells(1, 1), ws.Cells(1, columnas))
+        rango_header.Interior.Color = COLOR_ENCABEZADO
+        rango_header.Font.Bold = True
+        rango_header.Font.Color = COLOR_FUENTE_ENCABEZADO
+        rango_header.HorizontalAlignment = -4108
+        rango_header.VerticalAlignment = -4108
+        rango_header.Borders.LineStyle = 1
+
+        # Formato por tipo de fila
+        self.formatear_filas(ws, rango_datos, columnas, tipos)
+        ws.Range(ws.Cells(1, columnas + 1), ws.Cells(filas, columnas + 1)).ClearContents()
+
+        # Formato numérico
+        rango_vals = ws.Range(ws.Cells(2, col_val), ws.Cells(filas, col_val))
+        rango_vals.NumberFormat = FORMATO_NUMERO
+
+        # Autofit
+        ws.Columns.AutoFit()
+
+        # Freeze panes
+        sesion.excel.ActiveWindow.SplitRow = 1
+        sesion.excel.ActiveWindow.FreezePanes = True
+
+        sesion.guardar(wb)
+
+    def formatear_filas(self, ws, rango_datos, columnas, tipos):
+        """
+        Da formato a las filas filtrando por la columna de tipos: cada estilo
+        es una sola llamada sobre las celdas visibles, cualquiera sea la
+        cantidad de filas (las filas vacías quedan sin bordes ni relleno)
+        """
+        cuerpo = ws.Range(ws.Cells(2, 1), ws.Cells(len(tipos) + 1, columnas))
+        try:
+            if any(tipo != FILA_VACIA for tipo in tipos):
+                rango_datos.AutoFilter(Field=columnas + 1, Criteria1=f"<>{FILA_VACIA}")
+                cuerpo.SpecialCells(XL_CELDAS_VISIBLES).Borders.LineStyle = 1
+            if FILA_TOTAL in tipos:
+                rango_datos.AutoFilter(Field=columnas + 1, Criteria1=FILA_TOTAL)
+                rango_total = cuerpo.SpecialCells(XL_CELDAS_VISIBLES)
+                rango_total.Interior.Color = COLOR_TOTAL
+                rango_total.Font.Bold = True
+        finally:
+            ws.AutoFilterMode = False
+
+
+class EscritorProyeccionOpenpyxl(EscritorProyeccion):
+    """
+    Escribe la proyección con openpyxl, sin abrir Excel (funciona en Linux).
+    openpyxl no conserva imágenes ni dibujos: si el libro los tiene se escribe
+    con COM, o sin Excel se lanza LibroConDibujos.
+    """
+    nombre = 'openpyxl'
+
+    def guardar(self, ruta_archivo, df_datos, nombre_hoja):
+        from openpyxl import Workbook, load_workbook
+        from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+        from openpyxl.utils import get_column_letter
+
+        ruta_archivo = Path(ruta_archivo)
+        dibujos = partes_dibujo(ruta_archivo) if ruta_archivo.exists() else []
+        if dibujos:
+            if com_disponible():
+                self.log(f"{ruta_archivo.name} tiene imágenes o dibujos que openpyxl no conserva; "
+                         f"se escribe con Excel", "WARN")
+                return EscritorProyeccionCOM(log=self.log, sesion=self.sesion).guardar(
+                    ruta_archivo, df_datos, nombre_hoja)
+            raise LibroConDibujos(
+                f"{ruta_archivo.name} tiene {len(dibujos)} partes con imágenes o dibujos que se perderían al "
+                f"guardarlo con openpyxl; se necesita Excel ([PROYECCION] Motor = com)"
+            )
+        if ruta_archivo.exists():
+            wb = load_workbook(ruta_archivo)
+        else:
+            wb = Workbook()
+            wb.remove(wb.active)
+
+        ws = wb.create_sheet(nombre_hoja)
+
+        df_datos, tipos = separar_tipos_fila(df_datos)
+        columnas = df_datos.columns.tolist()
+        col_val = indice_columna_valor(columnas)
+
+        lado = Side(style='thin')
+        borde = Border(left=lado, right=lado, top=lado, bottom=lado)
+        relleno_header = PatternFill('solid', fgColor=color_com_a_rgb(COLOR_ENCABEZADO))
+        relleno_total = PatternFill('solid', fgColor=color_com_a_rgb(COLOR_TOTAL))
+        fuente_header = Font(bold=True, color=color_com_a_rgb(COLOR_FUENTE_ENCABEZADO))
+        fuente_total = Font(bold=True)
+        centrado = Alignment(horizontal='center', vertical='center')
+
+        # Encabezado
+        ws.append(columnas)
+        for celda in ws[1]:
+            celda.fill = relleno_header
+            celda.font = fuente_header
+            celda.alignment = centrado
+            celda.border = borde
+
+        # Datos ("" se escribe como celda vacía, igual que en Excel)
+        valores = df_datos.astype(object).where(df_datos.notna(), None).values.tolist()
+        for fila in valores:
+            ws.append([None if v == "" else v for v in fila])
+
+        # Formato por tipo de fila: cada estilo se registra una sola vez en el
+        # libro y luego se copia su índice a las celdas (asignar objetos de
+        # estilo celda por celda obliga a openpyxl a buscarlos cada vez)
+        estilos = {
+            FILA_DETALLE: self.crear_estilo(ws, border=borde),
+            FILA_TOTAL: self.crear_estilo(ws, border=borde, fill=relleno_total, font=fuente_total),
+        }
+        estilos_valor = {
+            tipo: self.crear_estilo(ws, border=borde, number_format=FORMATO_NUMERO, **(
+                {'fill': relleno_total, 'font': fuente_total} if tipo == FILA_TOTAL else {}))
+            for tipo in estilos
+        }
+        for tipo, celdas in zip(tipos, ws.iter_rows(min_row=2)):
+            if tipo == FILA_VACIA:
+                continue
+            estilo = estilos[tipo]
+            for celda in celdas:
+                celda._style = copy(estilo)
+            celdas[col_val - 1]._style = copy(estilos_valor[tipo])
+
+        # Ancho de columnas (equivalente a AutoFit)
+        for idx, ancho in enumerate(self.calcular_anchos(df_datos), start=1):
+            ws.column_dimensions[get_column_letter(idx)].width = ancho
+
+        ws.freeze_panes = 'A2'
+        wb.active = wb.sheetnames.index(ws.title)
+        wb.save(ruta_archivo)
+
+    def crear_estilo(self, ws, **atributos):
+        """Registra un estilo en el libro y devuelve su arreglo de índices"""
+        from openpyxl.cell.cell import Cell
+
+        celda = Cell(ws)
+        for atributo, valor in atributos.items():
+            setattr(celda, atributo, valor)
+        return celda._style
+
+    def calcular_anchos(self, df_datos):
+        """Calcula el ancho de cada columna según el texto más largo"""
+        anchos = []
+        for columna in df_datos.columns:
+            serie = df_datos[columna]
+            if columna == COLUMNA_VALOR:
+                numeros = pd.to_numeric(serie, errors='coerce').dropna()
+                textos = numeros.map(lambda v: f"{v:,.2f}")
+            else:
+                textos = serie.dropna().astype(str)
+            largo = textos.str.len().max() if len(textos) else 0
+            largo = max(int(largo or 0), len(str(columna)))
+            anchos.append(min(largo + 2, ANCHO_MAXIMO_COLUMNA))
+        return anchos
+
+
+MOTORES = {
+    EscritorProyeccionCOM.nombre: EscritorProyeccionCOM,
+    EscritorProyeccionOpenpyxl.nombre: EscritorProyeccionOpenpyxl,
+}
+
+
+def com_disponible():
+    """Indica si pywin32 está instalado (Excel por COM)"""
+    try:
+        import win32com.client  # noqa: F401
+        import pythoncom  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def motor_por_defecto():
+    """COM cuando está disponible; openpyxl en equipos sin Excel"""
+    return EscritorProyeccionCOM.nombre if com_disponible() else EscritorProyeccionOpenpyxl.nombre
+
+
+def crear_escritor(motor=None, log=None, sesion=None):
+    """
+    Crea el escritor de proyección para el motor indicado ('com' u 'openpyxl').
+    'sesion' es la sesión de Excel del proceso, si ya hay una abierta.
+    """
+    motor = (motor or motor_por_defecto()).strip().lower()
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de proyección desconocido: '{motor}'. Disponibles: {list(MOTORES)}")
+    return MOTORES[motor](log=log, sesion=sesion)
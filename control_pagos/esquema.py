@@ -0,0 +1,126 @@
+"""
+Esquema de columnas de la hoja Control_Pagos
+
+Registro único de los nombres estándar que usa el proceso y de sus alias. El
+mapa de alias se arma una vez al importar el módulo y compara sin distinguir
+mayúsculas, tildes ni espacios repetidos ('Nota credito' → 'NOTA CRÉDITO').
+Encabezado resuelve una fila de encabezado en una sola pasada; el lector, el
+filtro de fecha y la preparación de la proyección usan el mismo resultado.
+"""
+
+import difflib
+import unicodedata
+
+# Alias de encabezados → nombre estándar
+MAPEO_COLUMNAS = {
+    '# IMPORTACION': 'NRO. IMPO',
+    '#IMPORTACION': 'NRO. IMPO',
+    'VALOR MONEDA ORIGEN': 'VALOR A PAGAR',
+    'NOTA CREDITO': 'NOTA CRÉDITO',
+    'VALOR NOTA CRÉDITO': 'NOTA CRÉDITO',
+    'VALOR NOTA CREDITO': 'NOTA CRÉDITO'
+}
+
+# Columnas de fecha candidatas, en orden de preferencia
+POSIBLES_COLUMNAS_FECHA = ['FECHA DE VENCIMIENTO', 'FECHA VENCIMIENTO', 'FECHA DE PAGO', 'FECHA PAGO']
+
+# Columnas que usa el proceso (además de la de fecha)
+COLUMNAS_REQUERIDAS = [
+    'IMPORTADOR',
+    'MARCA',
+    'PROVEEDOR',
+    'NRO. IMPO',
+    'MONEDA',
+    'NOTA CRÉDITO',
+    'VALOR A PAGAR',
+    'ESTADO',
+]
+
+# Sin estas columnas (y sin una de fecha) no se puede proyectar; las demás
+# requeridas se completan vacías
+COLUMNAS_OBLIGATORIAS = ['IMPORTADOR', 'PROVEEDOR', 'MONEDA', 'VALOR A PAGAR']
+
+# Columnas que se entregan como número; el resto como texto (igual que dtype=str)
+COLUMNAS_NUMERICAS = {'VALOR A PAGAR'}
+
+
+def normalizar_nombre(nombre):
+    """Clave de comparación de un encabezado: mayúsculas, sin tildes ni espacios repetidos"""
+    texto = unicodedata.normalize('NFKD', str(nombre).strip().upper())
+    return ' '.join(''.join(c for c in texto if not unicodedata.combining(c)).split())
+
+
+# Nombre normalizado → nombre estándar
+ALIAS = {normalizar_nombre(nombre): nombre for nombre in COLUMNAS_REQUERIDAS + POSIBLES_COLUMNAS_FECHA}
+ALIAS.update({normalizar_nombre(alias): destino for alias, destino in MAPEO_COLUMNAS.items()})
+
+
+def nombre_estandar(encabezado):
+    """Nombre estándar de un encabezado; los que no están en el esquema quedan en mayúsculas"""
+    return ALIAS.get(normalizar_nombre(encabezado), str(encabezado).strip().upper())
+
+
+class ColumnasFaltantes(ValueError):
+    """Al encabezado le faltan columnas obligatorias"""
+
+    def __init__(self, faltantes, encontradas, hoja=None):
+        self.faltantes = faltantes
+        self.encontradas = encontradas
+        claves = {normalizar_nombre(nombre): nombre for nombre in encontradas}
+        detalle = []
+        for faltante in faltantes:
+            if faltante == 'FECHA':
+                detalle.append(f"una columna de fecha ({', '.join(POSIBLES_COLUMNAS_FECHA)})")
+                continue
+            parecida = difflib.get_close_matches(normalizar_nombre(faltante), claves, n=1, cutoff=0.75)
+            detalle.append(f"'{faltante}'" + (f" (¿'{claves[parecida[0]]}'?)" if parecida else ""))
+        donde = f" en '{hoja}'" if hoja else ""
+        super().__init__(f"Faltan columnas{donde}: {'; '.join(detalle)}. Encabezado encontrado: {encontradas}")
+
+
+class Encabezado:
+    """
+    Fila de encabezado resuelta: nombre estándar de cada columna, posición de
+    cada nombre (la primera aparición si se repite) y columna de fecha.
+    """
+
+    def __init__(self, valores):
+        self.originales = [str(valor).strip() for valor in valores if valor is not None]
+        self.nombres = []
+        self.posiciones = {}
+        for posicion, valor in enumerate(valores):
+            if valor is None:
+                self.nombres.append(None)
+                continue
+            nombre = nombre_estandar(valor)
+            if nombre in self.posiciones:
+                nombre = str(valor).strip().upper()
+            self.posiciones.setdefault(nombre, posicion)
+            self.nombres.append(nombre)
+        self.col_fecha = next((col for col in POSIBLES_COLUMNAS_FECHA if col in self.posiciones), None)
+
+    def faltantes(self, obligatorias=COLUMNAS_OBLIGATORIAS):
+        """Obligatorias que no están ('FECHA' si no hay columna de fecha)"""
+        faltantes = [col for col in obligatorias if col not in self.posiciones]
+        if self.col_fecha is None:
+            faltantes.append('FECHA')
+        return faltantes
+
+    def verificar(self, obligatorias=COLUMNAS_OBLIGATORIAS, hoja=None):
+        """Lanza ColumnasFaltantes si falta alguna obligatoria o la columna de fecha"""
+        faltantes = self.faltantes(obligatorias)
+        if faltantes:
+            raise ColumnasFaltantes(faltantes, self.originales, hoja)
+        return self
+
+    def seleccion(self, columnas=None):
+        """{nombre estándar: posición} de 'columnas' (por defecto las requeridas) y la de fecha"""
+        columnas = list(columnas or COLUMNAS_REQUERIDAS)
+        if self.col_fecha:
+            columnas.append(self.col_fecha)
+        return {col: self.posiciones[col] for col in columnas if col in self.posiciones}
+
+    def aplicar(self, df):
+        """Renombra las columnas del DataFrame con los nombres estándar (una sola asignación)"""
+        df.columns = self.nombres
+        return df
@@ -0,0 +1,378 @@
+"""
+Sesión de Excel falsa, sin COM (pruebas en Linux)
+
+SesionExcelFalsa tiene la misma interfaz que SesionExcel, pero los libros son
+libros openpyxl en memoria que solo se escriben al disco con Save/SaveAs, igual
+que en Excel. Implementa la parte del modelo de objetos que usan las etapas
+(Workbooks, Sheets, Cells, Range, ListObjects, AutoFilter...) y cuenta las
+llamadas costosas en 'llamadas' (iniciar_excel, abrir, guardar, guardar_como,
+cerrar, cerrar_excel, y 'formato' por cada atributo de Interior, Font o
+Borders asignado a un rango). El relleno, la fuente y los bordes se aplican a
+las celdas; el resto del formato (anchos, alineación) se acepta y se ignora.
+
+    sesion = SesionExcelFalsa()
+    CopiarArchivo(fecha, fabrica_sesion_excel=lambda log: sesion).ejecutar_proceso()
+    sesion.llamadas['iniciar_excel']  # 1
+"""
+
+import re
+from copy import copy
+from itertools import groupby
+from pathlib import Path
+
+from openpyxl import load_workbook
+from openpyxl.styles import Border, PatternFill, Side
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+from control_pagos.escritor_proyeccion import color_com_a_rgb
+from control_pagos.sesion_excel import SesionExcel
+
+XL_UP = -4162
+XL_CELDAS_VISIBLES = 12
+FILAS_HOJA = 1048576
+COLUMNAS_HOJA = 16384
+
+# Sheet.Visible de Excel y sheet_state de openpyxl
+VISIBILIDAD = {-1: 'visible', 0: 'hidden', 2: 'veryHidden'}
+
+_CELDA = re.compile(r'^\$?([A-Z]+)\$?(\d+)$')
+
+
+class ErrorExcelFalso(Exception):
+    """Error equivalente a un com_error de Excel"""
+
+
+def _area(direccion):
+    """'A1' o '$A$1:$C$5' → (fila1, col1, fila2, col2)"""
+    extremos = []
+    for parte in direccion.upper().split(':'):
+        encontrado = _CELDA.match(parte.strip())
+        if not encontrado:
+            raise ErrorExcelFalso(f"Dirección no válida: '{direccion}'")
+        extremos.append((int(encontrado.group(2)), column_index_from_string(encontrado.group(1))))
+    (fila1, col1), (fila2, col2) = extremos[0], extremos[-1]
+    return min(fila1, fila2), min(col1, col2), max(fila1, fila2), max(col1, col2)
+
+
+class _Atributos:
+    """Objeto que acepta cualquier atributo (ActiveWindow, Rows, Columns...)"""
+
+
+def _interior(celda, nombre, valor):
+    if nombre == 'Color':
+        celda.fill = PatternFill('solid', fgColor=color_com_a_rgb(valor))
+
+
+def _fuente(celda, nombre, valor):
+    fuente = copy(celda.font)
+    if nombre == 'Bold':
+        fuente.b = valor
+    elif nombre == 'Color':
+        fuente.color = color_com_a_rgb(valor)
+    celda.font = fuente
+
+
+def _bordes(celda, nombre, valor):
+    if nombre == 'LineStyle':
+        lado = Side(style='thin' if valor == 1 else None)
+        celda.border = Border(left=lado, right=lado, top=lado, bottom=lado)
+
+
+class _Formato:
+    """Interior, Font o Borders de un rango: cada atributo asignado se aplica a sus celdas"""
+
+    def __init__(self, rango, aplicar):
+        object.__setattr__(self, '_rango', rango)
+        object.__setattr__(self, '_aplicar', aplicar)
+
+    def __setattr__(self, nombre, valor):
+        object.__setattr__(self, nombre, valor)
+        self._rango.hoja.libro.excel.llamadas['formato'] += 1
+        for celda in self._rango.celdas():
+            self._aplicar(celda, nombre, valor)
+
+
+class RangoFalso:
+    def __init__(self, hoja, areas):
+        self.hoja = hoja
+        self.areas = areas
+        self.Interior = _Formato(self, _interior)
+        self.Font = _Formato(self, _fuente)
+        self.Borders = _Formato(self, _bordes)
+
+    def celdas(self):
+        ws = self.hoja.ws
+        for fila1, col1, fila2, col2 in self.areas:
+            for fila in range(fila1, fila2 + 1):
+                for col in range(col1, col2 + 1):
+                    yield ws.cell(fila, col)
+
+    @property
+    def Row(self):
+        return self.areas[0][0]
+
+    @property
+    def Column(self):
+        return self.areas[0][1]
+
+    @property
+    def Address(self):
+        fila1, col1, fila2, col2 = self.areas[0]
+        inicio = f"${get_column_letter(col1)}${fila1}"
+        if (fila1, col1) == (fila2, col2):
+            return inicio
+        return f"{inicio}:${get_column_letter(col2)}${fila2}"
+
+    @property
+    def Value(self):
+        fila1, col1, fila2, col2 = self.areas[0]
+        ws = self.hoja.ws
+        if (fila1, col1) == (fila2, col2):
+            return ws.cell(fila1, col1).value
+        return tuple(
+            tuple(ws.cell(fila, col).value for col in range(col1, col2 + 1))
+            for fila in range(fila1, fila2 + 1)
+        )
+
+    @Value.setter
+    def Value(self, valores):
+        ws = self.hoja.ws
+        for fila1, col1, fila2, col2 in self.areas:
+            for i, fila in enumerate(range(fila1, fila2 + 1)):
+                for j, col in enumerate(range(col1, col2 + 1)):
+                    valor = valores[i][j] if isinstance(valores, (list, tuple)) else valores
+                    # Excel guarda "" como celda vacía
+                    ws.cell(fila, col).value = None if valor == "" else valor
+
+    def ClearContents(self):
+        for celda in self.celdas():
+            celda.value = None
+
+    def AutoFilter(self, Field, Criteria1):
+        """Oculta las filas bajo el encabezado cuyo campo no cumple 'valor' o '<>valor'"""
+        fila1, col1, fila2, _ = self.areas[0]
+        ws = self.hoja.ws
+        distinto = Criteria1.startswith('<>')
+        buscado = Criteria1[2:] if distinto else Criteria1
+        ws.auto_filter.ref = self.Address.replace('$', '')
+        for fila in range(fila1 + 1, fila2 + 1):
+            valor = ws.cell(fila, col1 + Field - 1).value
+            ws.row_dimensions[fila].hidden = (str(valor or "").lower() == buscado.lower()) == distinto
+
+    def SpecialCells(self, tipo):
+        if tipo != XL_CELDAS_VISIBLES:
+            raise ErrorExcelFalso(f"Tipo de celdas no soportado: {tipo}")
+        dimensiones = self.hoja.ws.row_dimensions
+        areas = []
+        for fila1, col1, fila2, col2 in self.areas:
+            visibles = [fila for fila in range(fila1, fila2 + 1)
+                        if not (fila in dimensiones and dimensiones[fila].hidden)]
+            for _, tramo in groupby(enumerate(visibles), lambda par: par[1] - par[0]):
+                tramo = [fila for _, fila in tramo]
+                areas.append((tramo[0], col1, tramo[-1], col2))
+        if not areas:
+            raise ErrorExcelFalso("No se encontraron celdas")
+        return RangoFalso(self.hoja, areas)
+
+    def End(self, direccion):
+        if direccion != XL_UP:
+            raise ErrorExcelFalso(f"Dirección no soportada: {direccion}")
+        fila, col = self.Row, self.Column
+        ws = self.hoja.ws
+        for actual in range(min(fila, ws.max_row), 0, -1):
+            if ws.cell(actual, col).value not in (None, ""):
+                return RangoFalso(self.hoja, [(actual, col, actual, col)])
+        return RangoFalso(self.hoja, [(1, col, 1, col)])
+
+
+class TablaFalsa:
+    def __init__(self, hoja, tabla):
+        self.hoja = hoja
+        self.tabla = tabla
+
+    @property
+    def HeaderRowRange(self):
+        fila1, col1, _, col2 = _area(self.tabla.ref)
+        return RangoFalso(self.hoja, [(fila1, col1, fila1, col2)])
+
+    def Resize(self, rango):
+        self.tabla.ref = rango.Address.replace('$', '')
+        if self.tabla.autoFilter is not None:
+            self.tabla.autoFilter.ref = self.tabla.ref
+
+
+class TablasFalsas:
+    def __init__(self, hoja):
+        self.hoja = hoja
+
+    @property
+    def Count(self):
+        return len(self.hoja.ws.tables)
+
+    def __call__(self, indice):
+        return TablaFalsa(self.hoja, list(self.hoja.ws.tables.values())[indice - 1])
+
+
+class HojaFalsa:
+    def __init__(self, libro, ws):
+        self.libro = libro
+        self.ws = ws
+        self.Rows = _Atributos()
+        self.Rows.Count = FILAS_HOJA
+        self.Columns = _Atributos()
+        self.Columns.Count = COLUMNAS_HOJA
+        self.Columns.AutoFit = lambda: None
+        self.ListObjects = TablasFalsas(self)
+
+    @property
+    def Name(self):
+        return self.ws.title
+
+    @Name.setter
+    def Name(self, nombre):
+        if nombre.lower() in (n.lower() for n in self.libro.wb.sheetnames if n != self.ws.title):
+            raise ErrorExcelFalso(f"Ya existe una hoja llamada '{nombre}'")
+        self.ws.title = nombre
+
+    @property
+    def AutoFilterMode(self):
+        return self.ws.auto_filter.ref is not None
+
+    @AutoFilterMode.setter
+    def AutoFilterMode(self, valor):
+        """Solo se puede quitar el filtro (vuelven a verse todas las filas)"""
+        if valor:
+            raise ErrorExcelFalso("AutoFilterMode solo se puede desactivar")
+        if self.ws.auto_filter.ref:
+            fila1, _, fila2, _ = _area(self.ws.auto_filter.ref)
+            for fila in range(fila1, fila2 + 1):
+                if fila in self.ws.row_dimensions:
+                    self.ws.row_dimensions[fila].hidden = False
+        self.ws.auto_filter.ref = None
+
+    @property
+    def Visible(self):
+        return {estado: valor for valor, estado in VISIBILIDAD.items()}[self.ws.sheet_state]
+
+    @Visible.setter
+    def Visible(self, valor):
+        self.ws.sheet_state = VISIBILIDAD[valor]
+
+    def Activate(self):
+        self.libro.wb.active = self.libro.wb.worksheets.index(self.ws)
+
+    def Delete(self):
+        if len(self.libro.wb.worksheets) == 1:
+            raise ErrorExcelFalso("Un libro debe contener al menos una hoja visible")
+        self.libro.wb.remove(self.ws)
+
+    def Cells(self, fila, columna):
+        return RangoFalso(self, [(fila, columna, fila, columna)])
+
+    def Range(self, inicio, fin=None):
+        if isinstance(inicio, str):
+            return RangoFalso(self, [_area(parte) for parte in inicio.split(',')])
+        fin = fin or inicio
+        fila1, col1 = inicio.Row, inicio.Column
+        fila2, col2 = fin.areas[0][2], fin.areas[0][3]
+        return RangoFalso(self, [(min(fila1, fila2), min(col1, col2), max(fila1, fila2), max(col1, col2))])
+
+
+class HojasFalsas:
+    def __init__(self, libro):
+        self.libro = libro
+
+    def __iter__(self):
+        return iter([HojaFalsa(self.libro, ws) for ws in self.libro.wb.worksheets])
+
+    @property
+    def Count(self):
+        return len(self.libro.wb.worksheets)
+
+    def __call__(self, indice):
+        if isinstance(indice, int):
+            return HojaFalsa(self.libro, self.libro.wb.worksheets[indice - 1])
+        for ws in self.libro.wb.worksheets:
+            if ws.title.lower() == str(indice).lower():
+                return HojaFalsa(self.libro, ws)
+        raise ErrorExcelFalso(f"No existe la hoja '{indice}'")
+
+    def Add(self, After=None):
+        wb = self.libro.wb
+        posicion = wb.worksheets.index(After.ws) + 1 if After is not None else 0
+        ws = wb.create_sheet(f"Hoja{len(wb.worksheets) + 1}", posicion)
+        hoja = HojaFalsa(self.libro, ws)
+        hoja.Activate()
+        return hoja
+
+
+class LibroFalso:
+    def __init__(self, excel, ruta, solo_lectura=False):
+        self.excel = excel
+        self.ruta = Path(ruta)
+        self.solo_lectura = solo_lectura
+        self.wb = load_workbook(self.ruta)
+        self.Sheets = HojasFalsas(self)
+
+    @property
+    def ActiveSheet(self):
+        return HojaFalsa(self, self.wb.active)
+
+    def SaveAs(self, Filename, FileFormat=None, CreateBackup=False):
+        self.excel.llamadas['guardar_como'] += 1
+        self.ruta = Path(Filename)
+        self.solo_lectura = False
+        self.wb.save(self.ruta)
+
+    def Save(self):
+        self.excel.llamadas['guardar'] += 1
+        if self.solo_lectura:
+            raise ErrorExcelFalso(f"'{self.ruta.name}' is read-only")
+        self.wb.save(self.ruta)
+
+    def Close(self, SaveChanges=False):
+        self.excel.llamadas['cerrar'] += 1
+        if SaveChanges:
+            self.Save()
+        self.excel.abiertos.remove(self)
+
+
+class LibrosFalsos:
+    def __init__(self, excel):
+        self.excel = excel
+
+    def Open(self, ruta, ReadOnly=False, **opciones):
+        self.excel.llamadas['abrir'] += 1
+        if not Path(ruta).exists():
+            raise ErrorExcelFalso(f"No se encuentra '{ruta}'")
+        libro = LibroFalso(self.excel, ruta, solo_lectura=ReadOnly)
+        self.excel.abiertos.append(libro)
+        return libro
+
+
+class ExcelFalso:
+    """Aplicación Excel en memoria"""
+
+    def __init__(self, llamadas):
+        self.llamadas = llamadas
+        self.abiertos = []
+        self.Workbooks = LibrosFalsos(self)
+        self.ActiveWindow = _Atributos()
+
+    @property
+    def ActiveSheet(self):
+        return self.abiertos[-1].ActiveSheet
+
+    def Quit(self):
+        self.llamadas['cerrar_excel'] += 1
+
+
+class SesionExcelFalsa(SesionExcel):
+    """SesionExcel sin Excel: cuenta las llamadas en 'llamadas'"""
+
+    def contar(self, llamada):
+        """Los objetos falsos cuentan cada llamada, también las que no pasan por la sesión"""
+
+    def crear_aplicacion(self):
+        self.llamadas['iniciar_excel'] += 1
+        return ExcelFalso(self.llamadas)
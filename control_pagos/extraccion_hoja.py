@@ -0,0 +1,386 @@
+"""
+Copia de una sola hoja trabajando directamente sobre el paquete OOXML
+
+Un .xlsm/.xlsx es un zip de partes XML. Para quedarse solo con Control_Pagos no
+hace falta Excel ni cargar las demás hojas: se copian la parte de la hoja y las
+que cuelgan de ella (dibujos, imágenes, gráficos, comentarios, tablas,
+configuración de impresión), los estilos y el tema, y se reescriben el libro,
+sus relaciones, los tipos de contenido y las cadenas compartidas (solo las que
+usa la hoja). El costo depende del tamaño de esa hoja, no del archivo completo.
+
+Las fórmulas, validaciones, formatos condicionales y nombres definidos que
+apuntan a otras hojas o a otros libros se quitan; las celdas conservan el último
+valor calculado (con la copia por Excel quedaban en #REF!). Las tablas
+dinámicas y segmentaciones de la hoja no se copian. El resultado no tiene macros.
+"""
+
+import html
+import posixpath
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from xml.sax.saxutils import quoteattr
+
+PARTE_TIPOS = '[Content_Types].xml'
+
+TIPO_LIBRO_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml'
+TIPO_CONFIGURACION_IMPRESION = 'application/vnd.openxmlformats-officedocument.spreadsheetml.printerSettings'
+
+NS_RELACIONES = 'http://schemas.openxmlformats.org/package/2006/relationships'
+NS_TIPOS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+
+# Relaciones del paquete y del libro que se conservan (por el final de su tipo)
+RELACIONES_PAQUETE = ('/officeDocument', '/core-properties', '/extended-properties', '/custom-properties',
+                      '/metadata/thumbnail')
+RELACIONES_LIBRO = ('/styles', '/theme', '/sharedStrings', '/connections', '/person', '/sheetMetadata',
+                    # Imágenes dentro de celdas (valores enriquecidos)
+                    '/rdRichValue', '/rdRichValueStructure', '/rdRichValueTypes', '/rdArray',
+                    '/rdSupportingPropertyBag', '/rdSupportingPropertyBagStructure', '/richValueRel')
+
+# Relaciones de la hoja que dependen de partes del libro que no se copian
+RELACIONES_OMITIDAS = ('/pivotTable', '/slicer', '/timeline')
+
+# Extensiones del libro que hacen referencia a partes que no se copian
+MARCAS_EXTENSION_LIBRO = ('slicerCache', 'timelineCache', 'pivotCache', 'dataModel', 'r:id=')
+MARCAS_EXTENSION_HOJA = ('slicerList', 'timelineRef')
+
+_REFERENCIA_HOJA = re.compile(r"(?:'((?:[^']|'')+)'|([^\s'!(),;=+\-*/&^<>\"{}]+))!")
+_TEXTO_FORMULA = re.compile(r'"(?:[^"]|"")*"')
+_CELDA = re.compile(r'<c\b([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+_FORMULA = re.compile(r'<f\b([^>]*?)(?:/>|>(.*?)</f>)', re.S)
+_ATRIBUTO = re.compile(r'([\w:]+)="([^"]*)"')
+
+
+def referencia_otra_hoja(formula, nombre_hoja):
+    """¿La fórmula usa celdas de otra hoja, de otro libro o #REF!?"""
+    formula = _TEXTO_FORMULA.sub('""', html.unescape(formula or ''))
+    for encontrado in _REFERENCIA_HOJA.finditer(formula):
+        nombre = (encontrado.group(1) or '').replace("''", "'") or encontrado.group(2)
+        if '[' in nombre or nombre.lower() != nombre_hoja.lower():
+            return True
+    return False
+
+
+def atributos(texto):
+    return dict(_ATRIBUTO.findall(texto or ''))
+
+
+def ruta_relaciones(parte):
+    carpeta, nombre = posixpath.split(parte)
+    return posixpath.join(carpeta, '_rels', f'{nombre}.rels')
+
+
+def resolver_destino(parte, destino):
+    """Ruta dentro del zip de una relación interna de 'parte'"""
+    if destino.startswith('/'):
+        return destino[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(parte), destino))
+
+
+def xml_relaciones(relaciones):
+    filas = ''.join(
+        '<Relationship ' + ' '.join(f'{clave}={quoteattr(valor)}' for clave, valor in relacion.items()) + '/>'
+        for relacion in relaciones
+    )
+    return (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{NS_RELACIONES}">{filas}</Relationships>').encode('utf-8')
+
+
+class PaqueteOOXML:
+    """Lectura de partes y relaciones de un zip OOXML"""
+
+    def __init__(self, zip_origen):
+        self.zip = zip_origen
+        self.nombres = set(zip_origen.namelist())
+
+    def leer(self, parte):
+        return self.zip.read(parte)
+
+    def relaciones(self, parte):
+        """Relaciones de 'parte' ('' para el paquete) como lista de diccionarios"""
+        ruta = ruta_relaciones(parte)
+        if ruta not in self.nombres:
+            return []
+        return [dict(relacion.attrib) for relacion in ET.fromstring(self.zip.read(ruta))]
+
+    def tipos(self):
+        """(predeterminados {extensión: tipo}, específicos {parte: tipo})"""
+        raiz = ET.fromstring(self.zip.read(PARTE_TIPOS))
+        predeterminados = {e.get('Extension').lower(): e.get('ContentType')
+                           for e in raiz.findall(f'{{{NS_TIPOS}}}Default')}
+        especificos = {e.get('PartName').lstrip('/'): e.get('ContentType')
+                       for e in raiz.findall(f'{{{NS_TIPOS}}}Override')}
+        return predeterminados, especificos
+
+
+class ExtraccionHoja:
+    """
+    Arma el paquete de salida con una sola hoja. 'resumen' informa cuántas
+    partes, cadenas y fórmulas se copiaron o quitaron.
+    """
+
+    def __init__(self, ruta_origen, nombre_hoja):
+        self.ruta_origen = ruta_origen
+        self.nombre_hoja = nombre_hoja
+        self.partes = {}        # parte → contenido de salida
+        self.relaciones = {}    # parte → relaciones de salida
+        self.resumen = {'partes': 0, 'cadenas': 0, 'formulas_quitadas': 0, 'reglas_quitadas': 0,
+                        'nombres_quitados': 0, 'relaciones_omitidas': 0}
+
+    def guardar(self, ruta_destino):
+        with zipfile.ZipFile(self.ruta_origen) as zip_origen:
+            paquete = PaqueteOOXML(zip_origen)
+            parte_libro = self.copiar_paquete(paquete)
+            self.copiar_libro(paquete, parte_libro)
+            contenido_tipos = self.tipos_de_contenido(paquete, parte_libro)
+
+        with zipfile.ZipFile(ruta_destino, 'w', zipfile.ZIP_DEFLATED) as zip_destino:
+            zip_destino.writestr(PARTE_TIPOS, contenido_tipos)
+            for parte, relaciones in self.relaciones.items():
+                zip_destino.writestr(ruta_relaciones(parte), xml_relaciones(relaciones))
+            for parte, contenido in self.partes.items():
+                zip_destino.writestr(parte, contenido)
+        self.resumen['partes'] = len(self.partes)
+        return self.resumen
+
+    def copiar_paquete(self, paquete):
+        """Relaciones del paquete (sin complementos de macros ni cinta); devuelve la parte del libro"""
+        conservadas = [r for r in paquete.relaciones('') if r.get('Type', '').endswith(RELACIONES_PAQUETE)]
+        self.relaciones[''] = conservadas
+        parte_libro = None
+        for relacion in conservadas:
+            destino = resolver_destino('', relacion['Target'])
+            if relacion['Type'].endswith('/officeDocument'):
+                parte_libro = destino
+            else:
+                self.copiar_parte(paquete, destino)
+        if parte_libro is None:
+            raise ValueError(f"'{self.ruta_origen}' no es un libro de Excel (OOXML)")
+        return parte_libro
+
+    def copiar_parte(self, paquete, parte, contenido=None):
+        """Copia 'parte' y, recursivamente, las partes internas que relaciona"""
+        if parte in self.partes or parte not in paquete.nombres:
+            return
+        self.partes[parte] = paquete.leer(parte) if contenido is None else contenido
+        relaciones = []
+        for relacion in paquete.relaciones(parte):
+            if relacion.get('Type', '').endswith(RELACIONES_OMITIDAS):
+                self.resumen['relaciones_omitidas'] += 1
+                continue
+            relaciones.append(relacion)
+            if relacion.get('TargetMode') != 'External':
+                self.copiar_parte(paquete, resolver_destino(parte, relacion['Target']))
+        if relaciones:
+            self.relaciones[parte] = relaciones
+
+    def copiar_libro(self, paquete, parte_libro):
+        xml_libro = paquete.leer(parte_libro).decode('utf-8')
+        relaciones_libro = paquete.relaciones(parte_libro)
+        por_id = {r['Id']: r for r in relaciones_libro}
+
+        # Hoja buscada (sin distinguir mayúsculas) y su posición
+        hojas = [atributos(h) for h in re.findall(r'<sheet\b([^>]*?)/?>', xml_libro)]
+        nombres = [html.unescape(h.get('name', '')) for h in hojas]
+        indice = next((i for i, n in enumerate(nombres) if n.lower() == self.nombre_hoja.lower()), None)
+        if indice is None:
+            raise ValueError(f"No se encontró hoja '{self.nombre_hoja}'. Disponibles: {nombres}")
+        self.nombre_hoja = nombres[indice]
+        id_hoja = next(valor for clave, valor in hojas[indice].items() if clave.endswith(':id'))
+        parte_hoja = resolver_destino(parte_libro, por_id[id_hoja]['Target'])
+
+        # Relaciones del libro: estilos, tema, cadenas compartidas... y la hoja
+        conservadas = [r for r in relaciones_libro
+                       if r['Id'] == id_hoja or r.get('Type', '').endswith(RELACIONES_LIBRO)]
+        self.relaciones[parte_libro] = conservadas
+        parte_cadenas = None
+        for relacion in conservadas:
+            destino = resolver_destino(parte_libro, relacion['Target'])
+            if relacion['Type'].endswith('/sharedStrings'):
+                parte_cadenas = destino
+            elif relacion['Id'] != id_hoja:
+                self.copiar_parte(paquete, destino)
+
+        cadenas_origen = self.leer_cadenas(paquete, parte_cadenas)
+        xml_hoja, usadas, total = self.reescribir_hoja(paquete.leer(parte_hoja).decode('utf-8'), cadenas_origen)
+        self.copiar_parte(paquete, parte_hoja, xml_hoja.encode('utf-8'))
+        if parte_cadenas:
+            self.partes[parte_cadenas] = self.escribir_cadenas(paquete.leer(parte_cadenas).decode('utf-8'),
+                                                               cadenas_origen, usadas, total)
+            self.resumen['cadenas'] = len(usadas)
+
+        self.partes[parte_libro] = self.reescribir_libro(xml_libro, hojas, indice).encode('utf-8')
+
+    # --- Libro ---
+
+    def reescribir_libro(self, xml_libro, hojas, indice):
+        """workbook.xml con una sola hoja visible y sin referencias a partes omitidas"""
+        elementos = re.findall(r'<sheet\b[^>]*?/?>(?:</sheet>)?', xml_libro)
+        hoja = re.sub(r'\sstate="[^"]*"', '', elementos[indice])
+        xml_libro = re.sub(r'<sheets>.*?</sheets>', lambda _: f'<sheets>{hoja}</sheets>', xml_libro, flags=re.S)
+
+        def nombre_definido(encontrado):
+            attrs, formula = atributos(encontrado.group(1)), encontrado.group(2)
+            local = attrs.get('localSheetId')
+            if (local is not None and int(local) != indice) or referencia_otra_hoja(formula, self.nombre_hoja):
+                self.resumen['nombres_quitados'] += 1
+                return ''
+            if local is not None:
+                return encontrado.group(0).replace(f'localSheetId="{local}"', 'localSheetId="0"', 1)
+            return encontrado.group(0)
+
+        xml_libro = re.sub(r'<definedName\b([^>]*)>(.*?)</definedName>', nombre_definido, xml_libro, flags=re.S)
+        xml_libro = re.sub(r'<definedNames>\s*</definedNames>|<definedNames/>', '', xml_libro)
+        xml_libro = re.sub(r'<externalReferences>.*?</externalReferences>|<pivotCaches>.*?</pivotCaches>',
+                           '', xml_libro, flags=re.S)
+        xml_libro = quitar_extensiones(xml_libro, MARCAS_EXTENSION_LIBRO)
+        return re.sub(r'<workbookView\b[^>]*>',
+                      lambda v: re.sub(r'\s(?:activeTab|firstSheet)="\d+"', '', v.group(0)), xml_libro)
+
+    # --- Cadenas compartidas ---
+
+    def leer_cadenas(self, paquete, parte_cadenas):
+        """Elementos <si> de la tabla de cadenas compartidas, tal cual (conservan el texto enriquecido)"""
+        if not parte_cadenas or parte_cadenas not in paquete.nombres:
+            return []
+        xml_cadenas = paquete.leer(parte_cadenas).decode('utf-8')
+        return re.findall(r'<si\b[^>]*?(?:/>|>.*?</si>)', xml_cadenas, re.S)
+
+    def escribir_cadenas(self, xml_cadenas, cadenas_origen, usadas, total):
+        """Tabla de cadenas solo con las que usa la hoja, en el nuevo orden"""
+        inicio = re.search(r'<sst\b[^>]*>', xml_cadenas).group(0)
+        inicio = re.sub(r'\s(?:count|uniqueCount)="\d+"', '', inicio)
+        inicio = inicio[:-1] + f' count="{total}" uniqueCount="{len(usadas)}">'
+        prologo = xml_cadenas[:xml_cadenas.index('<sst')]
+        cuerpo = ''.join(cadenas_origen[anterior] for anterior in usadas)
+        return f'{prologo}{inicio}{cuerpo}</sst>'.encode('utf-8')
+
+    # --- Hoja ---
+
+    def reescribir_hoja(self, xml_hoja, cadenas_origen):
+        """
+        Renumera las cadenas compartidas y quita lo que apunta a otras hojas.
+        Devuelve (xml, índices anteriores de las cadenas usadas en el nuevo orden, celdas con cadena).
+        """
+        etiqueta = re.search(r'<(\w+:)?sheetData\b[^>]*?(/?)>', xml_hoja)
+        if etiqueta is None or etiqueta.group(1):
+            # Sin renumerar las celdas, la tabla de cadenas nueva no les correspondería
+            raise ValueError("La hoja no tiene el formato esperado (<sheetData> ausente o con prefijo)")
+        if etiqueta.group(2):  # hoja sin datos (<sheetData/>)
+            return self.reescribir_reglas(xml_hoja), [], 0
+        inicio_datos = etiqueta.start()
+        fin_datos = xml_hoja.find('</sheetData>', inicio_datos)
+        if fin_datos < 0:
+            raise ValueError("La hoja no tiene el formato esperado (<sheetData> sin cerrar)")
+
+        datos = xml_hoja[inicio_datos:fin_datos]
+        compartidas_quitadas = set()
+        for encontrado in _FORMULA.finditer(datos):
+            attrs = atributos(encontrado.group(1))
+            if attrs.get('t') == 'shared' and 'ref' in attrs and \
+                    referencia_otra_hoja(encontrado.group(2), self.nombre_hoja):
+                compartidas_quitadas.add(attrs.get('si'))
+
+        nuevos = {}
+        celdas_con_cadena = 0
+
+        def celda(encontrado):
+            nonlocal celdas_con_cadena
+            attrs_texto, cuerpo = encontrado.group(1), encontrado.group(2)
+            if cuerpo is None:
+                return encontrado.group(0)
+            tipo = atributos(attrs_texto).get('t')
+
+            formula = _FORMULA.search(cuerpo)
+            if formula:
+                attrs_formula = atributos(formula.group(1))
+                if referencia_otra_hoja(formula.group(2), self.nombre_hoja) or \
+                        (attrs_formula.get('t') == 'shared' and attrs_formula.get('si') in compartidas_quitadas):
+                    self.resumen['formulas_quitadas'] += 1
+                    cuerpo = cuerpo[:formula.start()] + cuerpo[formula.end():]
+                    if tipo == 'str':
+                        # Resultado de texto de una fórmula: queda como texto en la celda
+                        valor = re.search(r'<v>(.*?)</v>', cuerpo, re.S)
+                        texto = valor.group(1) if valor else ''
+                        cuerpo = f'<is><t xml:space="preserve">{texto}</t></is>'
+                        attrs_texto = attrs_texto.replace('t="str"', 't="inlineStr"')
+
+            if tipo == 's':
+                valor = re.search(r'<v>\s*(\d+)\s*</v>', cuerpo)
+                if valor and int(valor.group(1)) < len(cadenas_origen):
+                    nuevo = nuevos.setdefault(int(valor.group(1)), len(nuevos))
+                    celdas_con_cadena += 1
+                    cuerpo = f'{cuerpo[:valor.start()]}<v>{nuevo}</v>{cuerpo[valor.end():]}'
+            return f'<c{attrs_texto}>{cuerpo}</c>'
+
+        datos = _CELDA.sub(celda, datos)
+        if not nuevos and cadenas_origen and re.search(r'<(?:\w+:)?c\b[^>]*\bt="s"', datos):
+            raise ValueError("No se pudieron renumerar las celdas con cadenas compartidas de la hoja")
+        xml_hoja = xml_hoja[:inicio_datos] + datos + xml_hoja[fin_datos:]
+        usadas = sorted(nuevos, key=nuevos.get)
+        return self.reescribir_reglas(xml_hoja), usadas, celdas_con_cadena
+
+    def reescribir_reglas(self, xml_hoja):
+        """Quita validaciones y formatos condicionales que usan otras hojas, y las segmentaciones"""
+        def bloque(encontrado):
+            textos = re.findall(r'>([^<]+)<', encontrado.group(0))
+            if any(referencia_otra_hoja(texto, self.nombre_hoja) for texto in textos):
+                self.resumen['reglas_quitadas'] += 1
+                return ''
+            return encontrado.group(0)
+
+        for etiqueta in ('dataValidation', 'x14:dataValidation', 'conditionalFormatting',
+                         'x14:conditionalFormatting'):
+            patron = rf'<{etiqueta}\b[^>]*?(?:/>|>.*?</{etiqueta}>)'
+            xml_hoja = re.sub(patron, bloque, xml_hoja, flags=re.S)
+
+        # Contenedores de validaciones con el conteo actualizado (o sin ellos si quedaron vacíos)
+        for etiqueta in ('dataValidations', 'x14:dataValidations'):
+            def contenedor(encontrado, etiqueta=etiqueta):
+                cantidad = len(re.findall(rf'<{etiqueta[:-1]}\b', encontrado.group(2)))
+                if not cantidad:
+                    return ''
+                inicio = re.sub(r'\scount="\d+"', f' count="{cantidad}"', encontrado.group(1))
+                return f'{inicio}{encontrado.group(2)}</{etiqueta}>'
+            xml_hoja = re.sub(rf'(<{etiqueta}\b[^>]*>)(.*?)</{etiqueta}>', contenedor, xml_hoja, flags=re.S)
+
+        return quitar_extensiones(xml_hoja, MARCAS_EXTENSION_HOJA)
+
+    # --- Tipos de contenido ---
+
+    def tipos_de_contenido(self, paquete, parte_libro):
+        """[Content_Types].xml de las partes copiadas, con el libro como .xlsx"""
+        predeterminados, especificos = paquete.tipos()
+        predeterminados = {extension: tipo for extension, tipo in predeterminados.items()
+                           if 'vbaProject' not in tipo}
+        filas = [f'<Default Extension={quoteattr(extension)} ContentType={quoteattr(tipo)}/>'
+                 for extension, tipo in predeterminados.items()]
+        for parte in self.partes:
+            tipo = especificos.get(parte)
+            if parte == parte_libro:
+                tipo = TIPO_LIBRO_XLSX
+            elif tipo is None and posixpath.splitext(parte)[1][1:].lower() not in predeterminados:
+                if 'printerSettings' not in parte:
+                    raise ValueError(f"Tipo de contenido desconocido para '{parte}'")
+                tipo = TIPO_CONFIGURACION_IMPRESION
+            if tipo:
+                filas.append(f'<Override PartName={quoteattr("/" + parte)} ContentType={quoteattr(tipo)}/>')
+        return (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<Types xmlns="{NS_TIPOS}">{"".join(filas)}</Types>').encode('utf-8')
+
+
+def quitar_extensiones(xml, marcas):
+    """Quita los <ext> que contienen alguna de 'marcas' y los <extLst> que quedan vacíos"""
+    xml = re.sub(r'<ext\b[^>]*?(?:/>|>.*?</ext>)',
+                 lambda e: '' if any(marca in e.group(0) for marca in marcas) else e.group(0), xml, flags=re.S)
+    xml = re.sub(r'<ext\b[^>]*>\s*</ext>', '', xml)
+    return re.sub(r'<extLst>\s*</extLst>', '', xml)
+
+
+def extraer_hoja(ruta_origen, ruta_destino, nombre_hoja):
+    """
+    Crea 'ruta_destino' (.xlsx) solo con la hoja 'nombre_hoja' de 'ruta_origen',
+    con su formato, imágenes y gráficos. Devuelve el resumen de la extracción.
+    """
+    return ExtraccionHoja(ruta_origen, nombre_hoja).guardar(ruta_destino)
+
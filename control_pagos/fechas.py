@@ -0,0 +1,147 @@
+"""
+Normalización de la columna de fechas de Control_Pagos
+
+La columna llega como texto y mezcla fechas reales de Excel ('2026-02-04 00:00:00'),
+fechas digitadas ('04/02/2026') y números de serie de Excel ('46057'). Cada valor
+se clasifica por su forma y cada grupo se convierte con un formato fijo, sin que
+pandas tenga que adivinar el formato elemento por elemento.
+"""
+
+import re
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# (nombre, expresión, formato); formato None = número de serie de Excel
+FORMAS_FECHA = [
+    ('iso_hora', r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', '%Y-%m-%d %H:%M:%S'),
+    ('iso_hora_fraccion', r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{1,6}', '%Y-%m-%d %H:%M:%S.%f'),
+    ('iso', r'\d{4}-\d{2}-\d{2}', '%Y-%m-%d'),
+    ('dia_mes_año', r'\d{1,2}/\d{1,2}/\d{4}', '%d/%m/%Y'),
+    ('dia_mes_año_hora', r'\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}:\d{2}', '%d/%m/%Y %H:%M:%S'),
+    ('dia_mes_año_guion', r'\d{1,2}-\d{1,2}-\d{4}', '%d-%m-%Y'),
+    ('dia_mes_año_punto', r'\d{1,2}\.\d{1,2}\.\d{4}', '%d.%m.%Y'),
+    ('dia_mes_año_corto', r'\d{1,2}/\d{1,2}/\d{2}', '%d/%m/%y'),
+    ('serial', r'\d{1,7}(?:\.\d+)?', None),
+]
+
+# Origen de los números de serie (sistema 1900) y rango válido (1900-01-01 a 9999-12-31)
+ORIGEN_SERIAL = '1899-12-30'
+SERIAL_MINIMO = 1
+SERIAL_MAXIMO = 2958465
+UNIDAD_FECHAS = 'datetime64[us]'
+TAMAÑO_MUESTRA = 5
+
+_COMPILADAS = {expresion: re.compile(expresion) for _, expresion, _ in FORMAS_FECHA}
+
+
+def serial_a_fecha(serial):
+    """Número de serie de Excel (sistema 1900) a datetime; fuera de rango → None"""
+    if not SERIAL_MINIMO <= serial <= SERIAL_MAXIMO:
+        return None
+    # Excel cuenta el 29/02/1900, que no existe: antes de esa fecha se corre un día
+    if serial < 61:
+        serial += 1
+    return datetime(1899, 12, 30) + timedelta(days=serial)
+
+
+def fecha_de_valor(valor):
+    """
+    Fecha y hora (datetime) de una celda con los mismos criterios de
+    normalizar_fechas; si no se puede interpretar, None
+    """
+    if isinstance(valor, datetime):
+        return valor
+    if isinstance(valor, date):
+        return datetime(valor.year, valor.month, valor.day)
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return serial_a_fecha(valor)
+    if isinstance(valor, str):
+        texto = valor.strip()
+        for _, expresion, formato in FORMAS_FECHA:
+            if not _COMPILADAS[expresion].fullmatch(texto):
+                continue
+            if formato is None:
+                return serial_a_fecha(float(texto))
+            try:
+                return datetime.strptime(texto, formato)
+            except ValueError:
+                return None
+    return None
+
+
+def _convertir_seriales(texto):
+    numeros = pd.to_numeric(texto, errors='coerce')
+    numeros = numeros.where((numeros >= SERIAL_MINIMO) & (numeros <= SERIAL_MAXIMO))
+    numeros = numeros.where(numeros >= 61, numeros + 1)
+    fechas = pd.to_datetime(numeros, unit='D', origin=ORIGEN_SERIAL, errors='coerce')
+    return fechas.dt.round('ms')
+
+
+def _clasificar_unicos(unicos):
+    """Fecha y forma de cada valor distinto (Series object sin nulos)"""
+    fechas = pd.Series(pd.NaT, index=unicos.index, dtype=UNIDAD_FECHAS)
+    formas = pd.Series('no_interpretables', index=unicos.index, dtype=object)
+
+    # Fechas ya tipadas (datetime / date) dentro de una columna object
+    es_fecha = unicos.map(lambda v: isinstance(v, (datetime, date))).astype(bool)
+    if es_fecha.any():
+        fechas[es_fecha] = pd.to_datetime(unicos[es_fecha].map(fecha_de_valor)).astype(UNIDAD_FECHAS)
+        formas[es_fecha] = 'fecha'
+
+    texto = unicos[~es_fecha].astype(str).str.strip()
+    vacios = texto == ''
+    formas[vacios[vacios].index] = 'vacios'
+    texto = texto[~vacios]
+
+    for nombre, expresion, formato in FORMAS_FECHA:
+        if texto.empty:
+            break
+        coincide = texto.str.fullmatch(expresion).astype(bool)
+        if not coincide.any():
+            continue
+        grupo = texto[coincide]
+        if formato is None:
+            convertidas = _convertir_seriales(grupo)
+        else:
+            convertidas = pd.to_datetime(grupo, format=formato, errors='coerce')
+        convertidas = convertidas.astype(UNIDAD_FECHAS)
+        fechas[grupo.index] = convertidas
+        formas[grupo.index[convertidas.notna().to_numpy()]] = nombre
+        texto = texto[~coincide]
+
+    return fechas, formas
+
+
+def normalizar_fechas(serie):
+    """
+    Convierte una columna de fechas mixta a datetime64.
+    Devuelve (serie convertida, conteos) donde conteos tiene la cantidad de
+    valores de cada forma, 'fecha' (ya eran fechas), 'vacios',
+    'no_interpretables' y una 'muestra' de estos últimos.
+    Cada valor distinto se interpreta una sola vez (las fechas se repiten mucho).
+    """
+    conteos = {nombre: 0 for nombre, _, _ in FORMAS_FECHA}
+    conteos.update(fecha=0, vacios=0, no_interpretables=0, muestra=[])
+
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        conteos.update(fecha=int(serie.notna().sum()), vacios=int(serie.isna().sum()))
+        return serie.astype(UNIDAD_FECHAS), conteos
+
+    codigos, unicos = pd.factorize(serie)
+    unicos = pd.Series(np.asarray(unicos, dtype=object))
+    fechas, formas = _clasificar_unicos(unicos)
+
+    # Valores nulos: código -1, se leen como NaT
+    fechas_valores = np.append(fechas.to_numpy(), np.datetime64('NaT', 'us'))
+    resultado = pd.Series(fechas_valores[codigos], index=serie.index, dtype=UNIDAD_FECHAS)
+
+    repeticiones = pd.Series(np.bincount(codigos[codigos >= 0], minlength=len(unicos)))
+    for forma, cantidad in repeticiones.groupby(formas.to_numpy()).sum().items():
+        conteos[forma] = int(cantidad)
+    conteos['vacios'] += int((codigos < 0).sum())
+    conteos['muestra'] = unicos[formas == 'no_interpretables'].astype(str).tolist()[:TAMAÑO_MUESTRA]
+    return resultado, conteos
@@ -0,0 +1,253 @@
+"""
+Historial local de los registros del archivo final
+
+Cada anexo a CONTROL PAGOS.xlsx también guarda sus registros (las columnas de
+preparar_df_final) en un SQLite local, indexado por año y mes. Consultas como
+"¿cuánto se le pagó al proveedor X en 2025?" se responden con totales() sin
+abrir el Excel. reconstruir() vuelve a llenar el historial recorriendo una vez
+el archivo final.
+
+    python -m control_pagos --reconstruir-historial
+    python -m control_pagos --totales proveedor moneda --desde 2025-01-01 --hasta 2025-12-31
+"""
+
+import re
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+
+from control_pagos.anexo_ooxml import HOJAS_DESTINO
+from control_pagos.indice_duplicados import COLUMNAS_CLAVE, leer_registros
+
+VERSION_HISTORIAL = 1
+FILAS_POR_LOTE = 10000
+
+# (columna del archivo final, columna del historial, tipo)
+COLUMNAS_HISTORIAL = [
+    ('IMPORTADOR', 'importador', 'TEXT'),
+    ('MARCA', 'marca', 'TEXT'),
+    ('FECHA DE PAGO', 'fecha_pago', 'FECHA'),
+    ('DIA', 'dia', 'INTEGER'),
+    ('MES', 'mes', 'INTEGER'),
+    ('AÑO', 'anio', 'INTEGER'),
+    ('PROVEEDOR', 'proveedor', 'TEXT'),
+    ('# IMPORTACION', 'importacion', 'TEXT'),
+    ('VALOR MONEDA ORIGEN', 'valor_origen', 'REAL'),
+    ('MONEDA', 'moneda', 'TEXT'),
+    ('VALOR USD', 'valor_usd', 'REAL'),
+    ('FACTOR DE CONVERSION', 'factor_conversion', 'REAL'),
+    ('DESCUENTO PRONTO PAGO', 'descuento_pronto_pago', 'REAL'),
+    ('FORMA DE PAGO', 'forma_pago', 'TEXT'),
+    ('TIPO DE PAGO', 'tipo_pago', 'TEXT'),
+    ('FECHA DE APERTURA CREDITO -UTILIZACION LC', 'fecha_apertura_credito', 'TEXT'),
+    ('FECHA DE VENCIMIENTO', 'fecha_vencimiento', 'TEXT'),
+    ('# CREDITO', 'credito', 'TEXT'),
+    ('# DEUDA EXTERNA', 'deuda_externa', 'TEXT'),
+    ('NOTA CREDITO', 'nota_credito', 'REAL'),
+    ('OBSERVACIONES', 'observaciones', 'TEXT'),
+]
+
+# Agrupaciones y filtros de totales()
+AGRUPACIONES = {
+    'importador': 'importador',
+    'marca': 'marca',
+    'proveedor': 'proveedor',
+    'moneda': 'moneda',
+    'anio': 'anio',
+    'mes': 'mes',
+    'periodo': "substr(fecha_pago, 1, 7)",  # aaaa-mm
+}
+FILTROS = ('importador', 'marca', 'proveedor', 'moneda')
+
+_FECHA_TEXTO = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+
+
+def vacio(valor):
+    return valor is None or (isinstance(valor, str) and not valor.strip()) \
+        or (not isinstance(valor, str) and valor != valor)  # NaN, NaT
+
+
+def a_fecha(valor):
+    """Fecha ISO (aaaa-mm-dd) de una fecha o un texto 'dd/mm/aaaa'; None si no es fecha"""
+    if isinstance(valor, (datetime, date)):
+        return valor.strftime('%Y-%m-%d')
+    encontrado = _FECHA_TEXTO.match(str(valor).strip())
+    if encontrado:
+        return f"{encontrado.group(3)}-{int(encontrado.group(2)):02d}-{int(encontrado.group(1)):02d}"
+    return None
+
+
+def a_numero(valor):
+    try:
+        return float(str(valor).replace(',', '')) if isinstance(valor, str) else float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def convertir(valor, tipo):
+    """Valor del archivo final o de preparar_df_final → valor para SQLite"""
+    if vacio(valor):
+        return None
+    if tipo == 'FECHA':
+        return a_fecha(valor)
+    if tipo == 'REAL':
+        return a_numero(valor)
+    if tipo == 'INTEGER':
+        numero = a_numero(valor)
+        return int(numero) if numero is not None else None
+    if isinstance(valor, (datetime, date)):
+        return valor.strftime('%Y-%m-%d')
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))  # '# IMPORTACION' que Excel guardó como número
+    return str(valor).strip()
+
+
+def estado_archivo(ruta_final):
+    """Versión del historial, tamaño y mtime del archivo final (como textos para 'meta')"""
+    estado = Path(ruta_final).stat()
+    return {'version': str(VERSION_HISTORIAL), 'tamaño': str(estado.st_size), 'mtime': str(estado.st_mtime_ns)}
+
+
+def fila_historial(valores):
+    """Valores en el orden de COLUMNAS_HISTORIAL; año y mes salen de la fecha si faltan"""
+    fila = [convertir(valor, tipo) for valor, (_, _, tipo) in zip(valores, COLUMNAS_HISTORIAL)]
+    fecha = fila[2]
+    if fecha:
+        for posicion, desde, hasta in ((3, 8, 10), (4, 5, 7), (5, 0, 4)):
+            if fila[posicion] is None:
+                fila[posicion] = int(fecha[desde:hasta])
+    return fila
+
+
+class HistorialPagos:
+    """SQLite con una fila por registro anexado al archivo final"""
+
+    def __init__(self, ruta, log=None):
+        self.ruta = Path(ruta)
+        self.log = log or (lambda mensaje, tipo="INFO": None)
+        self._conexion = None
+
+    @property
+    def conexion(self):
+        if self._conexion is None:
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            self._conexion = sqlite3.connect(self.ruta)
+            definicion = ', '.join(
+                f"{columna} {'TEXT' if tipo == 'FECHA' else tipo}{' COLLATE NOCASE' if tipo == 'TEXT' else ''}"
+                for _, columna, tipo in COLUMNAS_HISTORIAL
+            )
+            self._conexion.executescript(
+                f"CREATE TABLE IF NOT EXISTS pagos ({definicion});"
+                "CREATE INDEX IF NOT EXISTS pagos_periodo ON pagos (anio, mes);"
+                "CREATE INDEX IF NOT EXISTS pagos_proveedor ON pagos (proveedor);"
+                "CREATE INDEX IF NOT EXISTS pagos_importador ON pagos (importador);"
+                "CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT);"
+            )
+        return self._conexion
+
+    def cerrar(self):
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+    # --- Escritura ---
+
+    def insertar(self, filas):
+        marcas = ', '.join('?' * len(COLUMNAS_HISTORIAL))
+        self.conexion.executemany(f"INSERT INTO pagos VALUES ({marcas})", filas)
+
+    def registrar(self, df, ruta_final=None, estado_anterior=None):
+        """
+        Agrega los registros de un DataFrame de preparar_df_final. Devuelve
+        cuántos. Si el historial estaba al día con 'estado_anterior' (el archivo
+        final antes del anexo), queda al día con 'ruta_final'.
+        """
+        columnas = [columna for columna, _, _ in COLUMNAS_HISTORIAL]
+        df = df.reindex(columns=columnas)
+        filas = [fila_historial(valores) for valores in df.itertuples(index=False)]
+        with self.conexion:
+            al_dia = estado_anterior is not None and self.meta() == estado_anterior
+            self.insertar(filas)
+            if ruta_final and al_dia:
+                self.guardar_estado(ruta_final)
+        return len(filas)
+
+    def reconstruir(self, ruta_final, hojas_destino=HOJAS_DESTINO):
+        """
+        Reemplaza el historial por los registros del archivo final, leído una
+        sola vez por filas. Si falla, el historial anterior queda intacto.
+        """
+        self.log(f"Reconstruyendo historial desde {Path(ruta_final).name}...", "PROCESO")
+        columnas = [columna for columna, _, _ in COLUMNAS_HISTORIAL]
+        total = 0
+        with self.conexion:
+            self.conexion.execute("DELETE FROM pagos")
+            lote = []
+            for valores in leer_registros(ruta_final, columnas, obligatorias=COLUMNAS_CLAVE,
+                                          hojas_destino=hojas_destino):
+                lote.append(fila_historial(valores))
+                if len(lote) >= FILAS_POR_LOTE:
+                    self.insertar(lote)
+                    total += len(lote)
+                    lote = []
+            self.insertar(lote)
+            total += len(lote)
+            self.guardar_estado(ruta_final)
+        self.log(f"Historial reconstruido ({total} registros)", "OK")
+        return total
+
+    # --- Vigencia ---
+
+    def guardar_estado(self, ruta_final):
+        """Anota el tamaño y mtime del archivo final con el que coincide el historial"""
+        self.conexion.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", estado_archivo(ruta_final).items())
+
+    def meta(self):
+        return dict(self.conexion.execute("SELECT clave, valor FROM meta"))
+
+    def vigente(self, ruta_final):
+        """¿El historial corresponde al archivo final tal como está ahora?"""
+        return self.meta() == estado_archivo(ruta_final)
+
+    # --- Consultas ---
+
+    def totales(self, por=('proveedor', 'moneda'), desde=None, hasta=None, **filtros):
+        """
+        Registros, valor en moneda de origen y valor USD agrupados por 'por'
+        (ver AGRUPACIONES). 'desde'/'hasta' limitan la fecha de pago (inclusive);
+        'filtros' admite importador, marca, proveedor y moneda (sin distinguir mayúsculas).
+        """
+        por = [por] if isinstance(por, str) else list(por)
+        desconocidas = [campo for campo in por if campo not in AGRUPACIONES]
+        desconocidos = [campo for campo in filtros if campo not in FILTROS]
+        if desconocidas or desconocidos:
+            raise ValueError(f"No se puede agrupar/filtrar por {desconocidas + desconocidos}. "
+                             f"Agrupaciones: {list(AGRUPACIONES)}; filtros: {list(FILTROS)}")
+
+        condiciones, parametros = [], []
+        for campo, valor in filtros.items():
+            if valor is not None:
+                condiciones.append(f"{campo} = ?")
+                parametros.append(valor)
+        for operador, fecha in (('>=', desde), ('<=', hasta)):
+            if fecha is not None:
+                condiciones.append(f"fecha_pago {operador} ?")
+                parametros.append(a_fecha(fecha) or str(fecha))
+
+        campos = [f"{AGRUPACIONES[campo]} AS {campo}" for campo in por]
+        consulta = (
+            f"SELECT {', '.join(campos + ['COUNT(*) AS registros', 'SUM(valor_origen) AS valor_origen', 'SUM(valor_usd) AS valor_usd'])} "
+            f"FROM pagos"
+            + (f" WHERE {' AND '.join(condiciones)}" if condiciones else "")
+            + (f" GROUP BY {', '.join(por)} ORDER BY {', '.join(por)}" if por else "")
+        )
+        return pd.read_sql_query(consulta, self.conexion, params=parametros)
@@ -0,0 +1,201 @@
+"""
+Índice de registros ya anexados al archivo final
+
+Guarda en un SQLite junto a CONTROL PAGOS.xlsx la huella (hash) de cada
+registro: importador, proveedor, importación, fecha de pago, valor y moneda.
+Antes de anexar solo se consultan las filas nuevas, sin volver a leer el
+archivo final; así, repetir una fecha o reintentar una ejecución no duplica
+registros.
+
+El índice anota el tamaño y la fecha de modificación del archivo final después
+de cada anexo. Si no coinciden (el archivo se editó a mano o desde otro equipo),
+se reconstruye leyendo el archivo final una vez.
+"""
+
+import hashlib
+import re
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+
+from control_pagos.anexo_ooxml import HOJAS_DESTINO
+
+COLUMNAS_CLAVE = ('IMPORTADOR', 'PROVEEDOR', '# IMPORTACION', 'FECHA DE PAGO', 'VALOR MONEDA ORIGEN', 'MONEDA')
+VERSION_INDICE = 1
+TAMAÑO_CONSULTA = 500  # huellas por SELECT ... IN (...)
+FILAS_ENCABEZADO = 20  # filas donde se busca el encabezado al reconstruir
+
+_FECHA_TEXTO = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+
+
+def normalizar_valor(valor):
+    """
+    Texto comparable de un valor, lo lea Excel o venga de preparar_df_final:
+    fechas (o 'dd/mm/aaaa') como aaaa-mm-dd, números con 2 decimales (también
+    los textos numéricos, que Excel convierte al escribirlos) y textos en mayúscula.
+    """
+    if valor is None or (not isinstance(valor, str) and valor != valor):  # None, NaN, NaT
+        return ''
+    if isinstance(valor, (datetime, date)):
+        return valor.strftime('%Y-%m-%d')
+    if isinstance(valor, str):
+        texto = valor.strip()
+        fecha = _FECHA_TEXTO.match(texto)
+        if fecha:
+            return f"{fecha.group(3)}-{int(fecha.group(2)):02d}-{int(fecha.group(1)):02d}"
+        try:
+            valor = float(texto.replace(',', '')) if texto else None
+        except ValueError:
+            return texto.upper()
+        if valor is None:
+            return ''
+    try:
+        return f"{float(valor):.2f}"
+    except (TypeError, ValueError):
+        return str(valor).strip().upper()
+
+
+def huella_registro(valores):
+    """Hash de 16 bytes de los valores de COLUMNAS_CLAVE (en ese orden)"""
+    texto = '\x1f'.join(normalizar_valor(valor) for valor in valores)
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).digest()
+
+
+def ruta_indice_de(ruta_final):
+    """'CONTROL PAGOS.xlsx' → 'CONTROL PAGOS.indice.sqlite' en la misma carpeta"""
+    ruta_final = Path(ruta_final)
+    return ruta_final.with_name(f"{ruta_final.stem}.indice.sqlite")
+
+
+def leer_registros(ruta_final, columnas, obligatorias=None, hojas_destino=HOJAS_DESTINO):
+    """
+    Recorre la hoja de registros del archivo final (openpyxl, solo lectura) y
+    devuelve, fila por fila, los valores de 'columnas' (None si la columna no
+    está). El encabezado se busca en las primeras filas y debe tener todas las
+    'obligatorias' (por defecto, todas las columnas).
+    """
+    from openpyxl import load_workbook
+
+    obligatorias = columnas if obligatorias is None else obligatorias
+    wb = load_workbook(ruta_final, read_only=True, data_only=True)
+    try:
+        nombres = {nombre.lower(): nombre for nombre in wb.sheetnames}
+        hoja = next((nombres[n] for n in hojas_destino if n in nombres), None)
+        ws = wb[hoja] if hoja else wb.active
+        filas = ws.iter_rows(values_only=True)
+
+        posiciones = None
+        for _, fila in zip(range(FILAS_ENCABEZADO), filas):
+            encabezado = [str(valor).strip().upper() if valor is not None else '' for valor in fila]
+            if all(columna in encabezado for columna in obligatorias):
+                posiciones = [encabezado.index(columna) if columna in encabezado else None for columna in columnas]
+                break
+        if posiciones is None:
+            raise ValueError(f"No se encontró el encabezado {list(obligatorias)} en '{ws.title}'")
+
+        for fila in filas:
+            valores = [fila[i] if i is not None and i < len(fila) else None for i in posiciones]
+            if any(valor not in (None, '') for valor in valores):
+                yield valores
+    finally:
+        wb.close()
+
+
+class IndiceDuplicados:
+    """Conjunto persistente de huellas de los registros del archivo final"""
+
+    def __init__(self, ruta_final, ruta_indice=None, hojas_destino=HOJAS_DESTINO, log=None):
+        self.ruta_final = Path(ruta_final)
+        self.ruta_indice = Path(ruta_indice) if ruta_indice else ruta_indice_de(ruta_final)
+        self.hojas_destino = hojas_destino
+        self.log = log or (lambda mensaje, tipo="INFO": None)
+        self._conexion = None
+
+    @property
+    def conexion(self):
+        if self._conexion is None:
+            self._conexion = sqlite3.connect(self.ruta_indice)
+            self._conexion.executescript(
+                "CREATE TABLE IF NOT EXISTS huellas (huella BLOB PRIMARY KEY) WITHOUT ROWID;"
+                "CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT);"
+            )
+        return self._conexion
+
+    def cerrar(self):
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+    # --- Vigencia ---
+
+    def estado_final(self):
+        """Versión del índice, tamaño y mtime del archivo final (como textos para 'meta')"""
+        estado = self.ruta_final.stat()
+        return {'version': str(VERSION_INDICE), 'tamaño': str(estado.st_size), 'mtime': str(estado.st_mtime_ns)}
+
+    def vigente(self):
+        """¿El índice corresponde al archivo final tal como está ahora?"""
+        meta = dict(self.conexion.execute("SELECT clave, valor FROM meta"))
+        return all(meta.get(clave) == valor for clave, valor in self.estado_final().items())
+
+    def preparar(self):
+        """Reconstruye el índice si no está al día con el archivo final"""
+        if not self.vigente():
+            self.reconstruir()
+
+    def reconstruir(self):
+        """Lee el archivo final completo y vuelve a llenar el índice. Devuelve la cantidad de registros"""
+        self.log(f"Reconstruyendo índice de registros de {self.ruta_final.name}...", "PROCESO")
+        huellas = {huella_registro(valores) for valores in self.leer_registros_final()}
+        with self.conexion:
+            self.conexion.execute("DELETE FROM huellas")
+            self.conexion.executemany("INSERT INTO huellas VALUES (?)", ((huella,) for huella in huellas))
+            self.guardar_estado()
+        self.log(f"Índice reconstruido ({len(huellas)} registros)", "OK")
+        return len(huellas)
+
+    def leer_registros_final(self):
+        """Valores de COLUMNAS_CLAVE de cada fila del archivo final"""
+        return leer_registros(self.ruta_final, COLUMNAS_CLAVE, hojas_destino=self.hojas_destino)
+
+    def guardar_estado(self):
+        self.conexion.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", self.estado_final().items())
+
+    # --- Consulta y registro ---
+
+    def huellas_df(self, df):
+        return [huella_registro(valores) for valores in df[list(COLUMNAS_CLAVE)].itertuples(index=False)]
+
+    def existentes(self, huellas):
+        """Subconjunto de 'huellas' que ya está en el índice"""
+        encontradas = set()
+        unicas = list(set(huellas))
+        for inicio in range(0, len(unicas), TAMAÑO_CONSULTA):
+            bloque = unicas[inicio:inicio + TAMAÑO_CONSULTA]
+            marcas = ','.join('?' * len(bloque))
+            encontradas.update(fila[0] for fila in self.conexion.execute(
+                f"SELECT huella FROM huellas WHERE huella IN ({marcas})", bloque))
+        return encontradas
+
+    def separar(self, df):
+        """(registros nuevos, registros ya anexados) de un DataFrame de preparar_df_final"""
+        huellas = self.huellas_df(df)
+        existentes = self.existentes(huellas)
+        repetidos = np.array([huella in existentes for huella in huellas], dtype=bool)
+        return df[~repetidos], df[repetidos]
+
+    def registrar(self, df):
+        """Agrega al índice los registros recién anexados y anota el estado del archivo final"""
+        with self.conexion:
+            self.conexion.executemany("INSERT OR IGNORE INTO huellas VALUES (?)",
+                                      ((huella,) for huella in self.huellas_df(df)))
+            self.guardar_estado()
@@ -0,0 +1,560 @@
+"""
+Lector por streaming de la hoja Control_Pagos
+
+Recorre el XML de la hoja dentro del .xlsx por bloques de filas, resuelve el
+encabezado una vez (alias de columnas y columna de fecha) y convierte
+únicamente las celdas de las columnas que usa el proceso. Los valores se
+entregan igual que pd.read_excel(dtype=str), pero sin cargar el resto de la
+hoja en memoria.
+"""
+
+import posixpath
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from datetime import datetime, timedelta
+
+import pandas as pd
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+
+from control_pagos.esquema import (  # noqa: F401 (nombres usados desde este módulo)
+    COLUMNAS_NUMERICAS,
+    COLUMNAS_REQUERIDAS,
+    MAPEO_COLUMNAS,
+    POSIBLES_COLUMNAS_FECHA,
+    Encabezado,
+    nombre_estandar,
+)
+from control_pagos.fechas import UNIDAD_FECHAS, fecha_de_valor
+
+# Textos que pd.read_excel interpreta como vacíos por defecto
+TEXTOS_NULOS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a',
+    'nan', 'null',
+}
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+_V = f'{{{NS_MAIN}}}v'
+_T = f'{{{NS_MAIN}}}t'
+_R = f'{{{NS_MAIN}}}r'
+_IS = f'{{{NS_MAIN}}}is'
+
+TAMAÑO_BLOQUE = 256 * 1024
+_FIN_FILA = b'</row>'
+_RE_XMLNS = re.compile(rb'\sxmlns(?::\w+)?="[^"]*"')
+TAMAÑO_BLOQUE_ENCABEZADO = 16 * 1024
+
+
+def resolver_encabezado(encabezado, columnas=None):
+    """
+    Resuelve la fila de encabezado.
+    Devuelve (posiciones {columna estándar: índice}, columna de fecha o None).
+    Si un nombre aparece dos veces se usa la primera aparición.
+    """
+    resuelto = Encabezado(encabezado)
+    return resuelto.seleccion(columnas), resuelto.col_fecha
+
+
+def letras_a_indice(letras):
+    """'A' → 0, 'Z' → 25, 'AA' → 26"""
+    indice = 0
+    for letra in letras:
+        indice = indice * 26 + (ord(letra) - 64)
+    return indice - 1
+
+
+def _texto_rico(elemento):
+    """Texto de un <si> o <is>, sin las guías fonéticas (<rPh>)"""
+    t = elemento.find(_T)
+    if t is not None:
+        return t.text or ''
+    return ''.join(
+        (t.text or '') for r in elemento.findall(_R) for t in r.findall(_T)
+    )
+
+
+class ContextoCeldas:
+    """
+    Datos del libro necesarios para convertir celdas: textos compartidos,
+    estilos con formato de fecha y calendario (1900/1904). Se puede enviar a
+    otros procesos.
+    """
+
+    def __init__(self, textos, estilos_fecha, fecha_1904=False):
+        self.textos = textos
+        self.estilos_fecha = estilos_fecha
+        self.fecha_1904 = fecha_1904
+
+    def valor(self, celda):
+        """Valor de una celda <c> como lo entrega openpyxl (data_only)"""
+        tipo = celda.get('t')
+        if tipo == 'inlineStr':
+            elemento = celda.find(_IS)
+            return _texto_rico(elemento) if elemento is not None else None
+
+        v = celda.find(_V)
+        if v is None or v.text is None:
+            return None
+        texto = v.text
+
+        if tipo == 's':
+            return self.textos[int(texto)]
+        if tipo == 'str':
+            return texto
+        if tipo == 'b':
+            return texto == '1'
+        if tipo == 'e':
+            return None
+        if tipo == 'd':
+            return from_ISO8601(texto)
+
+        numero = float(texto) if ('.' in texto or 'E' in texto or 'e' in texto) else int(texto)
+        estilo = celda.get('s')
+        if estilo is not None and int(estilo) in self.estilos_fecha:
+            epoca = CALENDAR_MAC_1904 if self.fecha_1904 else CALENDAR_WINDOWS_1900
+            try:
+                return from_excel(numero, epoca)
+            except (OverflowError, ValueError):
+                return numero
+        return numero
+
+
+class LibroXlsx:
+    """Acceso de solo lectura a las partes de un .xlsx sin cargar el libro completo"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.zip = zipfile.ZipFile(ruta)
+        self._contexto = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.zip.close()
+
+    def _leer_xml(self, parte):
+        try:
+            return ET.fromstring(self.zip.read(parte))
+        except KeyError:
+            return None
+
+    def _relaciones(self, parte):
+        carpeta, nombre = posixpath.split(parte)
+        raiz = self._leer_xml(posixpath.join(carpeta, '_rels', f'{nombre}.rels'))
+        relaciones = {}
+        if raiz is not None:
+            for rel in raiz.iter(f'{{{NS_PKG}}}Relationship'):
+                destino = rel.get('Target', '')
+                if destino.startswith('/'):
+                    destino = destino.lstrip('/')
+                else:
+                    destino = posixpath.normpath(posixpath.join(carpeta, destino))
+                relaciones[rel.get('Id')] = (rel.get('Type', ''), destino)
+        return relaciones
+
+    def _parte_libro(self):
+        for tipo, destino in self._relaciones('').values():
+            if tipo.endswith('/officeDocument'):
+                return destino
+        return 'xl/workbook.xml'
+
+    def hojas(self):
+        """{nombre de hoja: parte XML}"""
+        parte_libro = self._parte_libro()
+        relaciones = self._relaciones(parte_libro)
+        raiz = self._leer_xml(parte_libro)
+        hojas = {}
+        for hoja in raiz.iter(f'{{{NS_MAIN}}}sheet'):
+            rel = relaciones.get(hoja.get(f'{{{NS_REL}}}id'))
+            if rel:
+                hojas[hoja.get('name')] = rel[1]
+        return hojas
+
+    def parte_hoja(self, nombre_hoja):
+        """Parte XML de la hoja (nombre exacto o sin distinguir mayúsculas)"""
+        hojas = self.hojas()
+        if nombre_hoja in hojas:
+            return hojas[nombre_hoja]
+        for nombre, parte in hojas.items():
+            if nombre.lower() == nombre_hoja.lower():
+                return parte
+        raise ValueError(f"No se encontró hoja '{nombre_hoja}'. Disponibles: {list(hojas)}")
+
+    def contexto(self):
+        """Textos compartidos, estilos de fecha y calendario (se cargan una vez)"""
+        if self._contexto is None:
+            self._contexto = ContextoCeldas(
+                self._textos_compartidos(), self._estilos_fecha(), self._fecha_1904()
+            )
+        return self._contexto
+
+    def _textos_compartidos(self, hasta=None):
+        """Textos compartidos (solo hasta el índice 'hasta', si se indica)"""
+        parte = next(
+            (destino for tipo, destino in self._relaciones(self._parte_libro()).values()
+             if tipo.endswith('/sharedStrings')),
+            None
+        )
+        if parte is None or parte not in self.zip.namelist():
+            return []
+        textos = []
+        with self.zip.open(parte) as archivo:
+            for _, elemento in ET.iterparse(archivo):
+                if elemento.tag == f'{{{NS_MAIN}}}si':
+                    textos.append(_texto_rico(elemento))
+                    elemento.clear()
+                    if hasta is not None and len(textos) > hasta:
+                        break
+        return textos
+
+    def _estilos_fecha(self):
+        from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+
+        parte = next(
+            (destino for tipo, destino in self._relaciones(self._parte_libro()).values()
+             if tipo.endswith('/styles')),
+            None
+        )
+        raiz = self._leer_xml(parte) if parte else None
+        if raiz is None:
+            return frozenset()
+
+        formatos = dict(BUILTIN_FORMATS)
+        for fmt in raiz.iter(f'{{{NS_MAIN}}}numFmt'):
+            formatos[int(fmt.get('numFmtId'))] = fmt.get('formatCode', '')
+
+        estilos = set()
+        cell_xfs = raiz.find(f'{{{NS_MAIN}}}cellXfs')
+        if cell_xfs is not None:
+            for indice, xf in enumerate(cell_xfs.findall(f'{{{NS_MAIN}}}xf')):
+                formato = formatos.get(int(xf.get('numFmtId', 0)), '')
+                if formato and is_date_format(formato):
+                    estilos.add(indice)
+        return frozenset(estilos)
+
+    def _fecha_1904(self):
+        raiz = self._leer_xml(self._parte_libro())
+        pr = raiz.find(f'{{{NS_MAIN}}}workbookPr') if raiz is not None else None
+        return pr is not None and pr.get('date1904') in ('1', 'true')
+
+    def bloques_filas(self, parte, tamaño_bloque=TAMAÑO_BLOQUE):
+        """
+        Recorre la parte XML de la hoja y entrega bloques de elementos <row>
+        completos, envueltos en un elemento raíz con los espacios de nombres
+        del documento. La memoria usada depende del tamaño del bloque, no de
+        la hoja.
+        """
+        with self.zip.open(parte) as archivo:
+            buffer = b''
+            envoltura = None
+
+            # Avanzar hasta <sheetData>
+            while envoltura is None:
+                leido = archivo.read(tamaño_bloque)
+                if not leido:
+                    return
+                buffer += leido
+                inicio = buffer.find(b'<sheetData')
+                if inicio < 0:
+                    continue
+                cierre = buffer.find(b'>', inicio)
+                if cierre < 0:
+                    continue
+                # Declaraciones de espacios de nombres (una por prefijo)
+                espacios = {}
+                for declaracion in _RE_XMLNS.findall(buffer[:inicio]):
+                    espacios.setdefault(declaracion.split(b'=')[0], declaracion)
+                envoltura = (b'<bloque' + b''.join(espacios.values()) + b'>', b'</bloque>')
+                if buffer[cierre - 1:cierre] == b'/':  # <sheetData/>
+                    return
+                buffer = buffer[cierre + 1:]
+
+            while True:
+                fin = buffer.rfind(_FIN_FILA)
+                if fin >= 0:
+                    corte = fin + len(_FIN_FILA)
+                    yield envoltura[0] + buffer[:corte] + envoltura[1]
+                    buffer = buffer[corte:]
+                leido = archivo.read(tamaño_bloque)
+                if not leido:
+                    break
+                buffer += leido
+
+            fin_datos = buffer.find(b'</sheetData>')
+            if fin_datos >= 0:
+                buffer = buffer[:fin_datos]
+            if buffer.strip():
+                yield envoltura[0] + buffer + envoltura[1]
+
+
+def filas_de_bloque(bloque):
+    """Entrega (número de fila, lista de celdas <c>) de un bloque XML"""
+    raiz = ET.fromstring(bloque)
+    for fila in raiz:
+        numero = fila.get('r')
+        yield (int(numero) if numero else None), list(fila)
+
+
+def extraer_valores(celdas, indices, letras, contexto):
+    """
+    Valores de las columnas 'indices' en la fila. Si la fila es densa, la
+    celda i corresponde a la columna i; si no, se ubica por su referencia.
+    """
+    valores = []
+    mapa = None
+    total = len(celdas)
+    for indice, letra in zip(indices, letras):
+        celda = celdas[indice] if indice < total else None
+        ref = celda.get('r') if celda is not None else None
+        if celda is None or (ref is not None and ref.rstrip('0123456789') != letra):
+            if mapa is None:
+                mapa = _mapa_celdas(celdas)
+            celda = mapa.get(indice)
+        valores.append(contexto.valor(celda) if celda is not None else None)
+    return valores
+
+
+def _mapa_celdas(celdas):
+    mapa = {}
+    for posicion, celda in enumerate(celdas):
+        ref = celda.get('r')
+        indice = letras_a_indice(ref.rstrip('0123456789')) if ref else posicion
+        mapa[indice] = celda
+    return mapa
+
+
+def _fila_con_datos(celdas, contexto):
+    for celda in celdas:
+        if len(celda):
+            valor = contexto.valor(celda)
+            if valor is not None and valor != '':
+                return True
+    return False
+
+
+def a_texto(valor):
+    """Convierte una celda a texto igual que pd.read_excel(dtype=str); vacíos → None"""
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    texto = str(valor)
+    return None if texto in TEXTOS_NULOS else texto
+
+
+def columna_a_serie(nombre, valores):
+    """Serie final de una columna: número para COLUMNAS_NUMERICAS, texto para el resto"""
+    return serie_de_textos(nombre, [a_texto(v) for v in valores])
+
+
+def serie_de_textos(nombre, textos):
+    """Serie final de una columna ya convertida con a_texto"""
+    texto = pd.Series(textos, dtype=object)
+    if nombre in COLUMNAS_NUMERICAS:
+        return pd.to_numeric(texto, errors='coerce')
+    return texto
+
+
+class EscaneoHoja:
+    """
+    Recorre la hoja fila a fila y entrega (número de fila, valores) solo de las
+    columnas solicitadas. El encabezado se resuelve antes de la primera fila de
+    datos; las filas ausentes en el XML se entregan como filas vacías.
+    """
+
+    def __init__(self, libro, nombre_hoja, columnas=None):
+        self.libro = libro
+        self.parte = libro.parte_hoja(nombre_hoja)
+        self.contexto = libro.contexto()
+        self.columnas = columnas
+        self.nombres = None
+        self.col_fecha = None
+        self.ultima_con_datos = 0
+
+    @property
+    def total_registros(self):
+        """Registros hasta la última fila con datos (sin encabezado)"""
+        return max(self.ultima_con_datos - 1, 0)
+
+    def resolver(self, encabezado):
+        posiciones, self.col_fecha = resolver_encabezado(encabezado, self.columnas)
+        self.nombres = list(posiciones)
+        self._indices = [posiciones[n] for n in self.nombres]
+        self._letras = [get_column_letter(i + 1) for i in self._indices]
+
+    def __iter__(self):
+        contexto = self.contexto
+        vacia = None
+        ultima_fila = 0
+
+        for bloque in self.libro.bloques_filas(self.parte):
+            for numero, celdas in filas_de_bloque(bloque):
+                numero = numero or ultima_fila + 1
+
+                if self.nombres is None:
+                    if numero == 1:
+                        mapa = _mapa_celdas(celdas)
+                        self.resolver([
+                            contexto.valor(mapa[i]) if i in mapa else None
+                            for i in range(max(mapa) + 1 if mapa else 0)
+                        ])
+                        ultima_fila = 1
+                        continue
+                    self.resolver([])
+                    ultima_fila = 1
+                if vacia is None:
+                    vacia = [None] * len(self.nombres)
+
+                # Filas ausentes en el XML: filas vacías
+                for faltante in range(ultima_fila + 1, numero):
+                    yield faltante, vacia
+                ultima_fila = numero
+
+                valores = extraer_valores(celdas, self._indices, self._letras, contexto)
+                if any(v is not None for v in valores) or _fila_con_datos(celdas, contexto):
+                    self.ultima_con_datos = numero
+                yield numero, valores
+
+        if self.nombres is None:
+            self.resolver([])
+
+
+def leer_encabezado(ruta_archivo, nombre_hoja):
+    """
+    Valores de la fila 1 de la hoja. Lee solo el primer bloque de la hoja y los
+    textos compartidos que usa el encabezado, para validar las columnas antes
+    de copiar o leer el libro.
+    """
+    with LibroXlsx(ruta_archivo) as libro:
+        parte = libro.parte_hoja(nombre_hoja)
+        for bloque in libro.bloques_filas(parte, tamaño_bloque=TAMAÑO_BLOQUE_ENCABEZADO):
+            for numero, celdas in filas_de_bloque(bloque):
+                if numero not in (None, 1):
+                    return []
+                mapa = _mapa_celdas(celdas)
+                compartidos = [int(celda.find(_V).text) for celda in celdas
+                               if celda.get('t') == 's' and celda.find(_V) is not None]
+                textos = libro._textos_compartidos(hasta=max(compartidos)) if compartidos else []
+                contexto = ContextoCeldas(textos, frozenset(), libro._fecha_1904())
+                return [contexto.valor(mapa[i]) if i in mapa else None
+                        for i in range(max(mapa) + 1 if mapa else 0)]
+    return []
+
+
+def leer_hoja_streaming(ruta_archivo, nombre_hoja, columnas=None):
+    """
+    Lee solo las columnas necesarias de la hoja.
+    Devuelve (DataFrame, columna de fecha o None). Las filas vacías al final
+    se descartan, igual que pd.read_excel.
+    """
+    with LibroXlsx(ruta_archivo) as libro:
+        escaneo = EscaneoHoja(libro, nombre_hoja, columnas)
+        datos = None
+        for _, valores in escaneo:
+            if datos is None:
+                datos = [[] for _ in escaneo.nombres]
+            for destino, valor in zip(datos, valores):
+                destino.append(valor)
+        datos = datos or [[] for _ in escaneo.nombres]
+
+    filas = escaneo.total_registros
+    df = pd.DataFrame({
+        nombre: columna_a_serie(nombre, valores[:filas])
+        for nombre, valores in zip(escaneo.nombres, datos)
+    })
+    return df, escaneo.col_fecha
+
+
+def rango_semana(fecha):
+    """Lunes y domingo de la semana de 'fecha'"""
+    fecha = fecha.date() if isinstance(fecha, datetime) else fecha
+    inicio = fecha - timedelta(days=fecha.weekday())
+    return inicio, inicio + timedelta(days=6)
+
+
+def es_estado_pagar(valor):
+    """Mismo criterio que el filtro de estado: el texto contiene 'PAGAR'"""
+    texto = a_texto(valor)
+    return texto is not None and 'PAGAR' in texto.upper().strip()
+
+
+class ResultadoSemana:
+    """Registros de la semana y los conteos de diagnóstico del filtrado"""
+
+    def __init__(self, df_semana, col_fecha, inicio, fin, total, con_fecha, muestra_fechas, es_pagar):
+        self.df_semana = df_semana
+        self.col_fecha = col_fecha
+        self.inicio = inicio
+        self.fin = fin
+        self.total = total
+        self.con_fecha = con_fecha
+        self.muestra_fechas = muestra_fechas
+        self.es_pagar = es_pagar
+
+
+def leer_semana_filtrada(ruta_archivo, nombre_hoja, fecha_referencia, columnas=None, tamaño_muestra=5):
+    """
+    Lectura con filtro durante el recorrido: solo se guardan los registros cuya
+    fecha cae en la semana (lunes a domingo) de 'fecha_referencia'. El estado
+    'PAGAR' se evalúa en la misma pasada. La memoria depende del tamaño del
+    resultado, no de la hoja.
+    """
+    inicio, fin = rango_semana(fecha_referencia)
+    seleccion = []
+    fechas = []
+    es_pagar = []
+    con_fecha = 0
+    muestra = []
+
+    with LibroXlsx(ruta_archivo) as libro:
+        escaneo = EscaneoHoja(libro, nombre_hoja, columnas)
+        pos_fecha = pos_estado = None
+        for _, valores in escaneo:
+            if pos_fecha is None:
+                if escaneo.col_fecha is None:
+                    break
+                pos_fecha = escaneo.nombres.index(escaneo.col_fecha)
+                pos_estado = escaneo.nombres.index('ESTADO') if 'ESTADO' in escaneo.nombres else None
+
+            fecha_hora = fecha_de_valor(valores[pos_fecha])
+            if fecha_hora is None:
+                continue
+            fecha = fecha_hora.date()
+            con_fecha += 1
+            if len(muestra) < tamaño_muestra and fecha not in muestra:
+                muestra.append(fecha)
+
+            if inicio <= fecha <= fin:
+                seleccion.append(valores)
+                fechas.append(fecha_hora)
+                if pos_estado is not None:
+                    es_pagar.append(es_estado_pagar(valores[pos_estado]))
+
+    nombres = escaneo.nombres
+    columnas_df = {
+        nombre: columna_a_serie(nombre, [fila[i] for fila in seleccion])
+        for i, nombre in enumerate(nombres)
+    }
+    if escaneo.col_fecha:
+        columnas_df[escaneo.col_fecha] = pd.to_datetime(pd.Series(fechas, dtype=object)).astype(UNIDAD_FECHAS)
+    df_semana = pd.DataFrame(columnas_df, columns=nombres)
+
+    return ResultadoSemana(
+        df_semana,
+        escaneo.col_fecha,
+        inicio,
+        fin,
+        escaneo.total_registros,
+        con_fecha,
+        muestra,
+        es_pagar if 'ESTADO' in nombres else None,
+    )
@@ -0,0 +1,171 @@
+"""
+Lectura en paralelo de hojas Control_Pagos muy grandes
+
+El proceso principal descomprime el XML de la hoja y lo corta en bloques de
+filas completas (límites de <row>); cada bloque se interpreta en un proceso
+aparte, que devuelve solo las columnas del proceso ya convertidas a texto.
+Los textos compartidos se cargan una vez y cada proceso los recibe una sola
+vez al iniciar. Los resultados se unen en el orden de las filas.
+
+Las hojas chicas se leen con el lector por streaming: iniciar los procesos
+cuesta más de lo que se gana (ver benchmarks/bench_lector_paralelo.py).
+"""
+
+import os
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from openpyxl.utils import get_column_letter
+
+from control_pagos.lector_control_pagos import (
+    TAMAÑO_BLOQUE_ENCABEZADO,
+    LibroXlsx,
+    _fila_con_datos,
+    _mapa_celdas,
+    a_texto,
+    extraer_valores,
+    filas_de_bloque,
+    leer_hoja_streaming,
+    resolver_encabezado,
+    serie_de_textos,
+)
+
+# XML de la hoja (sin comprimir) desde el que conviene repartir la lectura
+UMBRAL_PARALELO = 48 * 1024 * 1024
+# XML de cada bloque enviado a un proceso
+TAMAÑO_BLOQUE_PARALELO = 4 * 1024 * 1024
+MAX_PROCESOS = 8
+# Bloques en espera por proceso (limita la memoria del XML pendiente)
+BLOQUES_POR_PROCESO = 2
+
+# Estado de cada proceso de lectura (lo fija _iniciar_proceso)
+_contexto = None
+_indices = None
+_letras = None
+
+
+def _iniciar_proceso(contexto, indices, letras):
+    global _contexto, _indices, _letras
+    _contexto = contexto
+    _indices = indices
+    _letras = letras
+
+
+def leer_bloque(bloque, contexto=None, indices=None, letras=None):
+    """
+    Interpreta un bloque de filas. Devuelve (números de fila, columnas de
+    textos, posición de la última fila con datos o -1). Un número None es
+    "la fila siguiente a la anterior" (fila sin atributo r).
+    """
+    contexto = contexto or _contexto
+    indices = _indices if indices is None else indices
+    letras = _letras if letras is None else letras
+    numeros = []
+    columnas = [[] for _ in indices]
+    ultima_con_datos = -1
+    for posicion, (numero, celdas) in enumerate(filas_de_bloque(bloque)):
+        numeros.append(numero)
+        valores = extraer_valores(celdas, indices, letras, contexto)
+        if any(v is not None for v in valores) or _fila_con_datos(celdas, contexto):
+            ultima_con_datos = posicion
+        for destino, valor in zip(columnas, valores):
+            destino.append(a_texto(valor))
+    return numeros, columnas, ultima_con_datos
+
+
+def _encabezado(libro, parte, contexto):
+    """Valores de la fila 1 (lista vacía si la hoja no empieza en la fila 1)"""
+    for bloque in libro.bloques_filas(parte, tamaño_bloque=TAMAÑO_BLOQUE_ENCABEZADO):
+        for numero, celdas in filas_de_bloque(bloque):
+            if numero not in (None, 1):
+                return []
+            mapa = _mapa_celdas(celdas)
+            return [contexto.valor(mapa[i]) if i in mapa else None
+                    for i in range(max(mapa) + 1 if mapa else 0)]
+    return []
+
+
+def tamaño_hoja(ruta_archivo, nombre_hoja):
+    """Bytes del XML de la hoja sin comprimir"""
+    with LibroXlsx(ruta_archivo) as libro:
+        return libro.zip.getinfo(libro.parte_hoja(nombre_hoja)).file_size
+
+
+def procesos_lectura(procesos=None):
+    """Procesos a usar: 'procesos' o, si no se indica, uno por núcleo hasta MAX_PROCESOS"""
+    return max(1, procesos or min(MAX_PROCESOS, os.cpu_count() or 1))
+
+
+def leer_hoja_paralela(ruta_archivo, nombre_hoja, columnas=None, procesos=None, umbral=UMBRAL_PARALELO,
+                       tamaño_bloque=TAMAÑO_BLOQUE_PARALELO, log=None):
+    """
+    Igual que leer_hoja_streaming (devuelve (DataFrame, columna de fecha o
+    None)), pero reparte los bloques de la hoja entre procesos. Con un solo
+    proceso o una hoja de menos de 'umbral' bytes lee en serie.
+    """
+    log = log or (lambda mensaje, tipo="INFO": None)
+    procesos = procesos_lectura(procesos)
+    tamaño = tamaño_hoja(ruta_archivo, nombre_hoja)
+    if procesos == 1 or tamaño < umbral:
+        return leer_hoja_streaming(ruta_archivo, nombre_hoja, columnas)
+
+    log(f"Hoja de {tamaño / (1024 * 1024):.0f} MB: lectura en {procesos} procesos", "INFO")
+
+    with LibroXlsx(ruta_archivo) as libro:
+        parte = libro.parte_hoja(nombre_hoja)
+        contexto = libro.contexto()
+        posiciones, col_fecha = resolver_encabezado(_encabezado(libro, parte, contexto), columnas)
+        nombres = list(posiciones)
+        indices = [posiciones[n] for n in nombres]
+        letras = [get_column_letter(i + 1) for i in indices]
+
+        datos = [[] for _ in nombres]
+        vacia = [None] * len(nombres)
+        estado = {'ultima': 1, 'con_datos': 0}  # fila 1 = encabezado
+
+        def unir(resultado):
+            numeros, textos, ultima_con_datos = resultado
+            anterior = estado['ultima']
+            resueltos = []
+            for numero in numeros:
+                resueltos.append(numero or (resueltos[-1] if resueltos else anterior) + 1)
+            if ultima_con_datos >= 0:
+                estado['con_datos'] = max(estado['con_datos'], resueltos[ultima_con_datos])
+
+            # Filas ya entregadas (el encabezado, en el primer bloque)
+            inicio = bisect_right(resueltos, anterior)
+            resueltos = resueltos[inicio:]
+            if not resueltos:
+                return
+            if resueltos[0] == anterior + 1 and resueltos[-1] - resueltos[0] == len(resueltos) - 1:
+                for destino, columna in zip(datos, textos):
+                    destino.extend(columna[inicio:])
+            else:
+                # Filas ausentes en el XML: filas vacías
+                for posicion, numero in enumerate(resueltos, start=inicio):
+                    for _ in range(anterior + 1, numero):
+                        for destino, valor in zip(datos, vacia):
+                            destino.append(valor)
+                    for destino, columna in zip(datos, textos):
+                        destino.append(columna[posicion])
+                    anterior = numero
+            estado['ultima'] = resueltos[-1]
+
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso,
+                                 initargs=(contexto, indices, letras)) as ejecutor:
+            pendientes = deque()
+            for bloque in libro.bloques_filas(parte, tamaño_bloque=tamaño_bloque):
+                pendientes.append(ejecutor.submit(leer_bloque, bloque))
+                if len(pendientes) >= procesos * BLOQUES_POR_PROCESO:
+                    unir(pendientes.popleft().result())
+            while pendientes:
+                unir(pendientes.popleft().result())
+
+    filas = max(estado['con_datos'] - 1, 0)
+    df = pd.DataFrame({
+        nombre: serie_de_textos(nombre, textos[:filas])
+        for nombre, textos in zip(nombres, datos)
+    })
+    return df, col_fecha
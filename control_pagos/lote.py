@@ -0,0 +1,109 @@
+"""
+Proyección de varias semanas en una sola ejecución
+
+El libro se lee una vez, los registros se reparten por semana ISO (lunes a
+domingo) con un solo groupby y cada archivo semanal se escribe en un proceso
+independiente.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from control_pagos.escritor_proyeccion import crear_escritor
+
+MIERCOLES = 2
+MAX_PROCESOS = 4
+
+
+def semana_iso(fecha):
+    """Clave (año ISO, semana ISO) de una fecha"""
+    año, semana, _ = fecha.isocalendar()
+    return año, semana
+
+
+def miercoles_de_semana(fecha):
+    """Miércoles de la semana (lunes a domingo) de 'fecha'"""
+    return fecha + timedelta(days=MIERCOLES - fecha.weekday())
+
+
+def miercoles_en_rango(desde, hasta):
+    """Miércoles entre 'desde' y 'hasta' (ambos incluidos)"""
+    actual = desde + timedelta(days=(MIERCOLES - desde.weekday()) % 7)
+    fechas = []
+    while actual <= hasta:
+        fechas.append(actual)
+        actual += timedelta(days=7)
+    return fechas
+
+
+def fechas_de_lote(desde=None, hasta=None, miercoles=None):
+    """
+    Fechas de proyección del lote: la lista 'miercoles' o todos los miércoles
+    entre 'desde' y 'hasta'. Se ordenan y se deja una fecha por semana.
+    """
+    if miercoles:
+        fechas = list(miercoles)
+    elif desde and hasta:
+        fechas = miercoles_en_rango(desde, hasta)
+    else:
+        raise ValueError("Indique un rango de fechas (desde/hasta) o una lista de miércoles")
+
+    unicas = {}
+    for fecha in sorted(fechas):
+        fecha = datetime(fecha.year, fecha.month, fecha.day)
+        unicas.setdefault(semana_iso(fecha), fecha)
+    if not unicas:
+        raise ValueError(f"No hay miércoles entre {desde:%d/%m/%Y} y {hasta:%d/%m/%Y}")
+    return list(unicas.values())
+
+
+def dividir_por_semana(df, col_fecha):
+    """
+    Reparte los registros por semana ISO de 'col_fecha' (ya convertida a fecha).
+    Devuelve {(año, semana): DataFrame}; los registros sin fecha se descartan.
+    """
+    iso = df[col_fecha].dt.isocalendar()
+    grupos = df.groupby([iso['year'], iso['week']], sort=False)
+    return {(int(año), int(semana)): grupo for (año, semana), grupo in grupos}
+
+
+def escribir_proyeccion_semana(ruta_archivo, df_datos, nombre_hoja, motor):
+    """Escribe una proyección semanal (se ejecuta en un proceso aparte)"""
+    crear_escritor(motor).guardar(ruta_archivo, df_datos, nombre_hoja)
+    return str(ruta_archivo)
+
+
+def escribir_proyecciones(tareas, procesos=None, log=None):
+    """
+    Escribe las proyecciones [(ruta, df, hoja, motor), ...] en paralelo.
+    Devuelve {ruta: None si se escribió o el mensaje de error}.
+    """
+    log = log or (lambda mensaje, tipo="INFO": None)
+    procesos = max(1, min(procesos or MAX_PROCESOS, len(tareas), os.cpu_count() or 1))
+    resultados = {}
+
+    if procesos == 1:
+        for tarea in tareas:
+            try:
+                escribir_proyeccion_semana(*tarea)
+                resultados[str(tarea[0])] = None
+                log(f"Proyección escrita: {tarea[0].name}", "OK")
+            except Exception as e:
+                resultados[str(tarea[0])] = str(e)
+                log(f"Error al escribir {tarea[0].name}: {e}", "ERROR")
+        return resultados
+
+    log(f"Escribiendo {len(tareas)} proyecciones en {procesos} procesos...", "PROCESO")
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        futuros = {ejecutor.submit(escribir_proyeccion_semana, *tarea): tarea[0] for tarea in tareas}
+        for futuro in as_completed(futuros):
+            ruta = futuros[futuro]
+            try:
+                futuro.result()
+                resultados[str(ruta)] = None
+                log(f"Proyección escrita: {ruta.name}", "OK")
+            except Exception as e:
+                resultados[str(ruta)] = str(e)
+                log(f"Error al escribir {ruta.name}: {e}", "ERROR")
+    return resultados
@@ -0,0 +1,181 @@
+"""
+Medición de una ejecución: tiempo, registros, memoria y llamadas a Excel por etapa
+
+CopiarArchivo envuelve cada etapa del proceso en MedicionEjecucion.etapa() y al
+terminar escribe un informe JSON junto a la proyección ('04 FEBRERO
+2026.informe.json'). Con perfil=True (--perfil / --profile) las etapas de Python
+puro (lectura, filtro, agrupación y preparación del archivo final) se perfilan
+con cProfile: se guarda el .prof (para snakeviz o pstats) y un resumen en texto.
+"""
+
+import cProfile
+import io
+import json
+import platform
+import pstats
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# Etapas sin Excel ni disco de por medio: las únicas que se perfilan
+ETAPAS_PERFILADAS = ('lectura', 'filtro', 'agrupacion', 'archivo_final')
+LINEAS_RESUMEN_PERFIL = 40
+
+
+def pico_memoria_mb():
+    """Pico de memoria residente (RSS) del proceso en MB; None si no se puede medir"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return _pico_memoria_windows()
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _pico_memoria_windows():
+    """PeakWorkingSetSize de GetProcessMemoryInfo (psapi)"""
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ContadoresMemoria(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD),
+                ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+
+        contadores = ContadoresMemoria()
+        contadores.cb = ctypes.sizeof(contadores)
+        kernel32 = ctypes.windll.kernel32
+        psapi = ctypes.windll.psapi
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD]
+        if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(contadores), contadores.cb):
+            return None
+        return round(contadores.PeakWorkingSetSize / (1024 * 1024), 1)
+    except Exception:
+        return None
+
+
+class RegistroEtapa:
+    """Medición de una etapa; 'filas' lo completa quien ejecuta la etapa"""
+
+    def __init__(self, nombre, dentro_de=None):
+        self.nombre = nombre
+        self.dentro_de = dentro_de
+        self.segundos = None
+        self.filas = None
+        self.pico_memoria_mb = None
+        self.llamadas_excel = {}
+        self.error = None
+
+    def como_dict(self):
+        datos = {
+            'etapa': self.nombre,
+            'segundos': round(self.segundos, 3) if self.segundos is not None else None,
+            'filas': self.filas,
+            'pico_memoria_mb': self.pico_memoria_mb,
+            'llamadas_excel': self.llamadas_excel,
+        }
+        if self.dentro_de:
+            datos['dentro_de'] = self.dentro_de
+        if self.error:
+            datos['error'] = self.error
+        return datos
+
+
+class MedicionEjecucion:
+    """
+    Etapas medidas de una ejecución. 'llamadas_excel' es una función que
+    devuelve el total de llamadas a Excel hasta el momento (Counter).
+    """
+
+    def __init__(self, perfil=False, llamadas_excel=None):
+        self.perfil = cProfile.Profile() if perfil else None
+        self.llamadas_excel = llamadas_excel or Counter
+        self.etapas = []
+        self._abiertas = []
+        self.fecha_inicio = datetime.now()
+        self.inicio = time.perf_counter()
+
+    @contextmanager
+    def etapa(self, nombre):
+        """
+        Mide el bloque como la etapa 'nombre' y entrega su RegistroEtapa para
+        anotar filas. Una etapa dentro de otra queda con 'dentro_de'.
+        """
+        registro = RegistroEtapa(nombre, self._abiertas[-1].nombre if self._abiertas else None)
+        self.etapas.append(registro)
+        # Una etapa perfilada dentro de otra ya queda en el perfil de la externa
+        perfilar = self.perfil is not None and nombre in ETAPAS_PERFILADAS \
+            and not any(abierta.nombre in ETAPAS_PERFILADAS for abierta in self._abiertas)
+        self._abiertas.append(registro)
+        llamadas_antes = Counter(self.llamadas_excel())
+        if perfilar:
+            self.perfil.enable()
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        except Exception as e:
+            registro.error = str(e)
+            raise
+        finally:
+            registro.segundos = time.perf_counter() - inicio
+            self._abiertas.pop()
+            if perfilar:
+                self.perfil.disable()
+            registro.pico_memoria_mb = pico_memoria_mb()
+            registro.llamadas_excel = dict(Counter(self.llamadas_excel()) - llamadas_antes)
+
+    def informe(self, **datos):
+        """Diccionario del informe; 'datos' agrega campos de la ejecución (fecha, estado, rutas...)"""
+        llamadas = Counter(self.llamadas_excel())
+        return {
+            'inicio': self.fecha_inicio.isoformat(timespec='seconds'),
+            'segundos': round(time.perf_counter() - self.inicio, 3),
+            **datos,
+            'pico_memoria_mb': pico_memoria_mb(),
+            'llamadas_excel': dict(llamadas),
+            'total_llamadas_excel': sum(llamadas.values()),
+            'etapas': [registro.como_dict() for registro in self.etapas],
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+        }
+
+    def guardar(self, ruta_informe, **datos):
+        """
+        Escribe el informe JSON y, si se perfiló, el .prof y su resumen (.perfil.txt)
+        junto a él. Devuelve la lista de archivos escritos.
+        """
+        ruta_informe = Path(ruta_informe)
+        ruta_informe.write_text(
+            json.dumps(self.informe(**datos), ensure_ascii=False, indent=2, default=str), encoding='utf-8'
+        )
+        escritos = [ruta_informe]
+        if self.perfil is not None and self.perfil.getstats():
+            base = ruta_informe.with_name(ruta_informe.name.replace('.informe.json', ''))
+            ruta_prof = base.with_name(f"{base.name}.prof")
+            self.perfil.dump_stats(str(ruta_prof))
+            ruta_resumen = base.with_name(f"{base.name}.perfil.txt")
+            ruta_resumen.write_text(self.resumen_perfil(), encoding='utf-8')
+            escritos += [ruta_prof, ruta_resumen]
+        return escritos
+
+    def resumen_perfil(self, lineas=LINEAS_RESUMEN_PERFIL):
+        """Funciones con más tiempo acumulado en las etapas perfiladas (pstats)"""
+        salida = io.StringIO()
+        estadisticas = pstats.Stats(self.perfil, stream=salida)
+        estadisticas.strip_dirs().sort_stats('cumulative').print_stats(lineas)
+        return salida.getvalue()
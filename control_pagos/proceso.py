@@ -0,0 +1,1440 @@
+"""
+Proceso de proyección del Control de Pagos, sin interfaz gráfica
+
+CopiarArchivo copia el archivo base, lee y filtra Control_Pagos, escribe la
+proyección y anexa los registros al archivo final. Informa su avance por medio
+de un reportero (control_pagos.reportero), de modo que sirve tanto para la
+interfaz gráfica como para ejecuciones programadas.
+"""
+
+import configparser
+import locale
+import shutil
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+try:
+    import win32com.client
+    import pythoncom
+except ImportError:  # Equipos sin Excel (Linux): solo motores sin COM
+    win32com = None
+    pythoncom = None
+
+from control_pagos.anexo_ooxml import anexar_filas
+from control_pagos.bloqueos import (
+    ArchivoBloqueado,
+    EsperaArchivos,
+    es_archivo_bloqueado,
+    sondear_archivo,
+    sondear_carpeta,
+)
+from control_pagos.cache_libro import CacheLibro
+from control_pagos.cambios_libro import (
+    RegistroCambios,
+    acumular_anexadas,
+    comparar_filas,
+    huellas_filas,
+    separar_anexadas,
+)
+from control_pagos.escritor_proyeccion import com_disponible, crear_escritor, motor_por_defecto
+from control_pagos.esquema import COLUMNAS_REQUERIDAS, POSIBLES_COLUMNAS_FECHA, ColumnasFaltantes, Encabezado
+from control_pagos.extraccion_hoja import extraer_hoja
+from control_pagos.fechas import normalizar_fechas
+from control_pagos.historial_pagos import HistorialPagos, estado_archivo
+from control_pagos.indice_duplicados import IndiceDuplicados
+from control_pagos.lector_control_pagos import leer_encabezado, leer_semana_filtrada
+from control_pagos.lector_paralelo import leer_hoja_paralela, procesos_lectura
+from control_pagos.lote import dividir_por_semana, escribir_proyecciones, semana_iso
+from control_pagos.medicion import MedicionEjecucion
+from control_pagos.proyeccion import agrupar_y_calcular, huella_proyeccion
+from control_pagos.reportero import ETAPA_FIN, Reportero
+from control_pagos.tasas_cambio import DIAS_MAXIMOS, TablaTasas
+from control_pagos.sesion_excel import FORMATO_XLSX, SesionExcel
+
+
+def configurar_idioma():
+    """Configuración de español para los nombres de mes de carpetas y archivos"""
+    try:
+        locale.setlocale(locale.LC_TIME, 'Spanish_Spain.1252')  # Windows
+    except locale.Error:
+        try:
+            locale.setlocale(locale.LC_TIME, 'es_ES.UTF-8')  # Linux
+        except locale.Error:
+            pass
+
+
+# Resultado de ejecutar_proceso (CopiarArchivo.estado)
+ESTADO_OK = 'ok'
+ESTADO_SIN_REGISTROS = 'sin_registros'
+ESTADO_BLOQUEADO = 'bloqueado'
+ESTADO_ERROR = 'error'
+
+# Columnas del archivo final que tienen el mismo valor en todos los registros
+COLUMNAS_FIJAS_FINAL = {
+    'DESCUENTO PRONTO PAGO': 0,
+    'FORMA DE PAGO': '',
+    'TIPO DE PAGO': 'CUENTA COMPENSACION',
+    'FECHA DE APERTURA CREDITO -UTILIZACION LC': 'N/A',
+    'FECHA DE VENCIMIENTO': 'N/A',
+    '# CREDITO': 'N/A',
+    '# DEUDA EXTERNA': 'N/A',
+    'NOTA CREDITO': 0.00,
+    'OBSERVACIONES': '',
+}
+
+
+@contextmanager
+def apartamento_com():
+    """Inicializa COM en el hilo actual mientras dure el bloque (sin pywin32 no hace nada)"""
+    if pythoncom is None:
+        yield
+        return
+    pythoncom.CoInitialize()
+    try:
+        yield
+    finally:
+        pythoncom.CoUninitialize()
+
+
+class CopiarArchivo:
+    """Clase principal para el procesamiento de archivos - VERSIÓN CORREGIDA"""
+    def __init__(self, fecha_filtrado=None, reportero=None, ruta_config=None, fabrica_sesion_excel=None,
+                 perfil=False):
+        configurar_idioma()
+        
+        # Reportero (consola por defecto; la interfaz gráfica pasa el suyo)
+        self.reportero = reportero or Reportero()
+        
+        # Sesión de Excel compartida por las etapas de una ejecución
+        # (control_pagos.excel_falso.SesionExcelFalsa para probar sin Excel)
+        self.fabrica_sesion_excel = fabrica_sesion_excel or SesionExcel
+        self.sesion_excel = None
+        # Sesiones creadas en la ejecución con sus llamadas al crearlas {id: (sesión, Counter)}
+        self._sesiones_excel = {}
+        
+        # Medición por etapa de la ejecución en curso (perfil: cProfile de las etapas de Python)
+        self.perfil = perfil
+        self.medicion = MedicionEjecucion(perfil=perfil, llamadas_excel=self.llamadas_excel)
+        
+        # Resultado de la última ejecución (ver ESTADO_*) y huella de su proyección agrupada
+        self.estado = None
+        self.huella_proyeccion = None
+        # Huellas de las filas leídas, cambios frente a la ejecución anterior y si el anexo terminó
+        self.filas_libro = None
+        self.cambios_libro = None
+        self.anexo_completo = False
+        # Filas ya anexadas según el registro (si el anexo es incremental) y etiquetas de las que se anexan
+        self.anexadas_previas = None
+        self.etiquetas_anexo = None
+        # Error del anexo al archivo final (la proyección ya se guardó)
+        self.error_anexo = None
+        
+        # Configuración de rutas (las opciones sí/no aceptan también 'si' y 'sí')
+        self.config = configparser.ConfigParser()
+        self.config.BOOLEAN_STATES = {**configparser.ConfigParser.BOOLEAN_STATES, 'si': True, 'sí': True}
+        
+        # Determinar ubicación del ejecutable o script
+        if getattr(sys, 'frozen', False):
+            application_path = Path(sys.executable).parent
+        else:
+            application_path = Path(__file__).resolve().parent.parent
+            
+        config_path = Path(ruta_config) if ruta_config else application_path / 'config.ini'
+        
+        rutas_configuradas = False
+        
+        if config_path.exists():
+            try:
+                self.config.read(config_path, encoding='utf-8')
+                if 'RUTAS' in self.config:
+                    self.ruta_origen = Path(self.config['RUTAS'].get('ArchivoOrigen', ''))
+                    self.ruta_intermedio = Path(self.config['RUTAS'].get('CarpetaIntermedia', ''))
+                    self.ruta_destino_final = Path(self.config['RUTAS'].get('ArchivoFinal', ''))
+                    rutas_configuradas = True
+            except Exception as e:
+                print(f"Error leyendo config.ini: {e}")
+
+        # Si no hay config, usar rutas por defecto
+        if not rutas_configuradas:
+            base_path = Path.home() / "Este equipo" / "O:"
+            
+            if not base_path.exists():
+                 base_path_alt = Path.home() / "Este equipo" / "O:"
+                 if base_path_alt.exists():
+                     base_path = base_path_alt
+                 else:
+                    print("No se encontró la ruta por defecto")
+            
+            self.ruta_origen = base_path / "00.CONTROL DE PAGOS 2026 1.xlsm"
+            self.ruta_intermedio = base_path / "Finanzas" / "Info Bancos" / "Pagos Internacionales" / "PROYECCION PAGOS SEMANAL Y MENSUAL"
+            self.ruta_destino_final = base_path / "Finanzas" / "Info Bancos" / "Pagos Internacionales" / "CONTROL PAGOS.xlsx"
+
+        # CACHÉ DEL LIBRO LEÍDO (se invalida cuando cambia el archivo origen)
+        self.cache_libro = None
+        if self.config.getboolean('CACHE', 'Activa', fallback=True):
+            carpeta_cache = Path(self.config.get('CACHE', 'Carpeta', fallback='') or application_path / 'cache')
+            self.cache_libro = CacheLibro(
+                carpeta_cache,
+                max_generaciones=self.config.getint('CACHE', 'Generaciones', fallback=3),
+                log=self.log
+            )
+
+        # LECTOR DE LA HOJA ('streaming': solo columnas necesarias; 'completo': pd.read_excel;
+        # 'filtrado': solo los registros de la semana, sin pasar por la caché)
+        self.lector_control_pagos = self.config.get('LECTURA', 'Lector', fallback='streaming').strip().lower()
+        # Procesos del lector 'streaming' en hojas grandes (0 = uno por núcleo, 1 = sin paralelo)
+        self.procesos_lectura = self.config.getint('LECTURA', 'Procesos', fallback=0) or None
+
+        # COPIA DEL ARCHIVO BASE ('ooxml': extrae solo la hoja del zip; 'com': SaveAs en Excel)
+        self.modo_copia = self.config.get('COPIA', 'Modo', fallback='ooxml').strip().lower()
+
+        # ANEXO AL ARCHIVO FINAL ('ooxml': agrega las filas al zip sin abrir Excel; 'com': Excel)
+        self.modo_anexo = self.config.get('ANEXO', 'Modo', fallback='ooxml').strip().lower()
+
+        # REGISTROS YA ANEXADOS ('omitir': no se vuelven a anexar; 'avisar': se anexan con advertencia;
+        # 'no': sin índice)
+        self.duplicados_anexo = self.config.get('ANEXO', 'Duplicados', fallback='omitir').strip().lower()
+
+        # CAMBIOS DEL LIBRO ENTRE EJECUCIONES (huella de cada fila de Control_Pagos y de las anexadas; el
+        # anexo recibe solo las filas que no se anexaron si la ejecución anterior fue de la misma fecha)
+        self.ruta_cambios = None
+        if self.config.getboolean('CAMBIOS', 'Activo', fallback=True):
+            self.ruta_cambios = Path(self.config.get('CAMBIOS', 'Archivo', fallback='')
+                                     or application_path / 'cache' / 'filas_control_pagos.pkl')
+
+        # HISTORIAL LOCAL DE LOS REGISTROS ANEXADOS (consultas sin abrir el archivo final)
+        self.ruta_historial = None
+        if self.config.getboolean('HISTORIAL', 'Activo', fallback=True):
+            self.ruta_historial = Path(self.config.get('HISTORIAL', 'Archivo', fallback='')
+                                       or application_path / 'historial' / 'historial_pagos.sqlite')
+
+        # TASAS DE CAMBIO PARA MONEDAS DISTINTAS DE USD (CSV/Parquet con FECHA, MONEDA, FACTOR)
+        self.ruta_tasas = Path(self.config.get('TASAS', 'Archivo', fallback='')) \
+            if self.config.get('TASAS', 'Archivo', fallback='').strip() else None
+        self.dias_tasas = self.config.getint('TASAS', 'DiasMaximos', fallback=DIAS_MAXIMOS)
+        self._tasas_cambio = None
+
+        # MOTOR DE ESCRITURA DE LA PROYECCIÓN ('com' u 'openpyxl')
+        self.motor_proyeccion = self.config.get('PROYECCION', 'Motor', fallback='') or motor_por_defecto()
+        
+        # TOTALES DE LA PROYECCIÓN: uno por moneda si el proveedor factura en varias,
+        # y total general en USD (requiere [TASAS] Archivo)
+        self.totales_por_moneda = self.config.getboolean('PROYECCION', 'TotalesPorMoneda', fallback=True)
+        self.total_usd_proyeccion = self.config.getboolean('PROYECCION', 'TotalUSD', fallback=True)
+
+        # INFORME JSON DE LA EJECUCIÓN (tiempos, registros, memoria y llamadas a Excel por etapa)
+        self.informe_activo = self.config.getboolean('INFORME', 'Activo', fallback=True)
+
+        # PROCESOS PARA ESCRIBIR LAS PROYECCIONES DE UN LOTE (0 = automático)
+        self.procesos_lote = self.config.getint('LOTE', 'Procesos', fallback=0) or None
+
+        # MODO VIGILANCIA (segundos entre revisiones del origen, sin cambios antes de procesar
+        # y máximos entre intentos mientras el archivo está abierto)
+        self.vigilancia_intervalo = self.config.getfloat('VIGILANCIA', 'Intervalo', fallback=5)
+        self.vigilancia_calma = self.config.getfloat('VIGILANCIA', 'Calma', fallback=10)
+        self.vigilancia_espera_maxima = self.config.getfloat('VIGILANCIA', 'EsperaMaxima', fallback=60)
+
+        # ARCHIVOS ABIERTOS POR OTROS USUARIOS (segundos de la primera espera, máximos entre
+        # intentos y máximos en total antes de dar el archivo por bloqueado; 0 = sin límite)
+        self.espera_archivos = None
+        if self.config.getboolean('BLOQUEOS', 'Activo', fallback=True):
+            tiempo_maximo = self.config.getfloat('BLOQUEOS', 'TiempoMaximo', fallback=900)
+            self.espera_archivos = EsperaArchivos(
+                espera_inicial=self.config.getfloat('BLOQUEOS', 'EsperaInicial', fallback=2),
+                espera_maxima=self.config.getfloat('BLOQUEOS', 'EsperaMaxima', fallback=60),
+                tiempo_maximo=tiempo_maximo or None,
+                log=self.log
+            )
+
+        # NOMBRES DE HOJAS
+        self.nombre_primera_hoja = "Control_Pagos"
+        
+        # FECHA DE PROYECCIÓN
+        self.fecha_filtrado = fecha_filtrado
+        
+        # COLUMNAS PARA LA SEGUNDA HOJA
+        self.columnas_segunda_hoja = [
+            'IMPORTADOR',
+            'MARCA', 
+            'PROVEEDOR',
+            'NRO. IMPO',
+            'MONEDA',
+            'NOTA CRÉDITO',
+            'VALOR A PAGAR',
+            'ESTADO',
+            'FECHA DE VENCIMIENTO'
+        ]
+
+    def log(self, mensaje, tipo="INFO"):
+        """Registra mensajes a través del reportero (consola y/o ventana de progreso)"""
+        self.reportero.log(mensaje, tipo)
+
+    @contextmanager
+    def sesion_del_proceso(self):
+        """Una sola sesión de Excel para todas las etapas del bloque; se cierra al salir"""
+        if self.sesion_excel is not None:
+            yield self.sesion_excel
+            return
+        with self.crear_sesion_excel() as sesion:
+            self.sesion_excel = sesion
+            try:
+                yield sesion
+            finally:
+                self.sesion_excel = None
+
+    @contextmanager
+    def usar_sesion_excel(self):
+        """La sesión del proceso si hay una abierta; si no, una temporal para la etapa"""
+        if self.sesion_excel is not None:
+            yield self.sesion_excel
+            return
+        with self.crear_sesion_excel() as sesion:
+            yield sesion
+
+    def crear_sesion_excel(self):
+        """Sesión nueva de la fábrica; se anota para contar sus llamadas a Excel"""
+        sesion = self.fabrica_sesion_excel(log=self.log)
+        self._sesiones_excel.setdefault(id(sesion), (sesion, Counter(getattr(sesion, 'llamadas', {}))))
+        return sesion
+
+    def llamadas_excel(self):
+        """Llamadas a Excel de las sesiones de esta ejecución (Counter)"""
+        total = Counter()
+        for sesion, iniciales in self._sesiones_excel.values():
+            total.update(Counter(getattr(sesion, 'llamadas', {})) - iniciales)
+        return total
+
+    @contextmanager
+    def etapa(self, nombre):
+        """Etapa del proceso: avisa al reportero y la mide (tiempo, registros, memoria, llamadas a Excel)"""
+        self.reportero.etapa(nombre)
+        with self.medicion.etapa(nombre) as registro:
+            yield registro
+
+    def iniciar_medicion(self):
+        """Medición nueva para una ejecución"""
+        self._sesiones_excel = {}
+        self.medicion = MedicionEjecucion(perfil=self.perfil, llamadas_excel=self.llamadas_excel)
+        return self.medicion
+
+    def guardar_informe(self, ruta_informe, **datos):
+        """Escribe el informe JSON de la ejecución (y el perfil, si se pidió); un error solo se informa"""
+        if not self.informe_activo:
+            return
+        try:
+            escritos = self.medicion.guardar(ruta_informe, estado=self.estado, **datos)
+            self.log(f"Informe de la ejecución: {escritos[0]}", "INFO")
+            if len(escritos) > 1:
+                self.log(f"Perfil: {escritos[1]} (resumen en {escritos[2].name})", "INFO")
+        except Exception as e:
+            self.log(f"No se pudo guardar el informe de la ejecución: {e}", "WARN")
+
+    def configuracion_informe(self):
+        """Modos configurados, para el informe"""
+        return {
+            'lector': self.lector_control_pagos,
+            'procesos_lectura': procesos_lectura(self.procesos_lectura),
+            'copia': self.modo_copia,
+            'anexo': self.modo_anexo,
+            'duplicados': self.duplicados_anexo,
+            'motor_proyeccion': self.motor_proyeccion,
+            'cache': self.cache_libro is not None,
+        }
+
+    def crear_nombre_archivo(self, fecha):
+        """Crea nombre del archivo basado en fecha de proyección"""
+        dia = fecha.strftime('%d')
+        mes = fecha.strftime('%B').upper()
+        año = fecha.strftime('%Y')
+        return f"{dia} {mes} {año}.xlsx"
+
+    def ruta_proyeccion(self, fecha):
+        """Ruta del archivo de proyección de 'fecha' (sin crear carpetas)"""
+        return self.carpeta_proyeccion(fecha) / self.crear_nombre_archivo(fecha)
+
+    def crear_nombre_segunda_hoja(self, fecha):
+        """Crea nombre de segunda hoja: 'MES dia'"""
+        mes = fecha.strftime('%B').upper()
+        dia = fecha.strftime('%d')
+        return f"{mes} {dia}"
+    
+    def carpeta_proyeccion(self, fecha):
+        """Carpeta 'AÑO aaaa/MES' de la proyección de 'fecha' (sin crearla)"""
+        año_carpeta = f"AÑO {fecha.strftime('%Y')}"
+        mes_carpeta = fecha.strftime('%B').upper()
+        return self.ruta_intermedio / año_carpeta / mes_carpeta
+    
+    def crear_estructura_carpetas(self, fecha):
+        """Crea la estructura basada en fecha de proyección"""
+        carpeta_destino = self.carpeta_proyeccion(fecha)
+        carpeta_destino.mkdir(parents=True, exist_ok=True)
+        return carpeta_destino
+
+    def mostrar_todas_hojas(self, wb):
+        """
+        MÉTODO CRÍTICO: Muestra TODAS las hojas del workbook antes de copiar
+        Esto evita problemas con macros que ocultan hojas (Workbook_Open, etc)
+        """
+        self.log("Forzando visibilidad de TODAS las hojas...", "INFO")
+        try:
+            for sheet in wb.Sheets:
+                try:
+                    # xlSheetVisible = -1
+                    sheet.Visible = -1
+                    self.log(f"  - Hoja '{sheet.Name}' ahora visible", "INFO")
+                except Exception as e:
+                    self.log(f"  - No se pudo hacer visible '{sheet.Name}': {e}", "WARN")
+        except Exception as e:
+            self.log(f"Error al mostrar hojas: {e}", "WARN")
+
+    def copiar_archivo_base(self, ruta_destino):
+        """
+        SOLUCIÓN SIMPLE Y EFECTIVA:
+        1. Abrir archivo origen
+        2. Guardar como .xlsx (sin macros) → Copia TODO
+        3. Eliminar hojas innecesarias
+        4. Mantener solo Control_Pagos
+        Dentro de sesion_del_proceso() el libro nuevo queda abierto para las
+        etapas siguientes. Con [COPIA] Modo = ooxml se usa extraer_hoja_base().
+        """
+        if self.modo_copia == 'ooxml':
+            try:
+                return self.extraer_hoja_base(ruta_destino)
+            except Exception as e:
+                if not com_disponible():
+                    raise
+                self.log(f"No se pudo extraer la hoja ({e}); se copia con Excel", "WARN")
+        
+        self.log(f"Copiando archivo completo como .xlsx...", "PROCESO")
+        
+        try:
+            with self.usar_sesion_excel() as sesion:
+                # Abrir archivo origen
+                self.log(f"Abriendo archivo: {self.ruta_origen.name}", "INFO")
+                wb = sesion.abrir(self.ruta_origen, solo_lectura=True)
+                
+                # FORZAR visibilidad de todas las hojas ANTES de guardar
+                self.log("Haciendo visibles todas las hojas...", "INFO")
+                for sheet in wb.Sheets:
+                    try:
+                        sheet.Visible = -1  # xlSheetVisible
+                        self.log(f"  ✓ '{sheet.Name}' visible", "INFO")
+                    except Exception as e:
+                        self.log(f"  ⚠ No se pudo hacer visible '{sheet.Name}': {e}", "WARN")
+                
+                # Verificar que la hoja objetivo existe
+                hoja_encontrada = False
+                for sheet in wb.Sheets:
+                    if sheet.Name.lower() == self.nombre_primera_hoja.lower():
+                        hoja_encontrada = True
+                        self.log(f"✓ Hoja objetivo encontrada: '{sheet.Name}'", "OK")
+                        break
+                
+                if not hoja_encontrada:
+                    hojas = [s.Name for s in wb.Sheets]
+                    raise Exception(f"No se encontró hoja '{self.nombre_primera_hoja}'. Disponibles: {hojas}")
+                
+                # GUARDAR COMO .XLSX (esto copia TODO el contenido sin macros).
+                # El libro abierto pasa a ser el archivo nuevo: se limpia sin
+                # cerrarlo ni volver a abrirlo
+                self.log(f"Guardando como .xlsx: {Path(ruta_destino).name}", "INFO")
+                wb = sesion.guardar_como(wb, ruta_destino, FORMATO_XLSX)
+                self.log("✓ Archivo guardado como .xlsx", "OK")
+                
+                # ELIMINAR todas las hojas EXCEPTO la que necesitamos
+                self.log("Eliminando hojas innecesarias...", "INFO")
+                hojas_a_eliminar = []
+                for sheet in wb.Sheets:
+                    if sheet.Name.lower() != self.nombre_primera_hoja.lower():
+                        hojas_a_eliminar.append(sheet.Name)
+                
+                for nombre_hoja in hojas_a_eliminar:
+                    try:
+                        wb.Sheets(nombre_hoja).Delete()
+                        self.log(f"  ✓ Eliminada: '{nombre_hoja}'", "INFO")
+                    except Exception as e:
+                        self.log(f"  ⚠ No se pudo eliminar '{nombre_hoja}': {e}", "WARN")
+                
+                # Verificar que quedó solo la hoja correcta
+                if wb.Sheets.Count == 1:
+                    self.log(f"✓ Archivo limpio. Solo queda: '{wb.Sheets(1).Name}'", "OK")
+                else:
+                    self.log(f"⚠ Advertencia: Quedaron {wb.Sheets.Count} hojas", "WARN")
+                
+                # GUARDAR cambios (la lectura de la hoja se hace desde el disco)
+                sesion.guardar(wb)
+                self.log("✓ Cambios guardados", "OK")
+            
+            self.log("✓ Proceso de copia completado exitosamente", "OK")
+            
+        except Exception as e:
+            self.log(f"ERROR al copiar archivo: {e}", "ERROR")
+            import traceback
+            traceback.print_exc()
+            raise
+
+    def extraer_hoja_base(self, ruta_destino):
+        """Copia solo la hoja Control_Pagos desde el zip del archivo origen, sin abrir Excel"""
+        self.log(f"Extrayendo hoja '{self.nombre_primera_hoja}' de {self.ruta_origen.name}...", "PROCESO")
+        resumen = extraer_hoja(self.ruta_origen, ruta_destino, self.nombre_primera_hoja)
+        self.log(f"✓ Hoja extraída: {Path(ruta_destino).name} ({resumen['partes']} partes, "
+                 f"{resumen['cadenas']} textos)", "OK")
+        quitados = resumen['formulas_quitadas'] + resumen['reglas_quitadas'] + resumen['nombres_quitados']
+        if quitados:
+            self.log(f"  Se quitaron {resumen['formulas_quitadas']} fórmulas, {resumen['reglas_quitadas']} reglas y "
+                     f"{resumen['nombres_quitados']} nombres que apuntaban a otras hojas (quedan los valores)", "INFO")
+        if resumen['relaciones_omitidas']:
+            self.log(f"  Se omitieron {resumen['relaciones_omitidas']} tablas dinámicas/segmentaciones", "WARN")
+
+    def guardar_con_reintento(self, wb, ruta):
+        """Guarda un workbook; si está abierto, espera a que se libere (ver esperar_archivos_libres)"""
+        while True:
+            try:
+                wb.save(ruta)
+                return
+            except PermissionError:
+                self.log(f"EL ARCHIVO ESTÁ ABIERTO: {Path(ruta).name}", "WARN")
+                self.esperar_archivos_libres([lambda: sondear_archivo(ruta)])
+
+    def sondas_archivos(self, rutas_proyeccion):
+        """
+        Sondas de bloqueo de los archivos del proceso: el origen (lectura), las
+        proyecciones y sus carpetas, y el archivo final (escritura)
+        """
+        sondas = [lambda: sondear_archivo(self.ruta_origen, escritura=False)]
+        for carpeta in dict.fromkeys(Path(ruta).parent for ruta in rutas_proyeccion):
+            sondas.append(lambda carpeta=carpeta: sondear_carpeta(carpeta))
+        for ruta in rutas_proyeccion:
+            sondas.append(lambda ruta=ruta: sondear_archivo(ruta))
+        sondas.append(lambda: sondear_archivo(self.ruta_destino_final))
+        return sondas
+
+    def esperar_archivos_libres(self, sondas):
+        """
+        Espera sin ventanas a que las sondas no encuentren archivos abiertos
+        ([BLOQUEOS]). Si se cumple el tiempo máximo pregunta una vez si seguir
+        esperando; si no, lanza ArchivoBloqueado con quién tiene cada archivo.
+        Con [BLOQUEOS] Activo = no solo prueba una vez.
+        """
+        while True:
+            if self.espera_archivos is None:
+                bloqueos = [b for b in (sonda() for sonda in sondas) if b is not None]
+            else:
+                bloqueos = self.espera_archivos.esperar(sondas)
+            if not bloqueos:
+                return
+            detalle = "\n".join(f"  - {bloqueo.descripcion()}" for bloqueo in bloqueos)
+            if not self.reportero.reintentar(
+                "Archivo Abierto",
+                f"Estos archivos siguen abiertos:\n{detalle}\n\n¿Esperar a que se cierren?"
+            ):
+                raise ArchivoBloqueado(
+                    "Archivos abiertos: " + ", ".join(bloqueo.descripcion() for bloqueo in bloqueos)
+                )
+
+    def verificar_columnas_origen(self):
+        """
+        Revisa el encabezado de Control_Pagos en el archivo origen antes de
+        copiarlo o leerlo. Devuelve False (e informa qué falta) si no tiene las
+        columnas obligatorias; si no se puede revisar, el proceso sigue.
+        """
+        try:
+            Encabezado(leer_encabezado(self.ruta_origen, self.nombre_primera_hoja)).verificar(
+                hoja=self.nombre_primera_hoja)
+        except ColumnasFaltantes as e:
+            self.log(str(e), "ERROR")
+            self.reportero.error("Columnas faltantes", f"El archivo origen no tiene las columnas necesarias:\n\n{e}")
+            return False
+        except Exception as e:
+            self.log(f"No se pudo revisar el encabezado antes de copiar: {e}", "WARN")
+        return True
+
+    def leer_datos_control_pagos(self, ruta_archivo):
+        """Lee los datos del archivo de control de pagos - VERSIÓN CORREGIDA"""
+        if self.lector_control_pagos == 'streaming':
+            return self.leer_datos_streaming(ruta_archivo)
+        
+        try:
+            self.log(f"Leyendo hoja '{self.nombre_primera_hoja}'...", "PROCESO")
+            
+            # Leer con openpyxl
+            df = pd.read_excel(
+                ruta_archivo, 
+                sheet_name=self.nombre_primera_hoja, 
+                engine='openpyxl',
+                dtype=str  # CRÍTICO: Leer todo como string para evitar problemas
+            )
+            
+            # Nombres estándar (alias, mayúsculas y tildes) en una sola asignación
+            Encabezado(df.columns).aplicar(df)
+            
+            self.log(f"Columnas detectadas: {df.columns.tolist()[:5]}...", "INFO")
+            
+            # Verificar si el DataFrame está vacío
+            if df.empty:
+                self.log("El archivo leído no contiene datos.", "WARN")
+                return None
+            
+            self.log(f"Archivo leído: {len(df)} registros totales", "OK")
+            return df
+            
+        except Exception as e:
+            self.log(f"Error al leer el archivo: {str(e)}", "ERROR")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def leer_datos_streaming(self, ruta_archivo):
+        """Lee solo las columnas que usa el proceso, recorriendo la hoja en modo solo lectura"""
+        try:
+            self.log(f"Leyendo hoja '{self.nombre_primera_hoja}' (solo columnas necesarias)...", "PROCESO")
+            
+            df, col_fecha = leer_hoja_paralela(ruta_archivo, self.nombre_primera_hoja,
+                                               procesos=self.procesos_lectura, log=self.log)
+            
+            self.log(f"Columnas detectadas: {df.columns.tolist()}", "INFO")
+            faltantes = [col for col in COLUMNAS_REQUERIDAS if col not in df.columns]
+            if faltantes:
+                self.log(f"Columnas no encontradas en la hoja: {faltantes}", "WARN")
+            if col_fecha is None:
+                self.log(f"No se encontró columna de fecha. Buscado: {POSIBLES_COLUMNAS_FECHA}", "WARN")
+            
+            if df.empty:
+                self.log("El archivo leído no contiene datos.", "WARN")
+                return None
+            
+            self.log(f"Archivo leído: {len(df)} registros totales", "OK")
+            return df
+            
+        except Exception as e:
+            self.log(f"Error al leer el archivo: {str(e)}", "ERROR")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def obtener_datos_control_pagos(self, ruta_archivo):
+        """Devuelve los datos del libro desde la caché o, si el origen cambió, leyéndolo"""
+        if self.cache_libro:
+            try:
+                df = self.cache_libro.obtener(self.ruta_origen, variante=self.lector_control_pagos)
+                if df is not None:
+                    self.log(f"Datos tomados de la caché: {len(df)} registros (origen sin cambios)", "OK")
+                    return df
+            except Exception as e:
+                self.log(f"No se pudo usar la caché: {e}", "WARN")
+        
+        df = self.leer_datos_control_pagos(ruta_archivo)
+        
+        if df is not None and self.cache_libro:
+            try:
+                self.cache_libro.guardar(self.ruta_origen, df, variante=self.lector_control_pagos)
+            except Exception as e:
+                self.log(f"No se pudo guardar la caché: {e}", "WARN")
+        return df
+
+    def convertir_columna_fecha(self, df):
+        """
+        Normaliza los nombres de columnas y convierte la columna de fecha.
+        Devuelve el nombre de la columna de fecha, o None si no existe.
+        """
+        # Nombres estándar (los datos de la caché pueden venir de versiones anteriores)
+        encabezado = Encabezado(df.columns)
+        encabezado.aplicar(df)
+        
+        self.log(f"Columnas disponibles: {df.columns.tolist()}", "INFO")
+        
+        col_fecha = encabezado.col_fecha
+        if col_fecha:
+            self.log(f"Usando columna de fecha: '{col_fecha}'", "INFO")
+            
+            # Convertir a datetime (cada forma de fecha con su formato fijo)
+            df[col_fecha], conteos = normalizar_fechas(df[col_fecha])
+            formas = {forma: n for forma, n in conteos.items()
+                      if forma not in ('vacios', 'no_interpretables', 'muestra') and n}
+            self.log(f"Formas de fecha en '{col_fecha}': {formas}", "INFO")
+            if conteos['no_interpretables']:
+                self.log(f"Fechas no interpretables: {conteos['no_interpretables']} "
+                         f"(ej. {conteos['muestra']})", "WARN")
+        else:
+            self.log(f"No se encontró columna de fecha compatible. Buscado: {POSIBLES_COLUMNAS_FECHA}", "ERROR")
+        
+        return col_fecha
+
+    def filtrar_por_fecha(self, df, fecha_filtrado):
+        """Filtra registros por fecha de proyección - VERSIÓN CORREGIDA"""
+        self.log(f"Filtrando por fecha de proyección: {fecha_filtrado}", "PROCESO")
+        
+        col_fecha = self.convertir_columna_fecha(df)
+        
+        if col_fecha:
+            fecha_referencia = fecha_filtrado.date() if isinstance(fecha_filtrado, datetime) else fecha_filtrado
+            
+            # Calcular rango de la semana (Lunes a Domingo)
+            inicio_semana = fecha_referencia - timedelta(days=fecha_referencia.weekday())
+            fin_semana = inicio_semana + timedelta(days=6)
+            
+            self.log(f"Rango de semana calculado: {inicio_semana} al {fin_semana}", "INFO")
+            
+            # Conteo pre-filtro
+            total_registros = len(df)
+            
+            # Registros con fecha válida
+            df_con_fecha = df.dropna(subset=[col_fecha])
+            registros_con_fecha = len(df_con_fecha)
+            
+            # Filtrar por RANGO DE FECHA (Semana completa)
+            df_fecha_match = df_con_fecha[
+                (df_con_fecha[col_fecha].dt.date >= inicio_semana) & 
+                (df_con_fecha[col_fecha].dt.date <= fin_semana)
+            ]
+            registros_fecha_match = len(df_fecha_match)
+            
+            self.log(f"Registros totales: {total_registros}", "INFO")
+            self.log(f"Registros con fecha válida en '{col_fecha}': {registros_con_fecha}", "INFO")
+            self.log(f"Registros en la semana ({inicio_semana} - {fin_semana}): {registros_fecha_match}", "INFO")
+            
+            if registros_fecha_match == 0:
+                # Mostrar muestra de fechas para diagnóstico
+                muestra_fechas = df_con_fecha[col_fecha].dt.date.unique()[:5]
+                self.log(f"Muestra de fechas en el archivo: {muestra_fechas}", "WARN")
+                return pd.DataFrame()
+
+            return self.filtrar_por_estado(df_fecha_match)
+        else:
+            return pd.DataFrame()
+
+    def filtrar_por_estado(self, df_fecha_match, es_pagar=None):
+        """
+        Deja los registros con estado 'PAGAR'; si no hay ninguno, todos los de la fecha.
+        'es_pagar' permite pasar la máscara ya evaluada durante la lectura.
+        """
+        registros_fecha_match = len(df_fecha_match)
+        
+        # Filtrar por estado si existe
+        if 'ESTADO' in df_fecha_match.columns:
+            if es_pagar is None:
+                estado_norm = df_fecha_match['ESTADO'].astype(str).str.upper().str.strip()
+                es_pagar = estado_norm.str.contains('PAGAR', na=False)
+            es_pagar = np.asarray(es_pagar, dtype=bool)
+            
+            # Filtrar donde contenga 'PAGAR'
+            df_filtrado = df_fecha_match[es_pagar].copy()
+            
+            registros_finales = len(df_filtrado)
+            self.log(f"Registros tras filtro de estado ('PAGAR'): {registros_finales}", "INFO")
+            
+            if registros_finales == 0 and registros_fecha_match > 0:
+                estados_encontrados = df_fecha_match['ESTADO'].unique()
+                self.log(f"Estados encontrados: {estados_encontrados}", "WARN")
+                self.log("⚠️ No se encontraron registros con estado 'PAGAR'. Se incluirán todos los de la fecha.", "WARN")
+                df_filtrado = df_fecha_match.copy()
+                
+            return df_filtrado
+        else:
+            self.log("No se encontró columna 'ESTADO', retornando todos los registros de la fecha", "WARN")
+            return df_fecha_match
+
+    def leer_y_filtrar_semana(self, ruta_archivo, fecha_filtrado):
+        """
+        Lee la hoja aplicando el filtro de semana y estado durante el recorrido:
+        solo se guardan en memoria los registros de la semana proyectada
+        """
+        self.log(f"Leyendo hoja '{self.nombre_primera_hoja}' filtrando por semana de {fecha_filtrado}...", "PROCESO")
+        
+        try:
+            resultado = leer_semana_filtrada(ruta_archivo, self.nombre_primera_hoja, fecha_filtrado)
+        except Exception as e:
+            self.log(f"Error al leer el archivo: {str(e)}", "ERROR")
+            import traceback
+            traceback.print_exc()
+            return None
+        
+        df_fecha_match = resultado.df_semana
+        self.log(f"Columnas disponibles: {df_fecha_match.columns.tolist()}", "INFO")
+        
+        col_fecha = resultado.col_fecha
+        if not col_fecha:
+            self.log(f"No se encontró columna de fecha compatible. Buscado: {POSIBLES_COLUMNAS_FECHA}", "ERROR")
+            return pd.DataFrame()
+        
+        self.log(f"Usando columna de fecha: '{col_fecha}'", "INFO")
+        self.log(f"Rango de semana calculado: {resultado.inicio} al {resultado.fin}", "INFO")
+        self.log(f"Registros totales: {resultado.total}", "INFO")
+        self.log(f"Registros con fecha válida en '{col_fecha}': {resultado.con_fecha}", "INFO")
+        self.log(f"Registros en la semana ({resultado.inicio} - {resultado.fin}): {len(df_fecha_match)}", "INFO")
+        
+        if len(df_fecha_match) == 0:
+            # Mostrar muestra de fechas para diagnóstico
+            muestra_fechas = np.array(resultado.muestra_fechas, dtype=object)
+            self.log(f"Muestra de fechas en el archivo: {muestra_fechas}", "WARN")
+            return pd.DataFrame()
+        
+        return self.filtrar_por_estado(df_fecha_match, resultado.es_pagar)
+
+    def preparar_datos_segunda_hoja(self, df_filtrado):
+        """Prepara dataframe para la segunda hoja"""
+        self.log(f"Preparando datos para proyección...", "PROCESO")
+        
+        # Las columnas ya tienen los nombres del esquema; las que falten quedan vacías
+        return df_filtrado.reindex(columns=COLUMNAS_REQUERIDAS, fill_value='')
+
+    def agrupar_y_calcular(self, df, fecha_proyeccion=None):
+        """
+        Agrupa y calcula totales.
+        La columna _TIPO_FILA (DETALLE/TOTAL/VACIA) se conserva para aplicar
+        los formatos por bloques al guardar la proyección.
+        Con [PROYECCION] TotalesPorMoneda los subtotales no mezclan monedas, y
+        con TotalUSD y una tabla de tasas se agrega un total general en USD.
+        """
+        self.log(f"Agrupando registros...", "PROCESO")
+        factores_usd = None
+        if self.total_usd_proyeccion and self.tasas_cambio is not None:
+            factores_usd = self.tasas_cambio.factores(df['MONEDA'], fecha_proyeccion or self.fecha_filtrado)
+        return agrupar_y_calcular(df, por_moneda=self.totales_por_moneda, factores_usd=factores_usd)
+
+    def calcular_proyeccion(self, ruta_archivo):
+        """
+        Proyección agrupada de la semana de fecha_filtrado sin copiar ni escribir
+        nada (modo vigilancia). None si no hay registros.
+        """
+        if self.lector_control_pagos == 'filtrado':
+            df_filtrado = self.leer_y_filtrar_semana(ruta_archivo, self.fecha_filtrado)
+        else:
+            df_original = self.obtener_datos_control_pagos(ruta_archivo)
+            df_filtrado = self.filtrar_por_fecha(df_original, self.fecha_filtrado) if df_original is not None else None
+        if df_filtrado is None or len(df_filtrado) == 0:
+            return None
+        return self.agrupar_y_calcular(self.preparar_datos_segunda_hoja(df_filtrado))
+
+    def guardar_proyeccion(self, ruta_archivo, df_datos, nombre_hoja, motor=None):
+        """Guarda la proyección con el motor configurado (COM u openpyxl)"""
+        motor = motor or self.motor_proyeccion
+        self.log(f"Guardando proyección ({motor})...", "PROCESO")
+        
+        try:
+            # La sesión no inicia Excel si el motor no lo usa
+            with self.usar_sesion_excel() as sesion:
+                escritor = crear_escritor(motor, log=self.log, sesion=sesion)
+                if escritor.nombre != 'com':
+                    # Si Excel tiene el archivo abierto desde la copia, se libera
+                    # para que otro motor pueda escribirlo (ya está guardado)
+                    sesion.cerrar(ruta_archivo)
+                escritor.guardar(ruta_archivo, df_datos, nombre_hoja)
+            self.log(f"Proyección guardada correctamente", "OK")
+        except Exception as e:
+            self.log(f"Error en proyección: {str(e)}", "ERROR")
+            raise e
+
+    def guardar_proyeccion_com(self, ruta_archivo, df_datos, nombre_hoja):
+        """Guarda la proyección usando COM"""
+        self.guardar_proyeccion(ruta_archivo, df_datos, nombre_hoja, motor='com')
+
+    def anexar_archivo_final(self, df_detalle):
+        """
+        Anexa registros al archivo final. Los que ya están en el índice de
+        duplicados se omiten o se informan según [ANEXO] Duplicados.
+        """
+        # Pudo abrirse mientras corrían las etapas anteriores
+        self.esperar_archivos_libres([lambda: sondear_archivo(self.ruta_destino_final)])
+        estado_anterior = estado_archivo(self.ruta_destino_final) if self.ruta_destino_final.exists() else None
+        indice = self.abrir_indice_duplicados()
+        if indice is None:
+            self.anexar_segun_modo(df_detalle)
+            self.registrar_en_historial(df_detalle, estado_anterior)
+            return
+
+        with indice:
+            try:
+                df_nuevos, df_repetidos = indice.separar(df_detalle)
+            except Exception as e:
+                self.log(f"No se pudo consultar el índice de duplicados: {e}", "WARN")
+                self.anexar_segun_modo(df_detalle)
+                self.registrar_en_historial(df_detalle, estado_anterior)
+                return
+
+            if len(df_repetidos):
+                if self.duplicados_anexo == 'avisar':
+                    self.log(f"{len(df_repetidos)} registros ya estaban en el archivo final; se anexan igual", "WARN")
+                    df_nuevos = df_detalle
+                else:
+                    self.log(f"Se omiten {len(df_repetidos)} registros que ya estaban en el archivo final", "WARN")
+                    for _, fila in df_repetidos.head(5).iterrows():
+                        self.log(f"  {fila['FECHA DE PAGO']} | {fila['PROVEEDOR']} | {fila['# IMPORTACION']} | "
+                                 f"{fila['VALOR MONEDA ORIGEN']} {fila['MONEDA']}", "INFO")
+                    if df_nuevos.empty:
+                        self.log("No hay registros nuevos para el archivo final", "OK")
+                        return
+
+            self.anexar_segun_modo(df_nuevos)
+            try:
+                indice.registrar(df_nuevos)
+            except Exception as e:
+                self.log(f"No se pudo actualizar el índice de duplicados: {e}", "WARN")
+            self.registrar_en_historial(df_nuevos, estado_anterior)
+
+    def abrir_historial(self):
+        """Historial local de registros, o None si [HISTORIAL] Activo = no"""
+        return HistorialPagos(self.ruta_historial, log=self.log) if self.ruta_historial else None
+
+    def registrar_en_historial(self, df_final, estado_anterior=None):
+        """
+        Copia al historial local los registros recién anexados (un error solo se
+        informa). 'estado_anterior' es el del archivo final antes del anexo.
+        """
+        if self.ruta_historial is None or df_final.empty or not self.ruta_destino_final.exists():
+            return
+        try:
+            with self.abrir_historial() as historial:
+                historial.registrar(df_final, ruta_final=self.ruta_destino_final, estado_anterior=estado_anterior)
+        except Exception as e:
+            self.log(f"No se pudo actualizar el historial local: {e}", "WARN")
+
+    def abrir_indice_duplicados(self):
+        """Índice de registros del archivo final al día, o None si está desactivado o no se puede usar"""
+        if self.duplicados_anexo == 'no' or not self.ruta_destino_final.exists():
+            return None
+        indice = IndiceDuplicados(self.ruta_destino_final, log=self.log)
+        try:
+            indice.preparar()
+            return indice
+        except Exception as e:
+            indice.cerrar()
+            self.log(f"Índice de duplicados no disponible ({e}); se anexa sin verificar", "WARN")
+            return None
+
+    def anexar_segun_modo(self, df_detalle):
+        """
+        Con [ANEXO] Modo = ooxml se editan las partes del zip
+        (anexar_archivo_final_ooxml); si falla por algo distinto a un bloqueo
+        y hay Excel, se usa COM.
+        """
+        if self.modo_anexo == 'ooxml':
+            try:
+                return self.anexar_archivo_final_ooxml(df_detalle)
+            except Exception as e:
+                if es_archivo_bloqueado(e) or not com_disponible():
+                    raise
+                self.log(f"No se pudo anexar directamente ({e}); se anexa con Excel", "WARN")
+        return self.anexar_archivo_final_com(df_detalle)
+
+    def anexar_archivo_final_ooxml(self, df_detalle):
+        """Anexa registros al archivo final sin abrirlo completo: solo se reescribe el final de la hoja"""
+        self.log(f"Anexando al archivo final...", "PROCESO")
+
+        if not self.ruta_destino_final.exists():
+            self.log("Archivo final no existe", "ERROR")
+            return
+
+        # Excel crea un archivo de propietario '~$...' mientras tiene el libro abierto
+        bloqueo = sondear_archivo(self.ruta_destino_final)
+        if bloqueo is not None:
+            raise ArchivoBloqueado(f"Archivo abierto: {bloqueo.descripcion()}")
+
+        datos = df_detalle.fillna("").values.tolist()
+        if not datos:
+            return
+
+        try:
+            resumen = anexar_filas(self.ruta_destino_final, datos)
+        except Exception as e:
+            self.log(f"Error en archivo final: {str(e)}", "ERROR")
+            raise e
+
+        if resumen['tabla']:
+            self.log(f"Tabla expandida correctamente ({resumen['tabla']})", "OK")
+        self.log(f"Registros anexados exitosamente (filas {resumen['fila_inicio']} a {resumen['fila_fin']} "
+                 f"de '{resumen['hoja']}')", "OK")
+
+    def anexar_archivo_final_com(self, df_detalle):
+        """Anexa registros al archivo final"""
+        self.log(f"Anexando al archivo final...", "PROCESO")
+        
+        if not self.ruta_destino_final.exists():
+            self.log("Archivo final no existe", "ERROR")
+            return
+
+        try:
+            with self.usar_sesion_excel() as sesion:
+                wb = sesion.abrir(self.ruta_destino_final)
+                
+                # Buscar hoja
+                ws = None
+                for sheet in wb.Sheets:
+                    sheet.Visible = -1
+                    if sheet.Name.lower() in ["pagos importación", "pagos importacion"]:
+                        ws = sheet
+                        break
+                
+                if not ws:
+                    ws = wb.ActiveSheet
+                
+                # Preparar datos
+                datos = df_detalle.fillna("").values.tolist()
+                num_nuevas_filas = len(datos)
+                if num_nuevas_filas == 0:
+                    sesion.cerrar(wb)
+                    return
+                
+                # Encontrar última fila
+                last_row = ws.Cells(ws.Rows.Count, 1).End(-4162).Row
+                start_row = last_row + 1
+                
+                # Escribir datos
+                filas = len(datos)
+                columnas = len(datos[0])
+                rango_dest = ws.Range(ws.Cells(start_row, 1), ws.Cells(start_row + filas - 1, columnas))
+                rango_dest.Value = datos
+                
+                # Expandir tabla si existe
+                if ws.ListObjects.Count > 0:
+                    tbl = ws.ListObjects(1)
+                    rango_tbl_header = tbl.HeaderRowRange
+                    fila_inicio = rango_tbl_header.Row
+                    col_inicio = rango_tbl_header.Column
+                    
+                    nuevo_rango_str = f"{ws.Cells(fila_inicio, col_inicio).Address}:{ws.Cells(start_row + filas - 1, columnas).Address}"
+                    
+                    try:
+                        tbl.Resize(ws.Range(nuevo_rango_str))
+                        self.log("Tabla expandida correctamente", "OK")
+                    except Exception as e:
+                        self.log(f"No se pudo redimensionar tabla: {e}", "WARN")
+                
+                sesion.guardar(wb)
+                sesion.cerrar(wb)
+                self.log("Registros anexados exitosamente", "OK")
+            
+        except Exception as e:
+            self.log(f"Error en archivo final: {str(e)}", "ERROR")
+            raise e
+            
+    def preparar_df_final(self, df_detalle, fecha_proyeccion=None):
+        """
+        Prepara DataFrame final en una sola construcción por columnas. USD lleva
+        factor 1; las demás monedas, el de la tabla de tasas si hay ([TASAS]),
+        o quedan vacías.
+        """
+        fecha_proyeccion = fecha_proyeccion or self.fecha_filtrado
+        n = len(df_detalle)
+
+        moneda = df_detalle['MONEDA']
+        valor = df_detalle['VALOR A PAGAR']
+        es_usd = moneda.astype(str).str.upper().eq('USD').to_numpy()
+
+        valor_usd = np.full(n, '', dtype=object)
+        valor_usd[es_usd] = valor.to_numpy(dtype=object)[es_usd]
+        factor = np.full(n, '', dtype=object)
+        factor[es_usd] = 1
+
+        tasas = self.tasas_cambio
+        if tasas is not None and not es_usd.all():
+            factores = tasas.factores(moneda, fecha_proyeccion)
+            montos = pd.to_numeric(valor, errors='coerce').to_numpy(dtype=float) * factores
+            con_tasa = ~es_usd & np.isfinite(montos)
+            factor[con_tasa] = factores[con_tasa].tolist()
+            valor_usd[con_tasa] = np.round(montos[con_tasa], 2).tolist()
+
+        return pd.DataFrame({
+            'IMPORTADOR': df_detalle['IMPORTADOR'],
+            'MARCA': df_detalle['MARCA'],
+            'FECHA DE PAGO': fecha_proyeccion.strftime('%d/%m/%Y'),
+            'DIA': fecha_proyeccion.day,
+            'MES': fecha_proyeccion.month,
+            'AÑO': fecha_proyeccion.year,
+            'PROVEEDOR': df_detalle['PROVEEDOR'],
+            '# IMPORTACION': df_detalle['NRO. IMPO'],
+            'VALOR MONEDA ORIGEN': valor,
+            'MONEDA': moneda,
+            'VALOR USD': valor_usd,
+            'FACTOR DE CONVERSION': factor,
+            **COLUMNAS_FIJAS_FINAL,
+        }, index=df_detalle.index)
+
+    @property
+    def tasas_cambio(self):
+        """Tabla de tasas de [TASAS] Archivo (se lee una vez); None si no hay o no se puede leer"""
+        if self._tasas_cambio is None and self.ruta_tasas:
+            try:
+                self._tasas_cambio = TablaTasas.desde_archivo(self.ruta_tasas, dias_maximos=self.dias_tasas)
+                self.log(f"Tasas de cambio: {self.ruta_tasas.name} ({len(self._tasas_cambio.df)} tasas)", "INFO")
+            except Exception as e:
+                self.log(f"No se pudo leer la tabla de tasas ({e}); solo USD tendrá factor", "WARN")
+                self.ruta_tasas = None
+        return self._tasas_cambio
+
+    def detectar_cambios(self, df_original):
+        """
+        Huellas de las filas leídas (con la fecha ya convertida) y cambios frente
+        a la ejecución anterior. Devuelve el CambiosLibro o None si no hay registro.
+        """
+        if self.ruta_cambios is None:
+            return None
+        self.filas_libro = huellas_filas(df_original, Encabezado(df_original.columns).col_fecha)
+        anterior = RegistroCambios(self.ruta_cambios, log=self.log).leer()
+        if anterior is None or anterior.get('origen') != str(self.ruta_origen):
+            self.log("Sin registro de la ejecución anterior: se procesan todas las filas", "INFO")
+            return None
+        filas_anteriores = anterior.pop('filas')
+        self.cambios_libro = comparar_filas(filas_anteriores, self.filas_libro, anterior)
+        conteos = self.cambios_libro.como_dict()
+        self.log(f"Cambios desde la ejecución anterior ({anterior.get('guardado')}): {conteos['insertadas']} "
+                 f"filas nuevas, {conteos['actualizadas']} modificadas, {conteos['eliminadas']} eliminadas", "INFO")
+        return self.cambios_libro
+
+    def registros_a_anexar(self, df_detalle):
+        """
+        Registros de la semana que se anexan. Si la ejecución anterior fue de la
+        misma fecha, terminó su anexo y el archivo final no cambió desde
+        entonces, solo los que no están entre los anexados; si no, todos. Los
+        anexados que cambiaron después no se anexan otra vez (su versión
+        anterior está en el archivo final): se informan para corregirlos a mano.
+        """
+        self.etiquetas_anexo = df_detalle.index
+        if self.cambios_libro is None:
+            return df_detalle
+        anterior = self.cambios_libro.anterior
+        archivo_final = estado_archivo(self.ruta_destino_final) if self.ruta_destino_final.exists() else None
+        if not (anterior.get('fecha_proyeccion') == self.fecha_filtrado.strftime('%Y-%m-%d')
+                and anterior.get('anexo_completo') and anterior.get('anexadas') is not None
+                and anterior.get('archivo_final') == archivo_final):
+            return df_detalle
+        self.anexadas_previas = anterior['anexadas']
+        sin_anexar, modificadas = separar_anexadas(self.filas_libro.loc[df_detalle.index], self.anexadas_previas)
+        df_nuevos = df_detalle.loc[sin_anexar]
+        self.etiquetas_anexo = df_nuevos.index
+        self.log(f"Anexo incremental: {len(df_nuevos)} de {len(df_detalle)} registros de la semana no se anexaron "
+                 f"en la ejecución anterior", "INFO")
+        if len(modificadas):
+            self.cambios_libro.omitidas = modificadas
+            self.log(f"{len(modificadas)} registros de la semana cambiaron después de anexarse; no se anexan otra "
+                     f"vez: corrija su versión anterior a mano en {self.ruta_destino_final.name}", "WARN")
+            for _, fila in df_detalle.loc[modificadas].head(5).iterrows():
+                self.log(f"  {fila['PROVEEDOR']} | {fila['NRO. IMPO']} | {fila['VALOR A PAGAR']} {fila['MONEDA']}",
+                         "INFO")
+        return df_nuevos
+
+    def guardar_registro_cambios(self):
+        """Guarda las huellas de las filas leídas y de las anexadas para la ejecución siguiente"""
+        if self.filas_libro is None or self.ruta_cambios is None:
+            return
+        anexadas = None
+        if self.anexo_completo and self.etiquetas_anexo is not None:
+            anexadas = acumular_anexadas(self.anexadas_previas, self.filas_libro.loc[self.etiquetas_anexo])
+        try:
+            RegistroCambios(self.ruta_cambios, log=self.log).guardar(
+                self.filas_libro,
+                origen=str(self.ruta_origen),
+                fecha_proyeccion=self.fecha_filtrado.strftime('%Y-%m-%d'),
+                anexo_completo=self.anexo_completo,
+                anexadas=anexadas,
+                archivo_final=estado_archivo(self.ruta_destino_final) if self.ruta_destino_final.exists() else None,
+            )
+        except Exception as e:
+            self.log(f"No se pudo guardar el registro de cambios: {e}", "WARN")
+
+    def agregar_a_archivo_final(self, df_detalle):
+        """Agrega registros al archivo final"""
+        try:
+            with self.medicion.etapa('archivo_final'):
+                df_final = self.preparar_df_final(df_detalle)
+            self.anexar_archivo_final(df_final)
+            self.anexo_completo = True
+        except Exception as e:
+            self.log(f"Error en proceso final: {str(e)}", "ERROR")
+            self.estado = ESTADO_BLOQUEADO if es_archivo_bloqueado(e) else ESTADO_ERROR
+            self.error_anexo = str(e)
+
+    def ejecutar_lote(self, fechas_proyeccion, procesos=None):
+        """
+        Proyecta varias semanas en una ejecución: una copia del archivo base, una
+        lectura del libro y un reparto por semana; los archivos semanales se
+        escriben en procesos paralelos. Devuelve {fecha: ruta o None} y deja
+        el resultado general en self.estado.
+        """
+        print("\n" + "="*80)
+        print("    AUTOMATIZACIÓN DE CONTROL DE PAGOS - PROYECCIÓN POR LOTE")
+        print("="*80 + "\n")
+        
+        self.estado = ESTADO_ERROR
+        self.iniciar_medicion()
+        resultados = {fecha: None for fecha in fechas_proyeccion}
+        if not fechas_proyeccion:
+            self.log("No hay fechas para proyectar", "WARN")
+            return resultados
+        
+        if not self.ruta_origen.exists():
+            self.log(f"No se encuentra el archivo original: {self.ruta_origen}", "ERROR")
+            return resultados
+        
+        # Ninguna etapa costosa empieza hasta que todos los archivos estén libres
+        try:
+            with self.medicion.etapa('bloqueos'):
+                self.esperar_archivos_libres(self.sondas_archivos([self.ruta_proyeccion(f) for f in fechas_proyeccion]))
+        except ArchivoBloqueado as e:
+            self.log(str(e), "ERROR")
+            self.estado = ESTADO_BLOQUEADO
+            return resultados
+        
+        with self.medicion.etapa('encabezado'):
+            if not self.verificar_columnas_origen():
+                return resultados
+        
+        self.log(f"Semanas a proyectar: {', '.join(f.strftime('%d/%m/%Y') for f in fechas_proyeccion)}", "INFO")
+        
+        # Una sola copia del archivo base; las demás semanas son copias de esta
+        rutas = {}
+        for fecha in fechas_proyeccion:
+            rutas[fecha] = self.crear_estructura_carpetas(fecha) / self.crear_nombre_archivo(fecha)
+        
+        ruta_base = rutas[fechas_proyeccion[0]]
+        try:
+            with self.sesion_del_proceso():
+                return self._ejecutar_lote(fechas_proyeccion, rutas, resultados, procesos)
+        finally:
+            self.guardar_informe(
+                ruta_base.with_name(f"{ruta_base.stem} (lote).informe.json"),
+                fechas_proyeccion=[fecha.strftime('%Y-%m-%d') for fecha in fechas_proyeccion],
+                proyecciones={fecha.strftime('%Y-%m-%d'): ruta for fecha, ruta in resultados.items()},
+                archivo_final=str(self.ruta_destino_final),
+                configuracion=self.configuracion_informe(),
+            )
+
+    def _ejecutar_lote(self, fechas_proyeccion, rutas, resultados, procesos):
+        ruta_base = rutas[fechas_proyeccion[0]]
+        with self.etapa('copia'):
+            self.copiar_archivo_base(ruta_base)
+            # Los procesos de escritura abren sus propios Excel: se libera la copia
+            self.sesion_excel.cerrar(ruta_base)
+            for fecha in fechas_proyeccion[1:]:
+                shutil.copyfile(ruta_base, rutas[fecha])
+        
+        # Una sola lectura y un solo reparto por semana ISO
+        with self.etapa('lectura') as etapa:
+            df_original = self.obtener_datos_control_pagos(ruta_base)
+            if df_original is None:
+                return resultados
+            etapa.filas = len(df_original)
+        
+        with self.etapa('filtro') as etapa:
+            col_fecha = self.convertir_columna_fecha(df_original)
+            if not col_fecha:
+                return resultados
+            
+            self.log(f"Registros totales: {len(df_original)}", "INFO")
+            semanas = dividir_por_semana(df_original, col_fecha)
+            etapa.filas = sum(len(semanas[semana_iso(fecha)]) for fecha in fechas_proyeccion
+                              if semana_iso(fecha) in semanas)
+        
+        with self.etapa('agrupacion') as etapa:
+            tareas = []
+            detalles = []
+            for fecha in fechas_proyeccion:
+                df_semana = semanas.get(semana_iso(fecha))
+                inicio_semana = fecha.date() - timedelta(days=fecha.weekday())
+                fin_semana = inicio_semana + timedelta(days=6)
+                
+                if df_semana is None or df_semana.empty:
+                    self.log(f"Sin registros en la semana ({inicio_semana} - {fin_semana})", "WARN")
+                    continue
+                
+                self.log(f"Registros en la semana ({inicio_semana} - {fin_semana}): {len(df_semana)}", "INFO")
+                df_filtrado = self.filtrar_por_estado(df_semana)
+                df_segunda = self.preparar_datos_segunda_hoja(df_filtrado)
+                df_agrupado = self.agrupar_y_calcular(df_segunda, fecha)
+                
+                tareas.append((rutas[fecha], df_agrupado, self.crear_nombre_segunda_hoja(fecha), self.motor_proyeccion))
+                detalles.append((fecha, df_segunda))
+            etapa.filas = sum(len(tarea[1]) for tarea in tareas)
+        
+        if not tareas:
+            self.estado = ESTADO_SIN_REGISTROS
+            return resultados
+        
+        with self.etapa('escritura') as etapa:
+            escritos = escribir_proyecciones(tareas, procesos=procesos, log=self.log)
+            etapa.filas = sum(len(tarea[1]) for tarea in tareas)
+        errores = [error for error in escritos.values() if error]
+        if any(es_archivo_bloqueado(error) for error in errores):
+            self.estado = ESTADO_BLOQUEADO
+        elif errores:
+            self.estado = ESTADO_ERROR
+        elif len(tareas) < len(fechas_proyeccion):
+            self.estado = ESTADO_SIN_REGISTROS
+        else:
+            self.estado = ESTADO_OK
+        
+        # El archivo final se actualiza una sola vez, en orden de fecha
+        df_final = []
+        with self.medicion.etapa('archivo_final'):
+            for fecha, df_segunda in detalles:
+                if escritos.get(str(rutas[fecha])) is None:
+                    resultados[fecha] = str(rutas[fecha])
+                    df_final.append(self.preparar_df_final(df_segunda, fecha))
+        
+        with self.etapa('anexo') as etapa:
+            if df_final:
+                df_anexo = pd.concat(df_final, ignore_index=True)
+                etapa.filas = len(df_anexo)
+                try:
+                    self.anexar_archivo_final(df_anexo)
+                except Exception as e:
+                    self.log(f"Error en proceso final: {str(e)}", "ERROR")
+                    self.estado = ESTADO_BLOQUEADO if es_archivo_bloqueado(e) else ESTADO_ERROR
+        
+        print("\n" + "="*80)
+        self.reportero.etapa(ETAPA_FIN)
+        print(f"LOTE COMPLETADO: {len(df_final)} de {len(fechas_proyeccion)} semanas proyectadas")
+        print("="*80)
+        return resultados
+
+    def ejecutar_proceso(self):
+        """Ejecuta el proceso completo"""
+        print("\n" + "="*80)
+        print("    AUTOMATIZACIÓN DE CONTROL DE PAGOS - VERSIÓN 2.0 CORREGIDA")
+        print("="*80 + "\n")
+        
+        self.estado = ESTADO_ERROR
+        self.huella_proyeccion = None
+        self.filas_libro = None
+        self.cambios_libro = None
+        self.anexo_completo = False
+        self.anexadas_previas = None
+        self.etiquetas_anexo = None
+        self.error_anexo = None
+        self.iniciar_medicion()
+        ruta_archivo_nuevo = None
+        try:
+            if not self.ruta_origen.exists():
+                self.log(f"No se encuentra el archivo original", "ERROR")
+                self.reportero.error("Error", f"No se encuentra el archivo:\n{self.ruta_origen}")
+                return None
+            
+            # Ninguna etapa costosa empieza hasta que todos los archivos estén libres
+            with self.medicion.etapa('bloqueos'):
+                self.esperar_archivos_libres(self.sondas_archivos([self.ruta_proyeccion(self.fecha_filtrado)]))
+            
+            with self.medicion.etapa('encabezado'):
+                if not self.verificar_columnas_origen():
+                    return None
+            
+            fecha_proyeccion = self.fecha_filtrado
+            self.log(f"Fecha de proyección: {fecha_proyeccion.strftime('%d/%m/%Y')}", "INFO")
+            
+            carpeta_destino = self.crear_estructura_carpetas(fecha_proyeccion)
+            nombre_archivo = self.crear_nombre_archivo(fecha_proyeccion)
+            ruta_archivo_nuevo = carpeta_destino / nombre_archivo
+            
+            # Una sola instancia de Excel para copia, proyección y archivo final
+            with self.sesion_del_proceso():
+                with self.etapa('copia'):
+                    self.copiar_archivo_base(ruta_archivo_nuevo)
+            
+                with self.etapa('lectura') as etapa:
+                    if self.lector_control_pagos == 'filtrado':
+                        df_filtrado = self.leer_y_filtrar_semana(ruta_archivo_nuevo, fecha_proyeccion)
+                        if df_filtrado is None:
+                            return None
+                        etapa.filas = len(df_filtrado)
+                        if self.ruta_cambios is not None:
+                            self.log("Con [LECTURA] Lector = filtrado no se comparan las filas con la ejecución "
+                                     "anterior: se anexan todos los registros de la semana", "WARN")
+                    else:
+                        df_original = self.obtener_datos_control_pagos(ruta_archivo_nuevo)
+                        if df_original is None:
+                            return None
+                        etapa.filas = len(df_original)
+                
+                if self.lector_control_pagos != 'filtrado':
+                    with self.etapa('filtro') as etapa:
+                        df_filtrado = self.filtrar_por_fecha(df_original, fecha_proyeccion)
+                        etapa.filas = len(df_filtrado)
+                    with self.medicion.etapa('cambios') as etapa:
+                        cambios = self.detectar_cambios(df_original)
+                        etapa.filas = len(cambios.etiquetas) if cambios else None
+            
+                if len(df_filtrado) == 0:
+                    self.log("No se encontraron registros", "WARN")
+                    self.estado = ESTADO_SIN_REGISTROS
+                    self.reportero.advertencia("Sin registros", "No se encontraron registros para la fecha seleccionada.")
+                    return
+            
+                with self.etapa('agrupacion') as etapa:
+                    df_segunda = self.preparar_datos_segunda_hoja(df_filtrado)
+                    df_agrupado = self.agrupar_y_calcular(df_segunda)
+                    self.huella_proyeccion = huella_proyeccion(df_agrupado)
+                    etapa.filas = len(df_agrupado)
+            
+                nombre_segunda_hoja = self.crear_nombre_segunda_hoja(fecha_proyeccion)
+            
+                with self.etapa('escritura') as etapa:
+                    self.guardar_proyeccion(ruta_archivo_nuevo, df_agrupado, nombre_segunda_hoja)
+                    etapa.filas = len(df_agrupado)
+            
+                self.estado = ESTADO_OK
+                with self.etapa('anexo') as etapa:
+                    df_anexo = self.registros_a_anexar(df_segunda)
+                    if len(df_anexo):
+                        self.agregar_a_archivo_final(df_anexo)
+                    else:
+                        self.log("No hay registros nuevos de la semana para anexar", "OK")
+                        self.anexo_completo = True
+                    etapa.filas = len(df_anexo)
+            
+            self.reportero.etapa(ETAPA_FIN)
+            if self.estado == ESTADO_BLOQUEADO:
+                self.reportero.error(
+                    "Archivo Abierto",
+                    f"La proyección se guardó en:\n{ruta_archivo_nuevo}\n\n"
+                    f"pero no se pudo actualizar el archivo final (está abierto):\n{self.ruta_destino_final.name}"
+                )
+                return str(ruta_archivo_nuevo)
+            if self.estado == ESTADO_ERROR:
+                self.reportero.error(
+                    "Error en el Archivo Final",
+                    f"La proyección se guardó en:\n{ruta_archivo_nuevo}\n\n"
+                    f"pero no se pudo actualizar el archivo final:\n{self.ruta_destino_final.name}\n\n"
+                    f"{self.error_anexo}"
+                )
+                return str(ruta_archivo_nuevo)
+            
+            print("\n" + "="*80)
+            print("PROCESO COMPLETADO EXITOSAMENTE")
+            print("="*80)
+            
+            omitidas = len(self.cambios_libro.omitidas) if self.cambios_libro else 0
+            self.reportero.informacion(
+                "¡Proceso Completado!",
+                f"El proceso ha finalizado exitosamente.\n\n"
+                f"📁 Proyección guardada en:\n{ruta_archivo_nuevo}\n\n"
+                f"📁 Archivo final actualizado:\n{self.ruta_destino_final.name}"
+                + (f"\n\n⚠ {omitidas} registros cambiaron después de anexarse y no se anexaron otra vez; "
+                   f"corrija su versión anterior a mano en el archivo final (ver el log)" if omitidas else "")
+            )
+            return str(ruta_archivo_nuevo)
+            
+        except Exception as e:
+            self.log(f"ERROR CRÍTICO: {str(e)}", "ERROR")
+            import traceback
+            traceback.print_exc()
+            self.estado = ESTADO_BLOQUEADO if es_archivo_bloqueado(e) else ESTADO_ERROR
+            self.reportero.error("Error", f"Ocurrió un error:\n\n{str(e)}")
+            return None
+        
+        finally:
+            self.guardar_registro_cambios()
+            if ruta_archivo_nuevo is not None:
+                self.guardar_informe(
+                    ruta_archivo_nuevo.with_name(f"{ruta_archivo_nuevo.stem}.informe.json"),
+                    fecha_proyeccion=self.fecha_filtrado.strftime('%Y-%m-%d'),
+                    proyeccion=str(ruta_archivo_nuevo),
+                    archivo_final=str(self.ruta_destino_final),
+                    huella_proyeccion=self.huella_proyeccion,
+                    anexo_completo=self.anexo_completo,
+                    cambios=self.cambios_libro.como_dict() if self.cambios_libro else None,
+                    configuracion=self.configuracion_informe(),
+                )
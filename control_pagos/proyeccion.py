@@ -0,0 +1,145 @@
+"""
+Cálculos de la hoja de proyección (agrupación por importador y proveedor)
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from control_pagos.escritor_proyeccion import (
+    COLUMNA_TIPO_FILA,
+    FILA_DETALLE,
+    FILA_TOTAL,
+    FILA_VACIA,
+)
+
+COLUMNAS_GRUPO = ['IMPORTADOR', 'PROVEEDOR']
+FILAS_SEPARADORAS = 2
+ETIQUETA_TOTAL_USD = 'TOTAL GENERAL USD'
+
+# Columnas auxiliares (no salen en la proyección)
+COLUMNA_MONEDA_GRUPO = '_MONEDA_GRUPO'
+COLUMNA_FACTOR_USD = '_FACTOR_USD'
+
+# numpy suma por pares a partir de 8 elementos; por debajo suma en orden
+_LIMITE_SUMA_SECUENCIAL = 8
+
+
+def _sumar_tramos(valores, inicio, tamaño):
+    """
+    Suma cada tramo valores[inicio:inicio+tamaño] con el mismo resultado,
+    bit a bit, que Series.sum() sobre el grupo.
+    """
+    sumas = np.zeros(len(inicio), dtype=float)
+
+    # Grupos pequeños: suma secuencial por columnas de una matriz con relleno
+    pequeños = tamaño < _LIMITE_SUMA_SECUENCIAL
+    if pequeños.any():
+        ini = inicio[pequeños]
+        tam = tamaño[pequeños]
+        parcial = np.zeros(len(ini), dtype=float)
+        for paso in range(int(tam.max())):
+            activos = tam > paso
+            parcial[activos] += valores[ini[activos] + paso]
+        sumas[pequeños] = parcial
+
+    # Grupos grandes (pocos): np.sum sobre la porción contigua
+    for k in np.flatnonzero(~pequeños):
+        sumas[k] = np.sum(valores[inicio[k]:inicio[k] + tamaño[k]])
+
+    return sumas
+
+
+def agrupar_y_calcular(df, por_moneda=False, factores_usd=None):
+    """
+    Agrupa por IMPORTADOR y PROVEEDOR y arma el diseño de la proyección:
+    filas de detalle, una fila de total si el grupo tiene más de un registro
+    y dos filas vacías de separación. La columna _TIPO_FILA indica el tipo.
+
+    Con 'por_moneda', dentro de cada grupo los registros se ordenan por moneda
+    y, si el proveedor factura en más de una, cada moneda lleva su subtotal (no
+    se suman dólares con euros). 'factores_usd' (dólares por unidad, alineado
+    con las filas de df; NaN sin tasa) agrega al final un total general en USD.
+
+    Se construye por columnas (posiciones calculadas con sumas acumuladas)
+    en lugar de recorrer las filas una a una.
+    """
+    df['VALOR A PAGAR'] = pd.to_numeric(df['VALOR A PAGAR'], errors='coerce').fillna(0)
+    auxiliares = {}
+    if factores_usd is not None:
+        auxiliares[COLUMNA_FACTOR_USD] = np.asarray(factores_usd, dtype=float)
+    claves = list(COLUMNAS_GRUPO)
+    if por_moneda:
+        auxiliares[COLUMNA_MONEDA_GRUPO] = df['MONEDA'].fillna('').astype(str).str.strip().str.upper()
+        claves.append(COLUMNA_MONEDA_GRUPO)
+    if auxiliares:
+        df = df.assign(**auxiliares)
+    df = df.sort_values(by=claves).reset_index(drop=True)
+
+    # groupby descarta las filas con clave nula
+    con_clave = df[COLUMNAS_GRUPO].notna().all(axis=1).to_numpy()
+    if not con_clave.all():
+        df = df[con_clave].reset_index(drop=True)
+
+    n = len(df)
+    if n == 0:
+        return pd.DataFrame()
+
+    # Límites de cada grupo (los datos ya están ordenados por la clave); con
+    # 'por_moneda' cada grupo (importador, proveedor) tiene un subgrupo por moneda
+    id_grupo = df.groupby(COLUMNAS_GRUPO, sort=False).ngroup().to_numpy()
+    id_subgrupo = df.groupby(claves, sort=False).ngroup().to_numpy()
+    inicio = np.flatnonzero(np.r_[True, id_subgrupo[1:] != id_subgrupo[:-1]])
+    tamaño = np.diff(np.r_[inicio, n])
+    grupo_de_subgrupo = id_grupo[inicio]
+    varias_monedas = np.bincount(grupo_de_subgrupo)[grupo_de_subgrupo] > 1
+    cierra_grupo = np.r_[grupo_de_subgrupo[1:] != grupo_de_subgrupo[:-1], True]
+    con_total = (tamaño > 1) | varias_monedas
+
+    # Posición de cada bloque en la salida
+    largo_bloque = tamaño + con_total + FILAS_SEPARADORAS * cierra_grupo
+    inicio_salida = np.cumsum(largo_bloque) - largo_bloque
+    total_filas = int(largo_bloque.sum()) + (factores_usd is not None)
+
+    pos_detalle = np.repeat(inicio_salida - inicio, tamaño) + np.arange(n)
+    pos_total = (inicio_salida + tamaño)[con_total]
+
+    columnas = {}
+    for columna in df.columns.drop(list(auxiliares)):
+        datos = np.full(total_filas, '', dtype=object)
+        datos[pos_detalle] = df[columna].to_numpy(dtype=object)
+        columnas[columna] = datos
+
+    valores = df['VALOR A PAGAR'].to_numpy(dtype=float)
+    columnas['VALOR A PAGAR'][pos_total] = _sumar_tramos(
+        valores, inicio[con_total], tamaño[con_total]
+    ).astype(object)
+    columnas['MONEDA'][pos_total] = df['MONEDA'].to_numpy(dtype=object)[inicio[con_total]]
+
+    tipos = np.full(total_filas, FILA_VACIA, dtype=object)
+    tipos[pos_detalle] = FILA_DETALLE
+    tipos[pos_total] = FILA_TOTAL
+
+    if factores_usd is not None:
+        factores = df[COLUMNA_FACTOR_USD].to_numpy(dtype=float)
+        sin_tasa = np.isnan(factores) & (valores != 0)
+        etiqueta = ETIQUETA_TOTAL_USD
+        if sin_tasa.any():
+            monedas = sorted(set(df.loc[sin_tasa, 'MONEDA'].fillna('').astype(str).str.strip().replace('', 'sin moneda')))
+            etiqueta += f" (sin tasa: {int(sin_tasa.sum())} registros en {', '.join(monedas)})"
+        columnas['PROVEEDOR'][-1] = etiqueta
+        columnas['MONEDA'][-1] = 'USD'
+        columnas['VALOR A PAGAR'][-1] = float(np.round(np.nansum(valores * factores), 2))
+        tipos[-1] = FILA_TOTAL
+    columnas[COLUMNA_TIPO_FILA] = tipos
+
+    # Misma inferencia de tipos que pd.DataFrame(lista_de_diccionarios)
+    return pd.DataFrame({nombre: datos.tolist() for nombre, datos in columnas.items()})
+
+
+def huella_proyeccion(df):
+    """SHA-256 del contenido de la proyección agrupada (nombres de columnas y valores, sin el índice)"""
+    huella = hashlib.sha256('\x1f'.join(str(col) for col in df.columns).encode('utf-8'))
+    huella.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return huella.hexdigest()
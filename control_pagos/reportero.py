@@ -0,0 +1,111 @@
+"""
+Reporteros: cómo el proceso informa su avance y sus resultados
+
+El proceso no muestra ventanas por su cuenta; llama al reportero que recibe.
+Reportero escribe en consola y nunca espera respuesta del usuario (ejecución
+programada o en servidor). ReporteroCola deja los eventos en una cola para que
+una interfaz los atienda desde su propio hilo (ver control_pagos_1_1.py).
+"""
+
+import queue
+import threading
+
+SIMBOLOS = {
+    "INFO": "ℹ",
+    "OK": "✓",
+    "ERROR": "✗",
+    "WARN": "⚠",
+    "PROCESO": "►"
+}
+
+# Etapas del proceso y su peso en la barra de progreso (suman 100)
+ETAPAS = [
+    ('copia', 30),
+    ('lectura', 25),
+    ('filtro', 5),
+    ('agrupacion', 5),
+    ('escritura', 20),
+    ('anexo', 15),
+]
+ETAPA_FIN = 'fin'
+
+
+def avance_al_iniciar(etapa):
+    """Porcentaje completado al iniciar 'etapa' (100 para ETAPA_FIN)"""
+    avance = 0
+    for nombre, peso in ETAPAS:
+        if nombre == etapa:
+            return avance
+        avance += peso
+    return 100
+
+
+class Reportero:
+    """Reportero de consola, sin interacción"""
+
+    def log(self, mensaje, tipo="INFO"):
+        """Registra un mensaje del proceso"""
+        print(f"{SIMBOLOS.get(tipo, '•')} {mensaje}")
+
+    def etapa(self, nombre):
+        """Inicio de una etapa del proceso (ver ETAPAS)"""
+
+    def error(self, titulo, mensaje):
+        self.log(f"{titulo}: {mensaje}", "ERROR")
+
+    def advertencia(self, titulo, mensaje):
+        self.log(f"{titulo}: {mensaje}", "WARN")
+
+    def informacion(self, titulo, mensaje):
+        self.log(f"{titulo}: {mensaje}", "OK")
+
+    def reintentar(self, titulo, mensaje):
+        """¿Reintentar la operación? Sin usuario a quien preguntar: no"""
+        self.log(f"{titulo}: {mensaje}", "WARN")
+        return False
+
+
+class ReporteroCola(Reportero):
+    """
+    Reportero para un proceso que corre en otro hilo: registra en consola y
+    deja cada evento en una cola segura entre hilos. La interfaz los retira
+    por lotes con pendientes() y los atiende en su hilo.
+    Eventos: ('log', mensaje, tipo), ('etapa', nombre),
+    ('dialogo', tipo, titulo, mensaje) y ('pregunta', titulo, mensaje, respuesta).
+    """
+
+    def __init__(self):
+        self.cola = queue.Queue()
+
+    def log(self, mensaje, tipo="INFO"):
+        super().log(mensaje, tipo)
+        self.cola.put(('log', mensaje, tipo))
+
+    def etapa(self, nombre):
+        self.cola.put(('etapa', nombre))
+
+    def error(self, titulo, mensaje):
+        self.cola.put(('dialogo', 'error', titulo, mensaje))
+
+    def advertencia(self, titulo, mensaje):
+        self.cola.put(('dialogo', 'advertencia', titulo, mensaje))
+
+    def informacion(self, titulo, mensaje):
+        self.cola.put(('dialogo', 'informacion', titulo, mensaje))
+
+    def reintentar(self, titulo, mensaje):
+        """Espera a que la interfaz responda (respuesta['valor']) y avise con respuesta['evento']"""
+        respuesta = {'evento': threading.Event(), 'valor': False}
+        self.cola.put(('pregunta', titulo, mensaje, respuesta))
+        respuesta['evento'].wait()
+        return respuesta['valor']
+
+    def pendientes(self, maximo=500):
+        """Retira hasta 'maximo' eventos de la cola sin bloquear"""
+        eventos = []
+        try:
+            while len(eventos) < maximo:
+                eventos.append(self.cola.get_nowait())
+        except queue.Empty:
+            pass
+        return eventos
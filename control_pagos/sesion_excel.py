@@ -0,0 +1,152 @@
+"""
+Sesión de Excel compartida por las etapas del proceso
+
+Una sola instancia oculta de Excel para toda la ejecución: la configuración
+(DisplayAlerts, AutomationSecurity, EnableEvents) se aplica una vez, los libros
+quedan abiertos entre etapas y al salir del bloque 'with' se cierran todos y se
+cierra Excel, aunque haya errores. Excel solo se inicia cuando una etapa abre
+el primer libro. 'llamadas' cuenta las operaciones costosas (iniciar_excel,
+abrir, guardar, guardar_como, cerrar, cerrar_excel) para el informe de la
+ejecución.
+
+control_pagos.excel_falso ofrece la misma interfaz en memoria (sin Excel).
+"""
+
+import os
+from collections import Counter
+from pathlib import Path
+
+FORMATO_XLSX = 51             # xlOpenXMLWorkbook (sin macros)
+SEGURIDAD_MACROS_DESACTIVADAS = 3  # msoAutomationSecurityForceDisable
+
+
+def _log_consola(mensaje, tipo="INFO"):
+    print(f"[{tipo}] {mensaje}")
+
+
+class SesionExcel:
+    """Instancia de Excel (COM) con los libros abiertos durante la ejecución"""
+
+    def __init__(self, log=None):
+        self.log = log or _log_consola
+        self._excel = None
+        self._com_iniciado = False
+        self.libros = {}
+        self.llamadas = Counter()
+
+    def contar(self, llamada):
+        self.llamadas[llamada] += 1
+
+    @staticmethod
+    def clave(ruta):
+        return os.path.normcase(str(Path(ruta).resolve()))
+
+    @property
+    def excel(self):
+        """Aplicación Excel; se inicia con el primer uso"""
+        if self._excel is None:
+            self._excel = self.iniciar_excel()
+        return self._excel
+
+    @property
+    def iniciada(self):
+        return self._excel is not None
+
+    def iniciar_excel(self):
+        """Inicia Excel y aplica una sola vez la configuración de la sesión"""
+        self.contar('iniciar_excel')
+        excel = self.crear_aplicacion()
+        excel.Visible = False
+        excel.DisplayAlerts = False
+        excel.AutomationSecurity = SEGURIDAD_MACROS_DESACTIVADAS
+        excel.EnableEvents = False  # NO ejecutar Workbook_Open
+        self.log("Excel iniciado", "INFO")
+        return excel
+
+    def crear_aplicacion(self):
+        import pythoncom
+        import win32com.client
+
+        pythoncom.CoInitialize()
+        self._com_iniciado = True
+        # Instancia propia (no se comparte con un Excel abierto por el usuario)
+        return win32com.client.DispatchEx("Excel.Application")
+
+    def abrir(self, ruta, solo_lectura=False):
+        """Libro abierto para 'ruta'; si ya está abierto en la sesión, el mismo objeto"""
+        clave = self.clave(ruta)
+        if clave not in self.libros:
+            self.contar('abrir')
+            self.libros[clave] = self.excel.Workbooks.Open(
+                str(Path(ruta).resolve()),
+                ReadOnly=solo_lectura,
+                UpdateLinks=0,
+                IgnoreReadOnlyRecommended=True,
+                Notify=False
+            )
+        return self.libros[clave]
+
+    def guardar_como(self, libro, ruta, formato=FORMATO_XLSX):
+        """
+        Guarda 'libro' en 'ruta'. Como en Excel, el libro abierto pasa a ser el
+        archivo nuevo: se sigue usando sin cerrarlo ni volver a abrirlo.
+        """
+        self.contar('guardar_como')
+        libro.SaveAs(Filename=str(Path(ruta).resolve()), FileFormat=formato, CreateBackup=False)
+        self._olvidar(libro)
+        self.libros[self.clave(ruta)] = libro
+        return libro
+
+    def guardar(self, libro):
+        """Guarda 'libro' en su archivo"""
+        self.contar('guardar')
+        libro.Save()
+
+    def cerrar(self, libro_o_ruta, guardar=False):
+        """Cierra un libro de la sesión (por objeto o por ruta); si no está abierto, no hace nada"""
+        if isinstance(libro_o_ruta, (str, Path)):
+            libro = self.libros.pop(self.clave(libro_o_ruta), None)
+        else:
+            libro = libro_o_ruta
+            self._olvidar(libro)
+        if libro is not None:
+            self.contar('cerrar')
+            libro.Close(SaveChanges=guardar)
+
+    def _olvidar(self, libro):
+        for clave, abierto in list(self.libros.items()):
+            if abierto is libro:
+                del self.libros[clave]
+
+    def cerrar_todo(self):
+        """Cierra todos los libros sin guardar y cierra Excel"""
+        for libro in list(self.libros.values()):
+            try:
+                self.contar('cerrar')
+                libro.Close(SaveChanges=False)
+            except Exception:
+                pass
+        self.libros.clear()
+
+        if self._excel is not None:
+            try:
+                self.contar('cerrar_excel')
+                self._excel.Quit()
+            except Exception:
+                pass
+            self._excel = None
+
+        if self._com_iniciado:
+            import pythoncom
+            try:
+                pythoncom.CoUninitialize()
+            except Exception:
+                pass
+            self._com_iniciado = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.cerrar_todo()
+        return False
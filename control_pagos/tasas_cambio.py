@@ -0,0 +1,101 @@
+"""
+Tasas de cambio para el archivo final (FACTOR DE CONVERSION y VALOR USD)
+
+La tabla es un archivo local (CSV o Parquet) con una tasa por día y moneda:
+
+    FECHA,MONEDA,FACTOR
+    2026-02-04,EUR,1.0412
+    2026-02-04,CNY,0.1371
+
+FACTOR son dólares por unidad de la moneda (VALOR USD = VALOR MONEDA ORIGEN * FACTOR).
+Para una fecha de proyección se usa, por moneda, la tasa más reciente que no
+sea posterior a esa fecha ni más antigua que 'dias_maximos'.
+"""
+
+from datetime import timedelta
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from control_pagos.fechas import normalizar_fechas
+
+COLUMNAS_TASAS = ['FECHA', 'MONEDA', 'FACTOR']
+MONEDA_BASE = 'USD'
+DIAS_MAXIMOS = 7
+# Fechas con sus tasas vigentes y archivos de tasas leídos que se mantienen en memoria
+FECHAS_EN_CACHE = 64
+ARCHIVOS_EN_CACHE = 4
+
+
+class TablaTasas:
+    """Tasas por (FECHA, MONEDA), ordenadas por fecha"""
+
+    def __init__(self, df, dias_maximos=DIAS_MAXIMOS):
+        df = df.rename(columns=lambda columna: str(columna).strip().upper())
+        faltantes = [columna for columna in COLUMNAS_TASAS if columna not in df.columns]
+        if faltantes:
+            raise ValueError(f"La tabla de tasas no tiene las columnas {faltantes} (se esperan {COLUMNAS_TASAS})")
+
+        fechas = df['FECHA']
+        if not pd.api.types.is_datetime64_any_dtype(fechas):
+            fechas, _ = normalizar_fechas(fechas.astype(str))
+        df = pd.DataFrame({
+            'FECHA': fechas.dt.normalize(),
+            'MONEDA': df['MONEDA'].astype(str).str.strip().str.upper(),
+            'FACTOR': pd.to_numeric(df['FACTOR'], errors='coerce'),
+        }).dropna()
+        self.df = df[df['FACTOR'] > 0].sort_values('FECHA', kind='stable').reset_index(drop=True)
+        self.dias_maximos = dias_maximos
+        # Un lote consulta la misma fecha varias veces (proyección y archivo final)
+        self.vigentes = lru_cache(maxsize=FECHAS_EN_CACHE)(self._vigentes)
+
+    @classmethod
+    def desde_archivo(cls, ruta, dias_maximos=DIAS_MAXIMOS):
+        """
+        Lee un .csv (coma o punto y coma) o un .parquet (requiere pyarrow).
+        Mientras el archivo no cambie, se reutiliza la tabla ya leída.
+        """
+        ruta = Path(ruta).resolve()
+        estado = ruta.stat()
+        return _leer_tabla(str(ruta), estado.st_size, estado.st_mtime_ns, dias_maximos)
+
+    def _vigentes(self, fecha):
+        """Serie MONEDA → FACTOR con la última tasa de cada moneda en la ventana de la fecha"""
+        fin = pd.Timestamp(fecha).normalize()
+        en_ventana = (self.df['FECHA'] <= fin) & (self.df['FECHA'] >= fin - timedelta(days=self.dias_maximos))
+        ultimas = self.df[en_ventana].drop_duplicates('MONEDA', keep='last')
+        return ultimas.set_index('MONEDA')['FACTOR']
+
+    def factores(self, monedas, fecha):
+        """
+        Arreglo de factores para una columna de monedas (USD = 1; sin tasa = NaN).
+        'fecha' es una sola fecha o una por fila; en ese caso se cruza con la
+        tabla por moneda y fecha (merge_asof hacia atrás, hasta 'dias_maximos').
+        """
+        monedas = pd.Series(monedas).astype(str).str.strip().str.upper().reset_index(drop=True)
+        if np.ndim(fecha) == 0:
+            factores = monedas.map(self.vigentes(pd.Timestamp(fecha).normalize())).to_numpy(dtype=float, copy=True)
+        else:
+            filas = pd.DataFrame({
+                'FECHA': pd.to_datetime(pd.Series(fecha)).dt.normalize().astype(self.df['FECHA'].dtype).to_numpy(),
+                'MONEDA': monedas,
+                '_POSICION': np.arange(len(monedas)),
+            }).sort_values('FECHA', kind='stable')
+            cruzadas = pd.merge_asof(filas, self.df, on='FECHA', by='MONEDA', direction='backward',
+                                     tolerance=pd.Timedelta(days=self.dias_maximos))
+            factores = np.full(len(monedas), np.nan)
+            factores[cruzadas['_POSICION'].to_numpy()] = cruzadas['FACTOR'].to_numpy(dtype=float)
+        factores[(monedas == MONEDA_BASE).to_numpy()] = 1.0
+        return factores
+
+
+@lru_cache(maxsize=ARCHIVOS_EN_CACHE)
+def _leer_tabla(ruta, tamaño, mtime, dias_maximos):
+    """TablaTasas de un archivo; tamaño y mtime forman parte de la clave del caché"""
+    if ruta.lower().endswith('.parquet'):
+        df = pd.read_parquet(ruta)
+    else:
+        df = pd.read_csv(ruta, sep=None, engine='python', dtype=str)
+    return TablaTasas(df, dias_maximos=dias_maximos)
@@ -0,0 +1,147 @@
+"""
+Modo vigilancia: proyección de la semana en curso cada vez que cambia el libro origen
+
+Revisa ruta_origen cada cierto tiempo (fecha de modificación y tamaño). Un
+cambio se procesa cuando el archivo deja de cambiar durante unos segundos
+(Excel guarda en varias escrituras) y nadie lo tiene abierto; mientras esté
+abierto se vuelve a probar con esperas crecientes, sin preguntar nada. Si la
+proyección agrupada de la semana es igual a la del último archivo escrito
+(huella en su informe JSON) y esa ejecución terminó su anexo al archivo final,
+no se reescribe ni se anexa nada.
+
+    python -m control_pagos --vigilar
+"""
+
+import json
+import time
+from datetime import datetime
+
+from control_pagos.bloqueos import EsperaArchivos, sondear_archivo
+from control_pagos.lote import miercoles_de_semana
+from control_pagos.proceso import ESTADO_OK, CopiarArchivo
+from control_pagos.proyeccion import huella_proyeccion
+
+ESPERA_INICIAL_BLOQUEO = 2.0
+
+
+def firma_archivo(ruta):
+    """(fecha de modificación en ns, tamaño) del archivo; None si no existe"""
+    try:
+        estado = ruta.stat()
+    except FileNotFoundError:
+        return None
+    return estado.st_mtime_ns, estado.st_size
+
+
+class Vigilancia:
+    """
+    Vigila el archivo origen de 'ruta_config' y proyecta la semana de 'fecha'
+    (por defecto, la semana en curso al momento de cada cambio).
+    'dormir' y 'reloj' se pueden reemplazar para probar sin esperar.
+    """
+
+    def __init__(self, ruta_config=None, fecha=None, reportero=None, dormir=time.sleep, reloj=time.monotonic):
+        self.ruta_config = ruta_config
+        self.fecha = fecha
+        copiador = CopiarArchivo(reportero=reportero, ruta_config=ruta_config)
+        self.reportero = copiador.reportero
+        self.ruta_origen = copiador.ruta_origen
+        self.intervalo = copiador.vigilancia_intervalo
+        self.calma = copiador.vigilancia_calma
+        self.espera_maxima = copiador.vigilancia_espera_maxima
+        self.dormir = dormir
+        self.reloj = reloj
+        # Huella de la última proyección escrita por ruta (si el informe está desactivado)
+        self.huellas = {}
+
+    def log(self, mensaje, tipo="INFO"):
+        self.reportero.log(mensaje, tipo)
+
+    def fecha_proyeccion(self):
+        if self.fecha:
+            return self.fecha
+        hoy = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return miercoles_de_semana(hoy)
+
+    def esperar_cambio(self, firma_anterior):
+        """Espera a que la firma del origen cambie y se mantenga 'calma' segundos; devuelve la nueva firma"""
+        firma = firma_archivo(self.ruta_origen)
+        while firma == firma_anterior:
+            self.dormir(self.intervalo)
+            firma = firma_archivo(self.ruta_origen)
+
+        estable_desde = self.reloj()
+        while self.reloj() - estable_desde < self.calma:
+            self.dormir(min(self.intervalo, self.calma))
+            nueva = firma_archivo(self.ruta_origen)
+            if nueva != firma:
+                firma = nueva
+                estable_desde = self.reloj()
+        return firma
+
+    def esperar_desbloqueo(self):
+        """Espera, con esperas que se duplican hasta 'espera_maxima', a que nadie tenga abierto el origen"""
+        espera = EsperaArchivos(espera_inicial=ESPERA_INICIAL_BLOQUEO, espera_maxima=self.espera_maxima,
+                                tiempo_maximo=None, log=self.log, dormir=self.dormir, reloj=self.reloj)
+        espera.esperar([lambda: sondear_archivo(self.ruta_origen)])
+
+    def huella_escrita(self, ruta_proyeccion):
+        """
+        Huella de la proyección ya escrita y anexada en 'ruta_proyeccion' (None
+        si no se conoce o si la ejecución no terminó su anexo al archivo final)
+        """
+        if not ruta_proyeccion.exists():
+            return None
+        if ruta_proyeccion in self.huellas:
+            return self.huellas[ruta_proyeccion]
+        ruta_informe = ruta_proyeccion.with_name(f"{ruta_proyeccion.stem}.informe.json")
+        try:
+            informe = json.loads(ruta_informe.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if informe.get('estado') != ESTADO_OK or not informe.get('anexo_completo'):
+            return None
+        return informe.get('huella_proyeccion')
+
+    def procesar(self):
+        """
+        Calcula la proyección de la semana y solo si cambió ejecuta el proceso
+        completo. Devuelve el estado del proceso, o None si no se ejecutó.
+        """
+        fecha = self.fecha_proyeccion()
+        copiador = CopiarArchivo(fecha_filtrado=fecha, reportero=self.reportero, ruta_config=self.ruta_config)
+        if not copiador.verificar_columnas_origen():
+            return None
+
+        self.log(f"Revisando la semana del {fecha.strftime('%d/%m/%Y')}...", "PROCESO")
+        df_agrupado = copiador.calcular_proyeccion(copiador.ruta_origen)
+        if df_agrupado is None:
+            self.log("No hay registros para la semana; no se escribe la proyección", "WARN")
+            return None
+
+        ruta_proyeccion = copiador.ruta_proyeccion(fecha)
+        if huella_proyeccion(df_agrupado) == self.huella_escrita(ruta_proyeccion):
+            self.log(f"La proyección de la semana no cambió; se conserva {ruta_proyeccion.name}", "OK")
+            return None
+
+        copiador.ejecutar_proceso()
+        if copiador.estado == ESTADO_OK and copiador.anexo_completo:
+            self.huellas[ruta_proyeccion] = copiador.huella_proyeccion
+        return copiador.estado
+
+    def ejecutar(self, ciclos=None):
+        """Vigila hasta Ctrl+C (o hasta procesar 'ciclos' cambios)"""
+        self.log(f"Vigilando {self.ruta_origen} (cada {self.intervalo:g} s; Ctrl+C para terminar)", "INFO")
+        firma = None
+        procesados = 0
+        while ciclos is None or procesados < ciclos:
+            firma = self.esperar_cambio(firma)
+            self.esperar_desbloqueo()
+            if firma_archivo(self.ruta_origen) != firma:
+                # Se guardó otra vez mientras estaba abierto: se espera la nueva calma
+                continue
+            try:
+                self.procesar()
+            except Exception as e:
+                self.log(f"Error al procesar el cambio: {e}", "ERROR")
+            procesados += 1
@@ -0,0 +1,98 @@
+"""Anexo al archivo final editando el OOXML: ida y vuelta con openpyxl"""
+
+import re
+import zipfile
+from datetime import datetime
+
+import openpyxl
+import pytest
+from openpyxl.styles import Font, PatternFill
+from openpyxl.worksheet.table import Table, TableColumn, TableFormula
+
+from control_pagos.anexo_ooxml import anexar_filas
+
+ENCABEZADO = ['FECHA DE PAGO', 'PROVEEDOR', 'MONEDA', 'VALOR', 'VALOR USD']
+FORMULA_USD = 'IF(C2="USD",D2,D2*2)'
+
+
+@pytest.fixture
+def archivo_final(tmp_path):
+    """Libro con la hoja 'Pagos importación', tres registros y una tabla con columna calculada"""
+    ruta = tmp_path / 'CONTROL PAGOS.xlsx'
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Pagos importación'
+    ws.append(ENCABEZADO)
+    for fila, (proveedor, moneda, valor) in enumerate([('ACME', 'USD', 10), ('BETA', 'EUR', 20),
+                                                       ('GAMA', 'USD', 30)], start=2):
+        ws.append([datetime(2024, 3, fila), proveedor, moneda, valor, f'=IF(C{fila}="USD",D{fila},D{fila}*2)'])
+        ws.cell(fila, 1).number_format = 'DD/MM/YYYY'
+    for celda in ws[4]:
+        celda.font = Font(bold=True)
+        celda.fill = PatternFill('solid', fgColor='FFFF00')
+
+    tabla = Table(displayName='Pagos', ref='A1:E4')
+    tabla._initialise_columns()
+    tabla.tableColumns[4] = TableColumn(id=5, name='VALOR USD',
+                                        calculatedColumnFormula=TableFormula(attr_text=FORMULA_USD))
+    ws.add_table(tabla)
+    wb.save(ruta)
+    return ruta
+
+
+def leer_hoja_xml(ruta):
+    with zipfile.ZipFile(ruta) as paquete:
+        return paquete.read('xl/worksheets/sheet1.xml').decode('utf-8')
+
+
+def test_anexa_valores_fechas_y_amplia_tabla(archivo_final):
+    resumen = anexar_filas(archivo_final, [['15/03/2024', 'DELTA', 'USD', 40], ['16/03/2024', 'EPSILON', 'EUR', 50]])
+
+    assert (resumen['fila_inicio'], resumen['fila_fin']) == (5, 6)
+    assert resumen['tabla'] == 'A1:E6'
+    assert resumen['formulas'] == 2
+
+    ws = openpyxl.load_workbook(archivo_final)['Pagos importación']
+    assert [c.value for c in ws[5]][:4] == [datetime(2024, 3, 15), 'DELTA', 'USD', 40]
+    assert [c.value for c in ws[6]][:4] == [datetime(2024, 3, 16), 'EPSILON', 'EUR', 50]
+    assert ws.tables['Pagos'].ref == 'A1:E6'
+    assert re.search(r'<dimension ref="A1:E6"\s*/>', leer_hoja_xml(archivo_final))
+
+
+def test_copia_estilos_de_la_ultima_fila(archivo_final):
+    anexar_filas(archivo_final, [['15/03/2024', 'DELTA', 'USD', 40]])
+
+    ws = openpyxl.load_workbook(archivo_final)['Pagos importación']
+    for anterior, nueva in zip(ws[4], ws[5]):
+        assert nueva.font.b is True
+        assert nueva.fill.fgColor.rgb == anterior.fill.fgColor.rgb
+    assert ws['A5'].number_format == 'DD/MM/YYYY'
+
+
+def test_columna_calculada_apunta_a_su_fila(archivo_final):
+    anexar_filas(archivo_final, [['15/03/2024', 'DELTA', 'USD', 40], ['16/03/2024', 'EPSILON', 'EUR', 50]])
+
+    ws = openpyxl.load_workbook(archivo_final)['Pagos importación']
+    assert ws['E5'].value == '=IF(C5="USD",D5,D5*2)'
+    assert ws['E6'].value == '=IF(C6="USD",D6,D6*2)'
+
+
+def test_textos_numericos_se_anexan_como_numeros(archivo_final):
+    anexar_filas(archivo_final, [['15/03/2024', '14589', 'USD', '40.5'],
+                                 ['16/03/2024', '12345678901234567890', 'EUR', '']])
+
+    ws = openpyxl.load_workbook(archivo_final)['Pagos importación']
+    assert (ws['B5'].value, ws['D5'].value) == (14589, 40.5)
+    assert ws['B6'].value == '12345678901234567890'
+    assert ws['D6'].value is None
+
+
+def test_conserva_las_demas_entradas_del_paquete(archivo_final):
+    with zipfile.ZipFile(archivo_final) as paquete:
+        antes = {nombre: paquete.read(nombre) for nombre in paquete.namelist()}
+    anexar_filas(archivo_final, [['15/03/2024', 'DELTA', 'USD', 40]])
+
+    with zipfile.ZipFile(archivo_final) as paquete:
+        assert paquete.testzip() is None
+        assert paquete.namelist() == list(antes)
+        assert paquete.read('xl/styles.xml') == antes['xl/styles.xml']
@@ -0,0 +1,99 @@
+"""Anexo incremental con el registro de cambios: qué filas llegan al archivo final"""
+
+from datetime import datetime
+
+import openpyxl
+import pytest
+from openpyxl.worksheet.table import Table
+
+from control_pagos.proceso import ESTADO_OK, CopiarArchivo
+from control_pagos.reportero import Reportero
+
+FECHA = datetime(2024, 3, 13)
+ENCABEZADO = ['IMPORTADOR', 'MARCA', 'PROVEEDOR', '# IMPORTACION', 'MONEDA', 'NOTA CREDITO',
+              'VALOR MONEDA ORIGEN', 'ESTADO', 'FECHA DE VENCIMIENTO']
+REGISTROS = [
+    ['COMODIN SAS', 'ESPRIT', 'PROVEEDOR 001', 1001, 'USD', 0, 100.0, 'PAGAR', datetime(2024, 3, 12)],
+    ['GCO SAS', 'NAF NAF', 'PROVEEDOR 002', 1002, 'USD', 0, 70.0, 'PAGAR', datetime(2024, 3, 14)],
+    ['GCO SAS', 'NAF NAF', 'PROVEEDOR 003', 1003, 'USD', 0, 30.0, 'PAGADO', datetime(2024, 3, 15)],
+]
+COLUMNAS_FINAL = 12
+
+
+class ReporteroSilencioso(Reportero):
+    def log(self, mensaje, tipo="INFO"):
+        pass
+
+
+def guardar_origen(ruta, registros):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Control_Pagos'
+    ws.append(ENCABEZADO)
+    for registro in registros:
+        ws.append(registro)
+    wb.save(ruta)
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Libro origen, archivo final con tabla y config.ini sin Excel con el registro de cambios activo"""
+    guardar_origen(tmp_path / 'origen.xlsx', REGISTROS)
+
+    final = tmp_path / 'final.xlsx'
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Pagos Importación'
+    ws.append([f'COLUMNA {i}' for i in range(1, COLUMNAS_FINAL + 1)])
+    ws.append(list(range(COLUMNAS_FINAL)))
+    ws.add_table(Table(displayName='Pagos', ref='A1:L2'))
+    wb.save(final)
+
+    ruta = tmp_path / 'config.ini'
+    ruta.write_text(
+        f"[RUTAS]\nArchivoOrigen = {tmp_path / 'origen.xlsx'}\nCarpetaIntermedia = {tmp_path / 'salida'}\n"
+        f"ArchivoFinal = {final}\n"
+        "[COPIA]\nModo = ooxml\n[ANEXO]\nModo = ooxml\nDuplicados = no\n[PROYECCION]\nMotor = openpyxl\n"
+        "[CACHE]\nActiva = no\n[HISTORIAL]\nActivo = no\n[INFORME]\nActivo = no\n"
+        f"[CAMBIOS]\nActivo = si\nArchivo = {tmp_path / 'filas.pkl'}\n",
+        encoding='utf-8'
+    )
+    return ruta
+
+
+def ejecutar(config):
+    copiador = CopiarArchivo(FECHA, reportero=ReporteroSilencioso(), ruta_config=config)
+    copiador.ejecutar_proceso()
+    assert copiador.estado == ESTADO_OK
+    return copiador
+
+
+def proveedores_anexados(copiador):
+    ws = openpyxl.load_workbook(copiador.ruta_destino_final)['Pagos Importación']
+    return [fila[0] for fila in ws.iter_rows(min_row=3, values_only=True)]
+
+
+def test_anexa_la_fila_que_pasa_a_pagar(config, tmp_path):
+    copiador = ejecutar(config)
+    assert len(proveedores_anexados(copiador)) == 2
+
+    # La fila PAGADO pasa a PAGAR: la ejecución anterior no la anexó, así que se anexa ahora
+    guardar_origen(tmp_path / 'origen.xlsx', REGISTROS[:2] + [REGISTROS[2][:7] + ['PAGAR', REGISTROS[2][8]]])
+    copiador = ejecutar(config)
+    assert len(proveedores_anexados(copiador)) == 3
+    assert len(copiador.cambios_libro.omitidas) == 0
+
+
+def test_no_anexa_otra_vez_la_fila_anexada_que_cambio(config, tmp_path):
+    ejecutar(config)
+
+    # Una fila ya anexada cambia de valor: no se anexa otra vez y se informa
+    guardar_origen(tmp_path / 'origen.xlsx', [REGISTROS[0][:6] + [120.0] + REGISTROS[0][7:]] + REGISTROS[1:])
+    copiador = ejecutar(config)
+    assert len(proveedores_anexados(copiador)) == 2
+    assert len(copiador.cambios_libro.omitidas) == 1
+
+    # Sigue anexada con su versión anterior: la ejecución siguiente la vuelve a informar y no anexa nada
+    copiador = ejecutar(config)
+    assert len(proveedores_anexados(copiador)) == 2
+    assert len(copiador.cambios_libro.omitidas) == 1
@@ -0,0 +1,83 @@
+"""Motor openpyxl de la hoja de proyección"""
+
+import zipfile
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from control_pagos.escritor_proyeccion import (COLOR_TOTAL, COLUMNA_TIPO_FILA, FILA_DETALLE, FILA_TOTAL, FILA_VACIA,
+                                               EscritorProyeccionCOM, EscritorProyeccionOpenpyxl, LibroConDibujos,
+                                               color_com_a_rgb, com_disponible)
+from control_pagos.excel_falso import SesionExcelFalsa
+
+DATOS = pd.DataFrame({'IMPORTADOR': ['COMODIN SAS', ''], 'PROVEEDOR': ['PROVEEDOR 001', ''],
+                      'VALOR A PAGAR': [100.0, 100.0]})
+
+
+def proyeccion_por_grupos(grupos):
+    """Proyección con 'grupos' grupos de detalle, total y fila vacía"""
+    filas = []
+    for grupo in range(grupos):
+        filas += [['COMODIN SAS', f'PROVEEDOR {grupo:03}', 100.0, FILA_DETALLE],
+                  ['', '', 100.0, FILA_TOTAL],
+                  ['', '', None, FILA_VACIA]]
+    return pd.DataFrame(filas, columns=['IMPORTADOR', 'PROVEEDOR', 'VALOR A PAGAR', COLUMNA_TIPO_FILA])
+
+
+@pytest.fixture
+def libro_base(tmp_path):
+    ruta = tmp_path / 'proyeccion.xlsx'
+    wb = openpyxl.Workbook()
+    wb.active.title = 'Control_Pagos'
+    wb.save(ruta)
+    return ruta
+
+
+def test_agrega_la_hoja_de_proyeccion(libro_base):
+    EscritorProyeccionOpenpyxl(log=lambda mensaje, tipo="INFO": None).guardar(libro_base, DATOS, 'MARZO 13')
+
+    wb = openpyxl.load_workbook(libro_base)
+    assert wb.sheetnames == ['Control_Pagos', 'MARZO 13']
+    assert wb['MARZO 13']['C2'].value == 100.0
+
+
+@pytest.mark.skipif(com_disponible(), reason="con Excel se escribe por COM")
+def test_no_pierde_los_dibujos_sin_excel(libro_base):
+    with zipfile.ZipFile(libro_base, 'a') as paquete:
+        paquete.writestr('xl/drawings/drawing1.xml', '<xdr:wsDr/>')
+    antes = libro_base.read_bytes()
+
+    with pytest.raises(LibroConDibujos):
+        EscritorProyeccionOpenpyxl(log=lambda mensaje, tipo="INFO": None).guardar(libro_base, DATOS, 'MARZO 13')
+    assert libro_base.read_bytes() == antes
+
+
+def test_com_formatea_por_tipo_de_fila(libro_base):
+    sesion = SesionExcelFalsa()
+    with sesion:
+        EscritorProyeccionCOM(log=lambda mensaje, tipo="INFO": None, sesion=sesion).guardar(
+            libro_base, proyeccion_por_grupos(2), 'MARZO 13')
+
+    ws = openpyxl.load_workbook(libro_base)['MARZO 13']
+    assert ws.max_column == 3  # la columna de tipos se borra
+    assert ws.auto_filter.ref is None
+    assert not any(dimension.hidden for dimension in ws.row_dimensions.values())
+    detalle, total, vacia = ws[2], ws[3], ws[4]
+    assert all(celda.border.left.style == 'thin' for celda in detalle + total)
+    assert not any(celda.border.left.style for celda in vacia)
+    assert all(celda.font.b and celda.fill.fgColor.rgb.endswith(color_com_a_rgb(COLOR_TOTAL)) for celda in total)
+    assert not any(celda.font.b for celda in detalle)
+
+
+def test_com_formatea_con_llamadas_constantes(tmp_path, libro_base):
+    llamadas = []
+    for grupos in (2, 200):
+        ruta = tmp_path / f'proyeccion_{grupos}.xlsx'
+        ruta.write_bytes(libro_base.read_bytes())
+        sesion = SesionExcelFalsa()
+        with sesion:
+            EscritorProyeccionCOM(log=lambda mensaje, tipo="INFO": None, sesion=sesion).guardar(
+                ruta, proyeccion_por_grupos(grupos), 'MARZO 13')
+        llamadas.append(sesion.llamadas['formato'])
+    assert llamadas[0] == llamadas[1]
@@ -0,0 +1,53 @@
+"""Copia de la hoja base extrayendo sus partes OOXML"""
+
+import re
+import zipfile
+
+import openpyxl
+import pytest
+
+from control_pagos.extraccion_hoja import extraer_hoja
+
+
+@pytest.fixture
+def libro_origen(tmp_path):
+    """Libro con textos compartidos en Control_Pagos y en otra hoja"""
+    ruta = tmp_path / 'origen.xlsx'
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Otra'
+    ws.append(['SOLO EN OTRA'])
+    ws = wb.create_sheet('Control_Pagos')
+    ws.append(['PROVEEDOR', 'MONEDA'])
+    ws.append(['PROVEEDOR 001', 'USD'])
+    wb.save(ruta)
+    return ruta
+
+
+def test_extrae_solo_la_hoja_con_sus_textos(libro_origen, tmp_path):
+    destino = tmp_path / 'copia.xlsx'
+    extraer_hoja(libro_origen, destino, 'Control_Pagos')
+
+    wb = openpyxl.load_workbook(destino)
+    assert wb.sheetnames == ['Control_Pagos']
+    assert [[c.value for c in fila] for fila in wb['Control_Pagos']] == [['PROVEEDOR', 'MONEDA'],
+                                                                       ['PROVEEDOR 001', 'USD']]
+
+
+def test_sheetdata_con_prefijo_no_deja_un_libro_dañado(libro_origen, tmp_path):
+    # La misma hoja con los elementos de la hoja con prefijo de espacio de nombres
+    con_prefijo = tmp_path / 'prefijo.xlsx'
+    with zipfile.ZipFile(libro_origen) as origen, zipfile.ZipFile(con_prefijo, 'w') as destino:
+        for info in origen.infolist():
+            datos = origen.read(info)
+            if info.filename == 'xl/worksheets/sheet2.xml':
+                texto = datos.decode('utf-8').replace('<worksheet ', '<worksheet xmlns:x="'
+                                                      'http://schemas.openxmlformats.org/spreadsheetml/2006/main" ')
+                texto = re.sub(r'<(/?)(sheetData|row|c|v)\b', r'<\1x:\2', texto)
+                datos = texto.encode('utf-8')
+            destino.writestr(info, datos)
+
+    destino = tmp_path / 'copia.xlsx'
+    with pytest.raises(ValueError):
+        extraer_hoja(con_prefijo, destino, 'Control_Pagos')
+    assert not destino.exists()
@@ -0,0 +1,149 @@
+"""Etapas COM contra la sesión de Excel falsa: resultados y llamadas a Excel"""
+
+from datetime import datetime
+
+import openpyxl
+import pandas as pd
+import pytest
+from openpyxl.worksheet.table import Table
+
+from control_pagos.excel_falso import SesionExcelFalsa
+from control_pagos.proceso import ESTADO_ERROR, ESTADO_OK, CopiarArchivo
+from control_pagos.reportero import Reportero
+
+FECHA = datetime(2024, 3, 13)
+ENCABEZADO = ['IMPORTADOR', 'MARCA', 'PROVEEDOR', '# IMPORTACION', 'MONEDA', 'NOTA CREDITO',
+              'VALOR MONEDA ORIGEN', 'ESTADO', 'FECHA DE VENCIMIENTO']
+REGISTROS = [
+    ['COMODIN SAS', 'ESPRIT', 'PROVEEDOR 001', 1001, 'USD', 0, 100.0, 'PAGAR', datetime(2024, 3, 12)],
+    ['COMODIN SAS', 'ESPRIT', 'PROVEEDOR 001', 1002, 'USD', 0, 50.0, 'PAGAR', datetime(2024, 3, 14)],
+    ['GCO SAS', 'NAF NAF', 'PROVEEDOR 002', 1003, 'USD', 0, 70.0, 'PAGAR', datetime(2024, 3, 15)],
+    ['GCO SAS', 'NAF NAF', 'PROVEEDOR 002', 1004, 'USD', 0, 30.0, 'PAGADO', datetime(2024, 3, 15)],
+    ['GCO SAS', 'NAF NAF', 'PROVEEDOR 003', 1005, 'USD', 0, 90.0, 'PAGAR', datetime(2024, 4, 2)],
+]
+COLUMNAS_FINAL = 12
+
+
+class ReporteroSilencioso(Reportero):
+    def __init__(self):
+        self.dialogos = []
+
+    def log(self, mensaje, tipo="INFO"):
+        pass
+
+    def error(self, titulo, mensaje):
+        self.dialogos.append(('error', titulo))
+
+    def informacion(self, titulo, mensaje):
+        self.dialogos.append(('informacion', titulo))
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Libro origen (con una hoja oculta de más), archivo final con tabla y config.ini con los modos COM"""
+    origen = tmp_path / 'origen.xlsx'
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Control_Pagos'
+    ws.append(ENCABEZADO)
+    for registro in REGISTROS:
+        ws.append(registro)
+    wb.create_sheet('Macros').sheet_state = 'hidden'
+    wb.save(origen)
+
+    final = tmp_path / 'final.xlsx'
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Pagos Importación'
+    ws.append([f'COLUMNA {i}' for i in range(1, COLUMNAS_FINAL + 1)])
+    ws.append(list(range(COLUMNAS_FINAL)))
+    ws.add_table(Table(displayName='Pagos', ref='A1:L2'))
+    wb.save(final)
+
+    ruta = tmp_path / 'config.ini'
+    ruta.write_text(
+        f"[RUTAS]\nArchivoOrigen = {origen}\nCarpetaIntermedia = {tmp_path / 'salida'}\nArchivoFinal = {final}\n"
+        "[COPIA]\nModo = com\n[ANEXO]\nModo = com\nDuplicados = no\n[PROYECCION]\nMotor = com\n"
+        "[CACHE]\nActiva = no\n[HISTORIAL]\nActivo = no\n[CAMBIOS]\nActivo = no\n[INFORME]\nActivo = no\n",
+        encoding='utf-8'
+    )
+    return ruta
+
+
+def copiador_con_sesion(config):
+    sesion = SesionExcelFalsa()
+    copiador = CopiarArchivo(FECHA, reportero=ReporteroSilencioso(), ruta_config=config,
+                             fabrica_sesion_excel=lambda log=None: sesion)
+    return copiador, sesion
+
+
+def ruta_proyeccion(copiador):
+    return copiador.crear_estructura_carpetas(FECHA) / copiador.crear_nombre_archivo(FECHA)
+
+
+def test_copiar_archivo_base_deja_solo_control_pagos(config):
+    copiador, sesion = copiador_con_sesion(config)
+    ruta = ruta_proyeccion(copiador)
+    with copiador.sesion_del_proceso():
+        copiador.copiar_archivo_base(ruta)
+
+    assert openpyxl.load_workbook(ruta).sheetnames == ['Control_Pagos']
+    assert sesion.llamadas['iniciar_excel'] == 1
+    assert sesion.llamadas['abrir'] == 1
+    assert sesion.llamadas['guardar_como'] == 1
+    assert sesion.llamadas['cerrar_excel'] == 1
+
+
+def test_guardar_proyeccion_com(config):
+    copiador, sesion = copiador_con_sesion(config)
+    ruta = ruta_proyeccion(copiador)
+    with copiador.sesion_del_proceso():
+        copiador.copiar_archivo_base(ruta)
+        df = copiador.filtrar_por_fecha(copiador.obtener_datos_control_pagos(ruta), FECHA)
+        df_agrupado = copiador.agrupar_y_calcular(copiador.preparar_datos_segunda_hoja(df))
+        copiador.guardar_proyeccion(ruta, df_agrupado, 'PROYECCION', motor='com')
+
+    assert openpyxl.load_workbook(ruta).sheetnames == ['Control_Pagos', 'PROYECCION']
+    # El libro de la copia sigue abierto: la proyección no lo vuelve a abrir
+    # Formato: 4 atributos del encabezado, bordes de las filas y relleno/negrita de los totales
+    assert dict(sesion.llamadas) == {'iniciar_excel': 1, 'abrir': 1, 'guardar_como': 1, 'guardar': 2, 'cerrar': 1,
+                                     'cerrar_excel': 1, 'formato': 7}
+
+
+def test_anexar_archivo_final_com(config):
+    copiador, sesion = copiador_con_sesion(config)
+    datos = pd.DataFrame([[f'{fila}-{columna}' for columna in range(COLUMNAS_FINAL)] for fila in range(3)])
+    copiador.anexar_archivo_final_com(datos)
+
+    ws = openpyxl.load_workbook(copiador.ruta_destino_final)['Pagos Importación']
+    assert ws['A3'].value == '0-0'
+    assert ws['L5'].value == '2-11'
+    assert ws.tables['Pagos'].ref == 'A1:L5'
+    assert dict(sesion.llamadas) == {'iniciar_excel': 1, 'abrir': 1, 'guardar': 1, 'cerrar': 1, 'cerrar_excel': 1}
+
+
+def test_proceso_completo_inicia_excel_una_vez(config):
+    copiador, sesion = copiador_con_sesion(config)
+    copiador.ejecutar_proceso()
+
+    assert copiador.estado == ESTADO_OK
+    assert sesion.llamadas['iniciar_excel'] == 1
+    assert sesion.llamadas['cerrar_excel'] == 1
+    # El origen y el archivo final; la proyección es el libro de la copia
+    assert sesion.llamadas['abrir'] == 2
+    assert sesion.llamadas['guardar_como'] == 1
+    ws = openpyxl.load_workbook(copiador.ruta_destino_final)['Pagos Importación']
+    assert ws.max_row == 2 + 3
+
+
+def test_proceso_con_error_en_el_anexo_termina_con_error(config):
+    copiador, sesion = copiador_con_sesion(config)
+
+    def anexar_con_error(df_final):
+        raise ValueError("La tabla del archivo final no tiene las columnas esperadas")
+
+    copiador.anexar_archivo_final = anexar_con_error
+    copiador.ejecutar_proceso()
+
+    assert copiador.estado == ESTADO_ERROR
+    assert copiador.reportero.dialogos == [('error', 'Error en el Archivo Final')]
@@ -0,0 +1,42 @@
+"""Modo vigilancia: cuándo se conserva la proyección ya escrita"""
+
+import json
+
+import pytest
+
+from control_pagos.proceso import ESTADO_OK
+from control_pagos.reportero import Reportero
+from control_pagos.vigilancia import Vigilancia
+
+
+class ReporteroSilencioso(Reportero):
+    def log(self, mensaje, tipo="INFO"):
+        pass
+
+
+@pytest.fixture
+def vigilancia(tmp_path):
+    ruta = tmp_path / 'config.ini'
+    ruta.write_text(
+        f"[RUTAS]\nArchivoOrigen = {tmp_path / 'origen.xlsx'}\nCarpetaIntermedia = {tmp_path / 'salida'}\n"
+        f"ArchivoFinal = {tmp_path / 'final.xlsx'}\n",
+        encoding='utf-8'
+    )
+    return Vigilancia(ruta_config=ruta, reportero=ReporteroSilencioso())
+
+
+def escribir_proyeccion(tmp_path, **informe):
+    ruta = tmp_path / '13 MARZO 2024.xlsx'
+    ruta.write_bytes(b'')
+    ruta.with_name(f"{ruta.stem}.informe.json").write_text(json.dumps(informe), encoding='utf-8')
+    return ruta
+
+
+def test_conserva_la_proyeccion_anexada(vigilancia, tmp_path):
+    ruta = escribir_proyeccion(tmp_path, estado=ESTADO_OK, huella_proyeccion='abc', anexo_completo=True)
+    assert vigilancia.huella_escrita(ruta) == 'abc'
+
+
+def test_reintenta_si_el_anexo_no_termino(vigilancia, tmp_path):
+    ruta = escribir_proyeccion(tmp_path, estado=ESTADO_OK, huella_proyeccion='abc', anexo_completo=False)
+    assert vigilancia.huella_escrita(ruta) is None